@@ -0,0 +1,191 @@
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Mapping
+
+from autogen_core import Agent, AgentId, SingleThreadedAgentRuntime
+
+# This module bounds the number of live agent instances of a SingleThreadedAgentRuntime.
+# The runtime builds one instance per AgentId (e.g. one per end user) and keeps it forever. EvictingAgentRuntime:
+# - evicts the least recently used instance beyond max_instances after each delivery, and any instance idle for
+#   idle_seconds from a sweep task that runs every sweep_seconds while the runtime is started
+# - saves the instance's state (agent.save_state()) on eviction and loads it into the new instance when the key
+#   comes back, so a returning user continues the same conversation
+# - never evicts an instance that is handling a message, whether it was sent (send_message) or published
+#   (publish_message) to it
+# State lives in one JSON file per agent under state_dir (kept across restarts; the way to bound memory), or in
+# memory. The in-memory store keeps at most max_saved_states states: beyond that the state of the user who has been
+# away longest is dropped, and that user starts a new conversation when coming back.
+# Model clients are not part of an instance: agents get them from shared.model_factory, which shares one client
+# (and its connection pool) between all instances, so reviving an instance builds no new client.
+
+
+class AgentStateStore:
+    """Saved agent states by AgentId, as JSON files under a directory or in memory (at most max_states, LRU)."""
+
+    def __init__(self, state_dir: str | None = None, max_states: int | None = 10_000):
+        self._states: OrderedDict[AgentId, Mapping[str, Any]] = OrderedDict()  # Oldest first
+        self.max_states = max_states
+        self.dropped = 0  # In-memory states dropped over max_states
+        self._dir = Path(state_dir) if state_dir else None
+        if self._dir:
+            self._dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, agent_id: AgentId) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{agent_id.type}__{agent_id.key}")
+        return self._dir / f"{safe}.json"
+
+    def save(self, agent_id: AgentId, state: Mapping[str, Any]) -> None:
+        if self._dir:
+            self._path(agent_id).write_text(json.dumps(state, default=str), encoding="utf-8")
+        else:
+            self._states[agent_id] = state
+            self._states.move_to_end(agent_id)
+            while self.max_states is not None and len(self._states) > self.max_states:
+                self._states.popitem(last=False)
+                self.dropped += 1
+
+    def pop(self, agent_id: AgentId) -> Mapping[str, Any] | None:
+        if self._dir:
+            path = self._path(agent_id)
+            if not path.exists():
+                return None
+            state = json.loads(path.read_text(encoding="utf-8"))
+            path.unlink()
+            return state
+        return self._states.pop(agent_id, None)
+
+    def __len__(self) -> int:
+        return len(list(self._dir.glob("*.json"))) if self._dir else len(self._states)
+
+
+class EvictingAgentRuntime(SingleThreadedAgentRuntime):
+    """SingleThreadedAgentRuntime with a bounded, idle-evicting set of live agent instances."""
+
+    def __init__(self, max_instances: int = 1000, idle_seconds: float | None = 600.0, state_dir: str | None = None,
+                 sweep_seconds: float | None = 60.0, max_saved_states: int | None = 10_000, **kwargs):
+        super().__init__(**kwargs)
+        self.max_instances = max_instances
+        self.idle_seconds = idle_seconds
+        self.sweep_seconds = sweep_seconds
+        self._sweeper: asyncio.Task | None = None
+        self.store = AgentStateStore(state_dir, max_saved_states)
+        self._last_used: OrderedDict[AgentId, float] = OrderedDict()  # Least recently used first
+        self._busy: dict[AgentId, int] = {}  # Messages being handled per instance
+        self.stats = {"created": 0, "revived": 0, "evicted": 0}
+
+    @property
+    def live_instances(self) -> int:
+        return len(self._instantiated_agents)
+
+    async def _get_agent(self, agent_id: AgentId) -> Agent:
+        if agent_id in self._instantiated_agents:
+            self._last_used[agent_id] = time.monotonic()
+            self._last_used.move_to_end(agent_id)
+            return self._instantiated_agents[agent_id]
+        agent = await super()._get_agent(agent_id)
+        self.stats["created"] += 1
+        state = self.store.pop(agent_id)
+        if state is not None:
+            await agent.load_state(state)  # Continue where the evicted instance stopped
+            self.stats["revived"] += 1
+        self._last_used[agent_id] = time.monotonic()
+        return agent
+
+    def start(self) -> None:
+        super().start()
+        if self.idle_seconds is not None and self.sweep_seconds:
+            self._sweeper = asyncio.create_task(self._sweep())
+
+    async def _sweep(self) -> None:
+        # Idle instances are evicted even when no message arrives
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            try:
+                await self.evict()
+            except Exception as e:
+                print(f"Agent eviction sweep failed: {e!r}")
+
+    async def _stop_sweeper(self) -> None:
+        sweeper, self._sweeper = self._sweeper, None
+        if sweeper is not None:
+            sweeper.cancel()
+            await asyncio.gather(sweeper, return_exceptions=True)
+
+    async def stop(self) -> None:
+        await self._stop_sweeper()
+        await super().stop()
+
+    async def stop_when_idle(self) -> None:
+        await super().stop_when_idle()
+        await self._stop_sweeper()
+
+    async def stop_when(self, condition) -> None:
+        await super().stop_when(condition)
+        await self._stop_sweeper()
+
+    def _hold(self, agent_ids) -> None:
+        for agent_id in agent_ids:
+            self._busy[agent_id] = self._busy.get(agent_id, 0) + 1
+
+    def _release(self, agent_ids) -> None:
+        for agent_id in agent_ids:
+            if self._busy[agent_id] == 1:
+                del self._busy[agent_id]
+            else:
+                self._busy[agent_id] -= 1
+
+    async def _process_send(self, message_envelope) -> None:
+        # Runs in its own task for every delivered message, from before the instance is built until its reply
+        self._hold([message_envelope.recipient])
+        try:
+            await super()._process_send(message_envelope)
+        finally:
+            self._release([message_envelope.recipient])
+            await self.evict()
+
+    async def _process_publish(self, message_envelope) -> None:
+        recipients = await self._subscription_manager.get_subscribed_recipients(message_envelope.topic_id)
+        self._hold(recipients)
+        try:
+            await super()._process_publish(message_envelope)
+        finally:
+            self._release(recipients)
+            await self.evict()
+
+    async def evict(self) -> int:
+        """Evict instances beyond max_instances (least recently used first) and idle ones; returns how many."""
+        now = time.monotonic()
+        evicted = 0
+        for agent_id, last_used in list(self._last_used.items()):  # Oldest first
+            over_limit = len(self._last_used) > self.max_instances
+            idle = self.idle_seconds is not None and now - last_used > self.idle_seconds
+            if not over_limit and not idle:
+                break  # Everything after this one was used more recently
+            if agent_id not in self._busy:
+                evicted += await self._evict(agent_id)
+        return evicted
+
+    async def _evict(self, agent_id: AgentId) -> bool:
+        agent = self._instantiated_agents.get(agent_id)
+        last_used = self._last_used.get(agent_id)
+        if agent is None or last_used is None:
+            return False  # Evicted concurrently
+        state = await agent.save_state()
+        if agent_id in self._busy or self._last_used.get(agent_id) != last_used:
+            return False  # Used again while its state was being saved: keep it
+        del self._last_used[agent_id]
+        del self._instantiated_agents[agent_id]  # The runtime has no public way to drop an instance
+        self.store.save(agent_id, state)
+        await agent.close()
+        self.stats["evicted"] += 1
+        return True
+
+    async def evict_all(self) -> None:
+        """Save and drop every idle instance (e.g. before shutdown, to keep their states in state_dir)."""
+        for agent_id in list(self._last_used):
+            if agent_id not in self._busy:
+                await self._evict(agent_id)
@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+from autogen_core import AgentId, MessageContext, RoutedAgent, SingleThreadedAgentRuntime, message_handler
+
+from autogen_agent_cache import EvictingAgentRuntime
+
+# This script sends messages from many users (one AgentId key each) to keyed agents that keep a conversation
+# history, through SingleThreadedAgentRuntime (every instance kept forever) and EvictingAgentRuntime (bounded).
+# Users come back at random, so evicted instances are revived from their saved state; every reply reports how
+# many messages the instance has seen, which checks that no history is lost on the way. The in-memory store is also
+# run with fewer saved states than users (--max-saved): memory stays bounded, and the dropped histories show as lost.
+# It also times building a JokeSterAgent (autogen_message_delegate.py) with the shared model client against
+# building one with its own new client. No LLM is called.
+
+
+@dataclass
+class Say:
+    text: str
+
+
+@dataclass
+class Seen:
+    count: int
+
+
+class SessionAgent(RoutedAgent):
+    def __init__(self, history_bytes: int) -> None:
+        super().__init__("Session")
+        self._history_bytes = history_bytes
+        self._history: list[str] = []
+
+    @message_handler
+    async def on_say(self, message: Say, ctx: MessageContext) -> Seen:
+        self._history.append(message.text * (self._history_bytes // max(len(message.text), 1)))
+        return Seen(count=len(self._history))
+
+    async def save_state(self) -> Mapping[str, Any]:
+        return {"history": self._history}
+
+    async def load_state(self, state: Mapping[str, Any]) -> None:
+        self._history = list(state["history"])
+
+
+async def run(runtime, users: int, messages: int, history_bytes: int, seed: int) -> dict:
+    await SessionAgent.register(runtime, "session", lambda: SessionAgent(history_bytes))
+    runtime.start()
+    rng = random.Random(seed)
+    expected: dict[str, int] = {}
+    lost = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(messages // 32):
+        batch = [f"user-{rng.randrange(users)}" for _ in range(32)]  # 32 users talk at the same time
+        replies = await asyncio.gather(*(runtime.send_message(Say("hello "), AgentId("session", key)) for key in batch))
+        for key, reply in zip(batch, replies):
+            expected[key] = expected.get(key, 0) + 1
+            lost += reply.count != expected[key]
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    live = len(runtime._instantiated_agents)
+    await runtime.stop()
+    return {"msg/s": messages / elapsed, "live": live, "peak MB": peak / 1e6, "now MB": current / 1e6, "lost": lost,
+            **getattr(runtime, "stats", {})}
+
+
+async def time_agent_builds(repeat: int) -> tuple[float, float]:
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")  # Clients are built, never called
+    from autogen_agentchat.agents import AssistantAgent
+    from autogen_ext.models.openai import OpenAIChatCompletionClient
+    import autogen_message_delegate
+
+    autogen_message_delegate.JokeSterAgent()  # First build creates the shared client
+    started = time.perf_counter()
+    for _ in range(repeat):
+        autogen_message_delegate.JokeSterAgent()
+    shared = (time.perf_counter() - started) / repeat
+    clients = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        client = OpenAIChatCompletionClient(model="gpt-4o-mini")
+        AssistantAgent("JokeSter", model_client=client)
+        clients.append(client)
+    own = (time.perf_counter() - started) / repeat
+    for client in clients:
+        await client.close()
+    return shared, own
+
+
+async def main(args):
+    print(f"{args.users} users, {args.messages} messages, {args.history_bytes} bytes of history per message")
+    print(f"{'runtime':<28}{'msg/s':>8}{'live':>7}{'peak MB':>9}{'now MB':>8}{'created':>9}{'revived':>9}{'evicted':>9}{'lost':>6}")
+    with tempfile.TemporaryDirectory() as state_dir:
+        runtimes = {"single-threaded": lambda: SingleThreadedAgentRuntime(),
+                    f"evicting (max {args.max_instances})": lambda: EvictingAgentRuntime(max_instances=args.max_instances),
+                    f"evicting ({args.max_saved} saved)": lambda: EvictingAgentRuntime(
+                        max_instances=args.max_instances, max_saved_states=args.max_saved),
+                    f"evicting (max {args.max_instances}, disk)": lambda: EvictingAgentRuntime(
+                        max_instances=args.max_instances, state_dir=state_dir)}
+        for name, make in runtimes.items():
+            r = await run(make(), args.users, args.messages, args.history_bytes, args.seed)
+            print(f"{name:<28}{r['msg/s']:>8.0f}{r['live']:>7}{r['peak MB']:>9.1f}{r['now MB']:>8.1f}"
+                  f"{r.get('created', r['live']):>9}{r.get('revived', 0):>9}{r.get('evicted', 0):>9}{r['lost']:>6}")
+
+    shared, own = await time_agent_builds(args.builds)
+    print(f"\nNew JokeSterAgent: {shared * 1e6:.0f} us with the shared model client, {own * 1e6:.0f} us with its own client")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live instances, memory and throughput with and without eviction")
+    parser.add_argument("--users", type=int, default=2000, help="Distinct AgentId keys")
+    parser.add_argument("--messages", type=int, default=10000, help="Messages in total")
+    parser.add_argument("--max-instances", type=int, default=200, help="Live instances kept by the evicting runtime")
+    parser.add_argument("--max-saved", type=int, default=500, help="States kept by the bounded in-memory store")
+    parser.add_argument("--history-bytes", type=int, default=1000, help="History added per message")
+    parser.add_argument("--builds", type=int, default=200, help="Agents built per timing")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
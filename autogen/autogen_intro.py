@@ -2,9 +2,13 @@ import asyncio
 from dataclasses import dataclass
 from autogen_core import AgentId, MessageContext, RoutedAgent, message_handler, SingleThreadedAgentRuntime
 import random
+import sys
+
+from autogen_sharded_runtime import ShardedAgentRuntime  # Agent instances sharded by key over worker processes
 
 # This script demonstrates a simple AutoGen agent that responds to user messages with a random AI-themed joke.
 # It shows how to define message and agent classes, register the agent, and send/receive messages asynchronously.
+# Run with --workers N to serve one agent instance per user key on N worker processes instead.
 
 # Helper function to return a random AI-themed joke
 def get_ai_joke():
@@ -63,6 +67,23 @@ async def main():
     print(f"\n Response: \n {result.content}")  # Print the agent's response
 
 
+## Same agent on a pool of worker processes: one agent instance per user key, keys spread over the workers
+async def main_sharded(workers: int, users: int = 8):
+    runtime = ShardedAgentRuntime(workers=workers)
+    runtime.register("joke_star_agent", JokeStarAgent)  # The class is the factory (it must be picklable)
+    async with runtime:
+        # Every user is a key: its messages always reach the same instance, different users run in parallel
+        results = await asyncio.gather(*(
+            runtime.send_message(Message(f"Hi, I am user {i}. Can you tell me a joke?"), AgentId("joke_star_agent", f"user-{i}"))
+            for i in range(users)))
+        for result in results:
+            print(f"\n Response: \n {result.content}")
+        print(f"\n Messages per worker: {runtime.sent_per_worker}")
+
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if "--workers" in sys.argv:
+        asyncio.run(main_sharded(workers=int(sys.argv[sys.argv.index("--workers") + 1])))
+    else:
+        asyncio.run(main())
@@ -1,24 +1,28 @@
 import asyncio
+import functools
 from dataclasses import dataclass
-from autogen_core import AgentId, MessageContext, RoutedAgent, message_handler, SingleThreadedAgentRuntime
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-from autogen_ext.models.ollama import OllamaChatCompletionClient
+from typing import Any, Mapping
+from autogen_core import AgentId, MessageContext, RoutedAgent, message_handler
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
 
 from dotenv import load_dotenv
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.model_factory import get_autogen_model_client as get_model_client, aclose_clients  # Shared, pooled model clients
+from shared.tracing import instrument_autogen_agent, instrument_autogen_client  # Agent-turn and LLM spans when TRACE_PATH is set
+from autogen_sharded_runtime import ShardedAgentRuntime  # Agent instances sharded by key over worker processes
+from autogen_agent_cache import EvictingAgentRuntime  # Bounded live instances, state saved on eviction
 
 # This script demonstrates an AutoGen agent that delegates joke generation to an LLM-powered assistant agent.
 # It shows how to set up model clients, delegate message handling, and orchestrate agent communication asynchronously.
+# Run with --workers N to serve one agent instance per user key on N worker processes instead.
 
 load_dotenv()
 
-# Helper function to get a model client for the assistant agent
-def get_model_client(model_name: str):
-    if model_name == "gpt":
-        return OpenAIChatCompletionClient(model="gpt-4o-mini")  # Use OpenAI GPT model
-    elif model_name == "llama":
-        return OllamaChatCompletionClient(model="llama3.2:1b")  # Use local Ollama Llama model
+STATE_DIR = str(Path(__file__).resolve().parent / "agent_states")  # Saved states of evicted agent instances
 
 
 # Step 1: Define the message class
@@ -33,8 +37,8 @@ class Message:
 class JokeSterAgent(RoutedAgent):
     def __init__(self) -> None:
         super().__init__("JokeSter")  # Initialize the agent with a name
-        model_client = get_model_client("gpt")  # Choose the model client (GPT or Llama)
-        self._delegate = AssistantAgent("JokeSter", model_client=model_client)  # Delegate for LLM responses
+        model_client = instrument_autogen_client(get_model_client("gpt"))  # Choose the model client (GPT or Llama)
+        self._delegate = instrument_autogen_agent(AssistantAgent("JokeSter", model_client=model_client))  # Delegate for LLM responses
 
     @message_handler
     async def on_my_message(self, message: Message, ctx: MessageContext) -> Message:
@@ -53,10 +57,18 @@ class JokeSterAgent(RoutedAgent):
         Here's a joke for you: {response_content}"""
         return Message(content=reply)
 
+    # The conversation so far; lets the runtime evict an idle instance and revive it later for the same key
+    async def save_state(self) -> Mapping[str, Any]:
+        return {"delegate": await self._delegate.save_state()}
+
+    async def load_state(self, state: Mapping[str, Any]) -> None:
+        await self._delegate.load_state(state["delegate"])
+
 ## send message and run the agent
 async def main():
-    # Step 3: Create the runtime (single-threaded for simplicity)
-    runtime = SingleThreadedAgentRuntime()
+    # Step 3: Create the runtime (single-threaded; at most 1000 live instances, idle ones dropped after 10 min and
+    # their state saved to disk, so memory does not grow with the number of users)
+    runtime = EvictingAgentRuntime(max_instances=1000, idle_seconds=600, state_dir=STATE_DIR)
     # Register the JokeStarAgent with the runtime
     await JokeSterAgent.register(runtime, "joke_ster_agent", lambda: JokeSterAgent())
     runtime.start()
@@ -70,7 +82,26 @@ async def main():
     
     print(f"\n Response: \n {result.content}")  # Print the agent's response
 
+    await runtime.stop()  # Stop the runtime before releasing the shared model clients
+    await aclose_clients()  # Release pooled connections before the event loop closes
+
+
+## Same agent on a pool of worker processes: one agent instance per user key, keys spread over the workers
+async def main_sharded(workers: int, users: int = 4):
+    # Every worker bounds its own live instances; a key always lands on the same worker, so they share one state_dir
+    factory = functools.partial(EvictingAgentRuntime, max_instances=1000, state_dir=STATE_DIR)
+    runtime = ShardedAgentRuntime(workers=workers, runtime_factory=factory)
+    runtime.register("joke_ster_agent", JokeSterAgent)  # The class is the factory (it must be picklable)
+    async with runtime:  # Each worker builds and closes its own model clients
+        results = await asyncio.gather(*(
+            runtime.send_message(Message(f"Hi, I am user {i}. Can you tell me a AI joke?"), AgentId("joke_ster_agent", f"user-{i}"))
+            for i in range(users)))
+        for result in results:
+            print(f"\n Response: \n {result.content}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if "--workers" in sys.argv:
+        asyncio.run(main_sharded(workers=int(sys.argv[sys.argv.index("--workers") + 1])))
+    else:
+        asyncio.run(main())
@@ -1,48 +1,72 @@
 import asyncio
 from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.conditions import TextMentionTermination
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_core import CancellationToken
-from autogen_ext.models.openai import OpenAIChatCompletionClient    
-from autogen_ext.models.ollama import OllamaChatCompletionClient
-from autogen_ext.tools.langchain import LangChainToolAdapter
-from langchain_community.utilities import GoogleSerperAPIWrapper
-from langchain.agents import Tool
 from dotenv import load_dotenv
-from autogen_agentchat.messages import TextMessage
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.model_factory import get_autogen_model_client as get_model_client, aclose_clients  # Shared, pooled model clients
+from shared.tracing import get_tracer, instrument_autogen_agent, instrument_autogen_client, instrument_autogen_tools  # Spans when TRACE_PATH is set
+from shared.search import get_search_backend  # Shared, cached web search
+from shared.llm_cache import get_llm_cache  # Stable prompt prefixes and a local response cache (LLM_CACHE_PATH to keep it)
+from autogen_termination import research_termination  # Stop on approval, converged drafts, repeated feedback or budgets
+from autogen_agentchat.base import TaskResult
+from autogen_agentchat.messages import BaseChatMessage, TextMessage
 
 # This script demonstrates a multi-agent AutoGen workflow for collaborative research and review.
 # Agents use internet search tools, collaborate in a round-robin fashion, and produce a consolidated Markdown report.
+# The team run is streamed: messages are appended to conversation_log.txt as they arrive, and a running summary is
+# updated after every round, so the final consolidation reads only that summary plus the last round.
+# All agents share one model client behind shared/llm_cache.py: stable prompt prefixes for provider and local-server
+# prefix caching, and a response cache, so replaying the same research task is answered locally.
 
 load_dotenv()
 
 # Helper function to set up and return a list of tools for the agents
 def get_tools():
-    # Internet search tool (Google Serper via LangChain)
-    serper = GoogleSerperAPIWrapper()
-    langchain_serper = Tool(name="internet_search", func=serper.run, description="Tool for searching on internet")
-    autogen_serper = LangChainToolAdapter(langchain_serper)  # Adapter for AutoGen
+    # Internet search tool (shared Serper backend, called natively async by AutoGen)
+    autogen_serper = get_search_backend().as_autogen_tool(name="internet_search", description="Tool for searching on internet")
     autogen_tools = [autogen_serper]
     
     return autogen_tools
 
-# Helper function to get a model client for the agent (OpenAI or Ollama)
-def get_model_client(model_name: str):
-    if model_name == "gpt":
-        return OpenAIChatCompletionClient(model="gpt-4o-mini")  # Use OpenAI GPT model
-    elif model_name == "llama":
-        return OllamaChatCompletionClient(model="llama3.2:1b")  # Use local Ollama Llama model
+
+# Conversation messages as "source: content" lines
+def format_messages(messages) -> str:
+    return "\n".join(f"{message.source}: {message.content}" for message in messages)
+
+
+# Fold one finished round into the running summary; waits for the previous update so rounds stay in order
+async def update_summary(summarizer_agent, previous_task, round_messages) -> str:
+    summary = await previous_task if previous_task else ""
+    await summarizer_agent.on_reset(CancellationToken())  # Each update sees only the summary and the new round
+    message = TextMessage(content=f"""Summary so far:
+                                  {summary or "(empty: this is the first round)"}
+
+                                  Next round:
+                                  {format_messages(round_messages)}""",
+                          source="user")
+    response = await summarizer_agent.on_messages([message], cancellation_token=CancellationToken())
+    return response.chat_message.content
 
 
 ## send message and run the multi-agent workflow
-async def main(user_message: str):
-    autogen_tools = get_tools()  # Get the list of tools (search)
-    model_client = get_model_client("gpt")  # Choose the model client
+# The team stops at the first of: "APPROVE", max_turns, drafts changing less than min_draft_change, feedback less
+# than min_feedback_novelty new, max_tokens used by the team, or timeout_seconds of wall-clock time
+async def main(user_message: str, max_turns: int = 5, min_draft_change: float | None = 0.05,
+               min_feedback_novelty: float | None = 0.2, max_tokens: int | None = 100_000,
+               timeout_seconds: float | None = 600):
+    autogen_tools = instrument_autogen_tools(get_tools())  # Get the list of tools (search)
+    # Choose the model client; the cache layer answers repeated requests locally (re-running a task costs ~nothing)
+    model_client = get_llm_cache().as_autogen_client(instrument_autogen_client(get_model_client("gpt")))
     
     # Create the Researcher agent with internet search tool and detailed system prompt
     researcher_agent = AssistantAgent(name="researcher", 
                        model_client=model_client, 
                        tools=autogen_tools, 
+                       reflect_on_tool_use=True,  # End each turn with a written draft, not raw search results
                        system_message="""
                        You are the Researcher Agent, responsible for gathering accurate and relevant historical information and biographical data about famous individuals using internet sources. Your tasks include:
                         - Searching the Internet: Use up-to-date and reliable sources to collect detailed and factual information about historical events, time periods, cultural movements, and well-known figures from various domains (e.g., politics, science, arts).
@@ -72,34 +96,65 @@ async def main(user_message: str):
         name="consolidator",
         model_client=model_client,
         system_message="""
-        You are the Consolidator Agent. Your job is to take the entire conversation between the Researcher and Reviewer agents, and produce a well-formatted Markdown (.md) document that summarizes the research process and presents the final approved content. Structure the document with clear sections, such as Introduction, Research Process, Feedback & Revisions, and Final Output. Use Markdown formatting for headings, lists, and emphasis. Output only the Markdown content.
+        You are the Consolidator Agent. Your job is to take the conversation between the Researcher and Reviewer agents (a running summary of the earlier rounds plus the last round in full), and produce a well-formatted Markdown (.md) document that summarizes the research process and presents the final approved content. Structure the document with clear sections, such as Introduction, Research Process, Feedback & Revisions, and Final Output. Use Markdown formatting for headings, lists, and emphasis. Output only the Markdown content.
+        """
+    )
+
+    # Summarizer agent: folds each finished round into a running summary while the team keeps talking
+    summarizer_agent = AssistantAgent(
+        name="summarizer",
+        model_client=model_client,
+        system_message="""
+        You are the Summarizer Agent. You keep a running summary of a research conversation between a Researcher and a Reviewer agent. Given the summary so far and the next round of the conversation, return the updated summary. Keep the facts, sources, the reviewer's feedback and how it was addressed; drop repetition. Output only the summary.
         """
     )
 
-    # Set up a round-robin group chat with a termination condition ("APPROVE")
-    text_termination = TextMentionTermination("APPROVE")
-    team = RoundRobinGroupChat([researcher_agent, reviewer_agent], termination_condition=text_termination, max_turns=5)
-    result = await team.run(task=user_message)
+    # One agent span per turn of each agent (no-op unless TRACE_PATH is set)
+    for agent in (researcher_agent, reviewer_agent, consolidator_agent, summarizer_agent):
+        instrument_autogen_agent(agent)
+
+    # Set up a round-robin group chat with the termination conditions (any one of them stops the team)
+    termination = research_termination("APPROVE", researcher=researcher_agent.name, reviewer=reviewer_agent.name,
+                                       min_draft_change=min_draft_change, min_feedback_novelty=min_feedback_novelty,
+                                       max_tokens=max_tokens, timeout_seconds=timeout_seconds)
+    team = RoundRobinGroupChat([researcher_agent, reviewer_agent], termination_condition=termination, max_turns=max_turns)
 
-    # Write the conversation to a log file
-    with open("conversation_log.txt", "w", encoding="utf-8") as f:
-        for message in result.messages:
-            f.write(f"{message.source}:\t{message.content}\n\n")
+    # Stream the team run: every message is written to the log as it arrives, and every finished round
+    # (researcher's draft and reviewer's feedback) is folded into the running summary in the background
+    summary_task = None  # Updates chain on the previous one, so rounds are folded in order
+    current_round = []  # Chat messages of the round in progress (tool call events are only logged)
+    with get_tracer().span("run", "research team") as span, open("conversation_log.txt", "w", encoding="utf-8") as log:  # Parent of the team's agent turns
+        async for message in team.run_stream(task=user_message):
+            if isinstance(message, TaskResult):
+                print(f"Team stopped: {message.stop_reason}\n")  # Which condition(s) fired
+                span.set(stop_reason=message.stop_reason)
+                break
+            log.write(f"{message.source}:\t{message.content}\n\n")
+            log.flush()
             print(f"{message.source}:\t{message.content}\n")
+            if not isinstance(message, BaseChatMessage) or message.source == "user":
+                continue
+            # The researcher answering the reviewer starts a new round: the previous one is finished
+            if message.source == researcher_agent.name and current_round and current_round[-1].source == reviewer_agent.name:
+                summary_task = asyncio.create_task(update_summary(summarizer_agent, summary_task, current_round))
+                current_round = []
+            current_round.append(message)
+        summary = await summary_task if summary_task else ""
 
     # After approval, consolidate and write markdown file
-    # Prepare the conversation as a string for the consolidator
-    conversation_text = "\n".join([
-        f"{message.source}: {message.content}" for message in result.messages
-    ])
+    # Only the running summary and the last round go to the consolidator, however long the session was
+    last_round_text = format_messages(current_round)
     
     # Ask the consolidator to format the conversation as markdown
     message = TextMessage(content=f"""Consolidate the following conversation into a well-structured Markdown file as described in your instructions.
-                                  Conversation is between two AI agents: Researcher and Reviewer. 
-                                  Consolidator is responsible for taking the entire conversation between the Researcher and Reviewer agents, and produce a well-formatted Markdown (.md) document that summarizes the research process and presents the final approved content. Structure the document with clear sections, such as Introduction, Research Process, Feedback & Revisions, and Final Output. Use Markdown formatting for headings, lists, and emphasis. Output only the Markdown content.
+                                  Conversation is between two AI agents: Researcher and Reviewer. The task was: {user_message}
+                                  Consolidator is responsible for taking the conversation between the Researcher and Reviewer agents, and produce a well-formatted Markdown (.md) document that summarizes the research process and presents the final approved content. Structure the document with clear sections, such as Introduction, Research Process, Feedback & Revisions, and Final Output. Use Markdown formatting for headings, lists, and emphasis. Output only the Markdown content.
                                  
-                                  Below is Conversation:
-                                  {conversation_text}""", 
+                                  Summary of the earlier rounds:
+                                  {summary or "(none: the conversation had a single round)"}
+
+                                  Last round:
+                                  {last_round_text}""", 
                                   source="user")
     consolidation = await consolidator_agent.on_messages(
         [message], cancellation_token=CancellationToken()
@@ -109,6 +164,10 @@ async def main(user_message: str):
     with open("final_output.md", "w", encoding="utf-8") as f:
         f.write(consolidation.chat_message.content)
 
+    print(get_llm_cache().summary())  # Hit rate, tokens saved and prompt prefix reuse
+
+    await aclose_clients()  # Release pooled connections before the event loop closes
+
 
 if __name__ == "__main__":
     asyncio.run(main(user_message="Write a short biography of Mahatma Gandhi"))
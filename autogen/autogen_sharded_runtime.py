@@ -0,0 +1,180 @@
+import asyncio
+import functools
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import zlib
+from typing import Any, Callable
+
+from autogen_core import AgentId, SingleThreadedAgentRuntime
+
+# This module spreads AutoGen agent instances over a pool of worker processes, sharded by AgentId.key.
+# SingleThreadedAgentRuntime runs every agent of the process on one event loop, so CPU-heavy handlers and many
+# concurrent sessions (one key per user) share a single core. Here:
+# - Each worker process runs its own SingleThreadedAgentRuntime with the same registered agent types
+# - send_message(message, AgentId(type, key)) is routed to worker crc32(key) % workers, so every message for
+#   one key reaches the same agent instance (and its state), while different keys run on different cores
+# - Requests and replies travel over one pipe per worker; many messages can be in flight on each worker
+# - Each worker builds its own model clients (shared.model_factory caches them per process) and closes them on stop
+# Messages, replies and agent classes must be picklable: define them at module level. Agents reach other agents
+# through their own worker's runtime, so keys that talk to each other directly should map to the same worker.
+# Worker processes are spawned, so scripts using this must keep their entry point under `if __name__ == "__main__":`.
+
+
+def shard_of(key: str, workers: int) -> int:
+    """Worker index for an AgentId key; stable across processes and runs (unlike hash())."""
+    return zlib.crc32(key.encode()) % workers
+
+
+async def _start_runtime(runtime_factory: Callable[[], SingleThreadedAgentRuntime],
+                         registrations: list[tuple[str, type, tuple]]) -> SingleThreadedAgentRuntime:
+    runtime = runtime_factory()
+    for agent_type, agent_class, args in registrations:
+        await agent_class.register(runtime, agent_type, functools.partial(agent_class, *args))
+    runtime.start()
+    return runtime
+
+
+def _read_pipe(conn, loop: asyncio.AbstractEventLoop, deliver) -> None:
+    # Blocking reads run on a thread and hand every item to the event loop; None marks the end of the stream
+    while True:
+        try:
+            item = conn.recv()
+        except (EOFError, OSError):
+            item = None
+        loop.call_soon_threadsafe(deliver, item)
+        if item is None:
+            return
+
+
+async def _serve(conn, runtime_factory, registrations: list[tuple[str, type, tuple]]) -> None:
+    runtime = await _start_runtime(runtime_factory, registrations)
+    requests: asyncio.Queue = asyncio.Queue()
+    threading.Thread(target=_read_pipe, args=(conn, asyncio.get_running_loop(), requests.put_nowait), daemon=True).start()
+
+    async def handle(request_id: int, message: Any, agent_type: str, key: str) -> None:
+        try:
+            reply = (request_id, True, await runtime.send_message(message, AgentId(agent_type, key)))
+        except Exception as e:
+            reply = (request_id, False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:  # The reply or the exception could not be pickled
+            conn.send((request_id, False, RuntimeError(f"Unpicklable reply: {e!r}")))
+
+    tasks = set()
+    while (request := await requests.get()) is not None:
+        task = asyncio.create_task(handle(*request))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks, return_exceptions=True)  # Answer what was already received
+    await runtime.stop_when_idle()
+    model_factory = sys.modules.get("shared.model_factory")
+    if model_factory is not None:
+        await model_factory.aclose_clients()  # Release this worker's pooled connections
+
+
+def _worker_main(conn, runtime_factory, registrations: list[tuple[str, type, tuple]]) -> None:
+    asyncio.run(_serve(conn, runtime_factory, registrations))
+    conn.close()
+
+
+class _Worker:
+    """Parent-side handle of one worker process: sends requests and resolves their futures from the replies."""
+
+    def __init__(self, context, runtime_factory, registrations: list[tuple[str, type, tuple]]):
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, runtime_factory, registrations),
+                                       daemon=True)
+        self._ids = itertools.count()
+        self._pending: dict[int, asyncio.Future] = {}
+        self.sent = 0
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.process.start()
+        threading.Thread(target=_read_pipe, args=(self._conn, loop, self._deliver), daemon=True).start()
+
+    def _deliver(self, reply) -> None:
+        if reply is None:  # The worker exited: fail whatever it did not answer
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Agent worker process exited"))
+            self._pending.clear()
+            return
+        request_id, ok, value = reply
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            return  # Cancelled by the caller
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    async def send(self, message: Any, agent_type: str, key: str) -> Any:
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._conn.send((request_id, message, agent_type, key))
+        self.sent += 1
+        try:
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def stop(self, timeout: float) -> None:
+        try:
+            self._conn.send(None)
+        except OSError:
+            pass  # Already gone
+        await asyncio.to_thread(self.process.join, timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._conn.close()
+
+
+class ShardedAgentRuntime:
+    """Agent runtime that shards agent instances by AgentId.key over worker processes."""
+
+    def __init__(self, workers: int | None = None, start_method: str = "spawn",
+                 runtime_factory: Callable[[], SingleThreadedAgentRuntime] = SingleThreadedAgentRuntime):
+        self.workers = workers or os.cpu_count() or 1
+        self.runtime_factory = runtime_factory  # Runtime of each worker, e.g. partial(EvictingAgentRuntime, ...)
+        self._context = multiprocessing.get_context(start_method)
+        self._registrations: list[tuple[str, type, tuple]] = []
+        self._pool: list[_Worker] = []
+
+    def register(self, agent_type: str, agent_class: type, *args) -> None:
+        """Register an agent type on every worker; instances are built as agent_class(*args). Call before start()."""
+        if self._pool:
+            raise RuntimeError("Register agent types before start()")
+        self._registrations.append((agent_type, agent_class, args))
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._pool = [_Worker(self._context, self.runtime_factory, self._registrations) for _ in range(self.workers)]
+        for worker in self._pool:
+            worker.start(loop)
+
+    async def send_message(self, message: Any, recipient: AgentId) -> Any:
+        """Send a message to an agent on the worker that owns recipient.key and return its reply."""
+        if not self._pool:
+            raise RuntimeError("The runtime is not started")
+        return await self._pool[shard_of(recipient.key, self.workers)].send(message, recipient.type, recipient.key)
+
+    @property
+    def sent_per_worker(self) -> list[int]:
+        return [worker.sent for worker in self._pool]
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Let every worker finish the messages it received, then shut the pool down."""
+        await asyncio.gather(*(worker.stop(timeout) for worker in self._pool))
+        self._pool = []
+
+    async def __aenter__(self) -> "ShardedAgentRuntime":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+
+from autogen_core import AgentId, MessageContext, RoutedAgent, SingleThreadedAgentRuntime, message_handler
+
+from autogen_sharded_runtime import ShardedAgentRuntime
+
+# This script measures messages per second through SingleThreadedAgentRuntime and ShardedAgentRuntime as the
+# number of AgentId keys grows (think one key per user session). No LLM is called; handlers are either
+# - cpu: hashing for about --cpu-ms milliseconds (stands in for parsing, scoring, local models), or
+# - io:  waiting --io-ms milliseconds (stands in for a remote model call)
+# With one key every message reaches the same agent instance, so sharding cannot help; with many keys the
+# sharded runtime spreads the instances over its worker processes.
+
+
+@dataclass
+class Work:
+    kind: str
+    amount_ms: float
+
+
+@dataclass
+class Done:
+    key: str
+
+
+class WorkerAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Worker")
+
+    @message_handler
+    async def on_work(self, message: Work, ctx: MessageContext) -> Done:
+        if message.kind == "cpu":
+            deadline = time.perf_counter() + message.amount_ms / 1000
+            digest = b""
+            while time.perf_counter() < deadline:
+                digest = hashlib.sha256(digest).digest()
+        else:
+            await asyncio.sleep(message.amount_ms / 1000)
+        return Done(key=self.id.key)
+
+
+async def send_all(runtime, messages: int, keys: int, work: Work, concurrency: int) -> float:
+    """Send `messages` messages round-robin over `keys` keys, at most `concurrency` in flight; returns messages/s."""
+    limit = asyncio.Semaphore(concurrency)
+
+    async def send(i: int):
+        async with limit:
+            await runtime.send_message(work, AgentId("worker", f"user-{i % keys}"))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(messages)))
+    return messages / (time.perf_counter() - started)
+
+
+async def main(args):
+    work = {"cpu": Work("cpu", args.cpu_ms), "io": Work("io", args.io_ms)}
+
+    single = SingleThreadedAgentRuntime()
+    await WorkerAgent.register(single, "worker", WorkerAgent)
+    single.start()
+    sharded = ShardedAgentRuntime(workers=args.workers)
+    sharded.register("worker", WorkerAgent)
+    await sharded.start()
+    try:
+        for runtime in (single, sharded):  # Warm up: worker start-up and first agent instances
+            await send_all(runtime, args.workers * 4, args.workers * 4, work["io"], args.concurrency)
+
+        print(f"{args.messages} messages per run, {args.concurrency} in flight, {args.workers} worker processes")
+        print(f"{'handler':<8}{'keys':>6}{'single msg/s':>14}{'sharded msg/s':>15}{'speed-up':>10}")
+        for kind in args.handlers:
+            for keys in args.keys:
+                single_rate = await send_all(single, args.messages, keys, work[kind], args.concurrency)
+                sharded_rate = await send_all(sharded, args.messages, keys, work[kind], args.concurrency)
+                print(f"{kind:<8}{keys:>6}{single_rate:>14.0f}{sharded_rate:>15.0f}{sharded_rate / single_rate:>9.1f}x")
+    finally:
+        await single.stop()
+        await sharded.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Messages/s of single-threaded vs sharded AutoGen runtimes")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes of the sharded runtime")
+    parser.add_argument("--messages", type=int, default=400, help="Messages per run")
+    parser.add_argument("--concurrency", type=int, default=64, help="Messages in flight")
+    parser.add_argument("--keys", type=int, nargs="+", default=[1, 4, 16, 64], help="Distinct AgentId keys")
+    parser.add_argument("--handlers", nargs="+", choices=["cpu", "io"], default=["cpu", "io"])
+    parser.add_argument("--cpu-ms", type=float, default=2.0, help="CPU time per cpu message")
+    parser.add_argument("--io-ms", type=float, default=20.0, help="Wait per io message")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,140 @@
+import re
+from typing import Sequence
+
+from autogen_agentchat.base import OrTerminationCondition, TerminatedException, TerminationCondition
+from autogen_agentchat.conditions import TextMentionTermination, TimeoutTermination, TokenUsageTermination
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, StopMessage, ToolCallSummaryMessage
+
+# This module adds cheap, local termination conditions for researcher/reviewer loops (RoundRobinGroupChat), so a
+# team stops as soon as further rounds stop paying off instead of only on "APPROVE" or max_turns:
+# - DraftConvergenceTermination: the researcher's new draft barely differs from its draft before the last review
+# - FeedbackNoveltyTermination:  the reviewer's new feedback repeats what it already said
+# - research_termination() combines them with "APPROVE", a token budget and a wall-clock budget
+# Text is compared as sets of word 3-grams (shingles): linear in the message length, no model call.
+# They combine with AutoGen's own conditions (a | b) and with the team's max_turns. TaskResult.stop_reason describes
+# every condition that fired, e.g. "Drafts of 'researcher' converged: changed 2% (< 5%) since the draft before ...",
+# "Text 'APPROVE' mentioned", "Token usage limit reached, ..." or "Maximum number of turns 5 reached.".
+
+
+def shingles(text: str, size: int = 3) -> set[tuple[str, ...]]:
+    """Word n-grams of a text, lower-cased; a short text is its own single shingle."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _texts(messages: Sequence[BaseAgentEvent | BaseChatMessage], source: str) -> list[str]:
+    # Chat messages only: tool call requests and results are steps towards a draft, not the draft
+    return [message.to_text() for message in messages if isinstance(message, BaseChatMessage) and message.source == source]
+
+
+def _is_draft(message: BaseAgentEvent | BaseChatMessage, source: str) -> bool:
+    # A text reply; a ToolCallSummaryMessage is raw tool output (identical for a repeated, cached search)
+    return (isinstance(message, BaseChatMessage) and not isinstance(message, ToolCallSummaryMessage)
+            and message.source == source)
+
+
+class DraftConvergenceTermination(TerminationCondition):
+    """Terminate when a text draft from `source` changed less than `min_change` (0-1) across a review by `reviewer`.
+
+    Only text replies count as drafts, not tool call summaries, and two drafts are only compared when the
+    reviewer answered in between, so the team never stops before the first review round.
+    """
+
+    def __init__(self, source: str = "researcher", min_change: float = 0.05, reviewer: str = "reviewer") -> None:
+        self._source = source
+        self._min_change = min_change
+        self._reviewer = reviewer
+        self._previous: set | None = None
+        self._reviewed = False  # The reviewer answered since the previous draft
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> StopMessage | None:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if isinstance(message, BaseChatMessage) and message.source == self._reviewer:
+                self._reviewed = self._previous is not None
+                continue
+            if not _is_draft(message, self._source):
+                continue
+            current = shingles(message.to_text())
+            if self._previous is not None and self._reviewed:
+                union = current | self._previous
+                change = 1 - len(current & self._previous) / len(union) if union else 0.0
+                if change < self._min_change:
+                    self._terminated = True
+                    return StopMessage(content=f"Drafts of '{self._source}' converged: changed {change:.0%} "
+                                               f"(< {self._min_change:.0%}) since the draft before the last review",
+                                       source="DraftConvergenceTermination")
+            self._previous = current
+            self._reviewed = False
+        return None
+
+    async def reset(self) -> None:
+        self._previous = None
+        self._reviewed = False
+        self._terminated = False
+
+
+class FeedbackNoveltyTermination(TerminationCondition):
+    """Terminate when feedback from `source` is less than `min_novelty` (0-1) new compared to its earlier feedback."""
+
+    def __init__(self, source: str = "reviewer", min_novelty: float = 0.2) -> None:
+        self._source = source
+        self._min_novelty = min_novelty
+        self._seen: set = set()
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> StopMessage | None:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for text in _texts(messages, self._source):
+            current = shingles(text)
+            if self._seen and current:
+                novelty = len(current - self._seen) / len(current)
+                if novelty < self._min_novelty:
+                    self._terminated = True
+                    return StopMessage(content=f"Feedback of '{self._source}' stopped adding: {novelty:.0%} new "
+                                               f"(< {self._min_novelty:.0%})",
+                                       source="FeedbackNoveltyTermination")
+            self._seen |= current
+        return None
+
+    async def reset(self) -> None:
+        self._seen = set()
+        self._terminated = False
+
+
+def research_termination(approve_text: str | None = "APPROVE", researcher: str = "researcher",
+                         reviewer: str = "reviewer", min_draft_change: float | None = 0.05,
+                         min_feedback_novelty: float | None = 0.2, max_tokens: int | None = None,
+                         timeout_seconds: float | None = None) -> TerminationCondition:
+    """Any-of termination for a researcher/reviewer team; pass None to leave a check out.
+
+    The wall-clock budget starts when this is called (and again after every run of the team), so build it right
+    before running the team.
+    """
+    conditions: list[TerminationCondition] = []
+    if approve_text:
+        conditions.append(TextMentionTermination(approve_text))
+    if min_draft_change is not None:
+        conditions.append(DraftConvergenceTermination(researcher, min_draft_change, reviewer))
+    if min_feedback_novelty is not None:
+        conditions.append(FeedbackNoveltyTermination(reviewer, min_feedback_novelty))
+    if max_tokens is not None:
+        conditions.append(TokenUsageTermination(max_total_token=max_tokens))
+    if timeout_seconds is not None:
+        conditions.append(TimeoutTermination(timeout_seconds))
+    if not conditions:
+        raise ValueError("research_termination needs at least one condition")
+    return conditions[0] if len(conditions) == 1 else OrTerminationCondition(*conditions)
@@ -1,16 +1,19 @@
 import asyncio
 from dataclasses import dataclass
 from autogen_core import CancellationToken
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-from autogen_ext.models.ollama import OllamaChatCompletionClient
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
 from autogen_ext.tools.langchain import LangChainToolAdapter
-from langchain_community.utilities import GoogleSerperAPIWrapper
 from langchain_community.agent_toolkits import FileManagementToolkit
 from IPython.display import display, Markdown
-from langchain.agents import Tool
 from dotenv import load_dotenv
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.model_factory import get_autogen_model_client as get_model_client, aclose_clients  # Shared, pooled model clients
+from shared.tracing import instrument_autogen_agent, instrument_autogen_client, instrument_autogen_tools  # Spans when TRACE_PATH is set
+from shared.search import get_search_backend  # Shared, cached web search
 
 # This script demonstrates an AutoGen agent that can use both internet search and file management tools.
 # The agent is tasked with searching for stock information and writing it to a file, using LangChain tools via adapters.
@@ -19,10 +22,8 @@ load_dotenv()
 
 # Helper function to set up and return a list of tools for the agent
 def get_tools():
-    # Internet search tool (Google Serper via LangChain)
-    serper = GoogleSerperAPIWrapper()
-    langchain_serper = Tool(name="internet_search", func=serper.run, description="Tool for searching on internet")
-    autogen_serper = LangChainToolAdapter(langchain_serper)  # Adapter for AutoGen
+    # Internet search tool (shared Serper backend, called natively async by AutoGen)
+    autogen_serper = get_search_backend().as_autogen_tool(name="internet_search", description="Tool for searching on internet")
     autogen_tools = [autogen_serper]
     
     # File management tools (read/write files, list directory, etc.)
@@ -32,24 +33,18 @@ def get_tools():
     
     return autogen_tools
 
-# Helper function to get a model client for the agent (OpenAI or Ollama)
-def get_model_client(model_name: str):
-    if model_name == "gpt":
-        return OpenAIChatCompletionClient(model="gpt-4o-mini")  # Use OpenAI GPT model
-    elif model_name == "llama":
-        return OllamaChatCompletionClient(model="llama3.2:1b")  # Use local Ollama Llama model
-
 
 ## send message and run the agent
 async def main(company_name: str):
-    autogen_tools = get_tools()  # Get the list of tools (search, file management)
-    model_client = get_model_client("gpt")  # Choose the model client
+    autogen_tools = instrument_autogen_tools(get_tools())  # Get the list of tools (search, file management)
+    model_client = instrument_autogen_client(get_model_client("gpt"))  # Choose the model client
     # Create the AssistantAgent with tool access and reflection enabled
     agent = AssistantAgent(name="searcher", 
                        model_client=model_client, 
                        tools=autogen_tools, 
                        reflect_on_tool_use=True
                       )
+    instrument_autogen_agent(agent)  # One agent span per turn (no-op unless TRACE_PATH is set)
 
     # Compose the prompt for the agent
     prompt = f"""Your task is to search for stock information for the company named {company_name}, and write all the information to a file called stocks_data.md with full details.
@@ -78,6 +73,8 @@ async def main(company_name: str):
     print(f"\n Response: \n ")
     for message in result.inner_messages:
         print(message.content)
+
+    await aclose_clients()  # Release pooled connections before the event loop closes
     
 if __name__ == "__main__":
     asyncio.run(main(company_name="Tesla Inc"))
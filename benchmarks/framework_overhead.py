@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))  # Make the repo-level shared package importable
+from shared.stub_server import StubConfig, StubServer, stub_env
+
+# This script runs the examples of all four frameworks against the local stub model server
+# (shared/stub_server.py), so their latency can be measured offline and deterministically.
+# - langgraph:  langgraph_tools.py graph (chatbot -> search tool -> chatbot)
+# - agents:     single_agent_tools.py weather reporter (get_alerts tool against the stub NWS API)
+# - autogen:    autogen_multiagent_collaboration.py researcher/reviewer team and consolidator
+# - crewai:     crewai_tools_context crew (researcher and reporting analyst with the search tool)
+# The server times every model and tool request it answers, so each run splits into
+#   model time + tool time + framework overhead (everything else: prompt building, parsing, scheduling, HTTP client)
+# and the overhead is also reported per LLM step. Frameworks that are not installed are skipped.
+
+
+def setup_langgraph():
+    sys.path.append(str(ROOT / "langgraph"))
+    import langgraph_tools
+
+    graph = langgraph_tools.build_graph(model_name="gpt", tools=langgraph_tools.tools)
+
+    async def step(user_input: str):
+        await graph.ainvoke({"messages": [{"role": "user", "content": user_input}]})
+
+    return step
+
+
+def setup_agents():
+    sys.path.append(str(ROOT / "openai-agents-sdk"))
+    from agents import set_default_openai_api, set_trace_processors, set_tracing_disabled
+    from shared.tracing import get_tracer
+    import single_agent_tools
+
+    set_default_openai_api("chat_completions")  # The stub speaks chat completions, not the Responses API
+    if get_tracer().enabled:
+        set_trace_processors([get_tracer().as_agents_processor()])  # Local spans only, no trace uploads
+    else:
+        set_tracing_disabled(True)  # No trace uploads from an offline benchmark
+
+    async def step(user_input: str):
+        await single_agent_tools.handle(user_input)
+        await single_agent_tools.aclose()  # The NWS client is bound to this run's loop
+
+    return step
+
+
+def setup_autogen():
+    os.environ.setdefault("LLM_CACHE_SIZE", "0")  # Measure model calls, not answers from the response cache
+    sys.path.append(str(ROOT / "autogen"))
+    import autogen_multiagent_collaboration
+
+    async def step(user_input: str):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)  # It writes its log and report to the current directory
+            try:
+                await autogen_multiagent_collaboration.main(user_message=user_input)
+            finally:
+                os.chdir(cwd)
+
+    return step
+
+
+def setup_crewai():
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    sys.path.append(str(ROOT / "crewai" / "crewai_tools_context" / "src"))
+    from crewai_tools_context.crew import CrewaiToolsContext
+
+    async def step(user_input: str):
+        inputs = {"company": user_input, "topic": "Financial and stock market.", "current_year": "2025"}
+        await asyncio.to_thread(lambda: CrewaiToolsContext().crew().kickoff(inputs=inputs))  # kickoff is synchronous
+
+    return step
+
+
+FRAMEWORKS = {"langgraph": setup_langgraph, "agents": setup_agents, "autogen": setup_autogen, "crewai": setup_crewai}
+INPUTS = {
+    "langgraph": "What is the latest news about the Toronto Raptors? ({i})",
+    "agents": "What is the weather in Texas? ({i})",
+    "autogen": "Write a short biography of Mahatma Gandhi ({i})",
+    "crewai": "Tesla ({i})",
+}
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+async def run_framework(name: str, server: StubServer, runs: int, warmup: int) -> dict | None:
+    try:
+        step = FRAMEWORKS[name]()
+    except ImportError as e:
+        print(f"{name}: skipped ({e.name} is not installed)")
+        return None
+
+    records = []
+    for i in range(warmup + runs):
+        before = dict(server.stats)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # The examples print their answers
+            await step(INPUTS[name].format(i=i))  # A new input per run, so the search cache does not skew tool time
+        wall = time.perf_counter() - started
+        delta = {key: server.stats[key] - before[key] for key in ("llm_requests", "tool_requests", "model_seconds", "tool_seconds")}
+        if i < warmup:
+            continue  # Imports, client creation and first connections
+        overhead = wall - delta["model_seconds"] - delta["tool_seconds"]
+        records.append({"wall": wall, "overhead": overhead,
+                        "overhead_per_step": overhead / max(delta["llm_requests"], 1), **delta})
+
+    def mean(key: str) -> float:
+        return statistics.fmean(record[key] for record in records)
+
+    per_step = [record["overhead_per_step"] for record in records]
+    return {"framework": name, "runs": runs, "llm_calls": mean("llm_requests"), "tool_calls": mean("tool_requests"),
+            "wall_s": mean("wall"), "model_s": mean("model_seconds"), "tool_s": mean("tool_seconds"),
+            "overhead_s": mean("overhead"), "overhead_share": mean("overhead") / mean("wall"),
+            "step_overhead_ms_p50": percentile(per_step, 50) * 1000, "step_overhead_ms_p95": percentile(per_step, 95) * 1000}
+
+
+def print_table(results: list[dict], config: StubConfig):
+    print(f"\nStub model: {config.latency:.2f}s to first token, {config.tokens_per_s:.0f} tokens/s, "
+          f"{config.tool_rounds} tool round(s) per turn, tool latency {config.tool_latency:.2f}s")
+    print(f"{'framework':<11}{'LLM calls':>10}{'tools':>7}{'wall s':>9}{'model s':>9}{'tool s':>8}"
+          f"{'overhead s':>12}{'share':>7}{'ms/step p50':>13}{'p95':>8}")
+    for r in results:
+        print(f"{r['framework']:<11}{r['llm_calls']:>10.1f}{r['tool_calls']:>7.1f}{r['wall_s']:>9.3f}{r['model_s']:>9.3f}"
+              f"{r['tool_s']:>8.3f}{r['overhead_s']:>12.3f}{r['overhead_share']:>7.1%}"
+              f"{r['step_overhead_ms_p50']:>13.1f}{r['step_overhead_ms_p95']:>8.1f}")
+
+
+async def main(args):
+    config = StubConfig(latency=args.latency, tokens_per_s=args.tokens_per_s, tool_rounds=args.tool_rounds,
+                        tool_latency=args.tool_latency)
+    server = StubServer(config)
+    server.start_in_thread()  # Its own loop, so framework work never delays the stub's answers
+    os.environ.update(stub_env(server.url))  # Before any example is imported: clients read these at creation
+    os.environ["LANGSMITH_TRACING"] = "false"
+    warnings.filterwarnings("ignore", message="Resolved model mismatch")  # AutoGen: the stub echoes the model alias
+    results = []
+    try:
+        for name in args.frameworks:
+            result = await run_framework(name, server, args.runs, args.warmup)
+            if result:
+                results.append(result)
+    finally:
+        from shared.model_factory import aclose_clients
+        await aclose_clients()
+        server.stop_thread()
+    print_table(results, config)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Framework overhead of the examples against a local stub model server")
+    parser.add_argument("--frameworks", nargs="+", choices=list(FRAMEWORKS), default=list(FRAMEWORKS))
+    parser.add_argument("--runs", type=int, default=10, help="Measured runs per framework")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs first")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub seconds to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=200.0, help="Stub generation speed")
+    parser.add_argument("--tool-rounds", type=int, default=1, help="Tool-call answers per user turn")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="Stub seconds per search/weather request")
+    parser.add_argument("--json", help="Also write the results to this file")
+    asyncio.run(main(parser.parse_args()))
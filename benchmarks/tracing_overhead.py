@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))  # Make the repo-level shared package importable
+sys.path.append(str(ROOT / "langgraph"))
+os.environ.pop("TRACE_PATH", None)  # The graphs below are instrumented explicitly, with their own tracers
+os.environ["LANGSMITH_TRACING"] = "false"
+from shared.tracing import Tracer, instrument_graph, load_spans
+import langgraph_tools
+from langgraph_stub_llm import StubChatModel, make_stub_search
+
+# This script measures what the tracing layer (shared/tracing.py) costs, on the langgraph_tools graph with an
+# in-process stub model and search tool that answer instantly: every microsecond measured is framework or
+# tracing work, so this is the worst case. Each run is chatbot -> tools -> chatbot (2 LLM calls, 1 tool call).
+# Configurations: tracing off, every trace recorded, and 1 in 10 traces recorded (head sampling).
+# With sampling, an unsampled run executes the bare graph (no callback events), so its cost is close to off.
+# The overhead is reported per run, and as a share of a run whose model calls take --llm-latency seconds.
+
+
+async def time_runs(graph, runs: int) -> list[float]:
+    inputs = {"messages": [{"role": "user", "content": "What is the latest news about the Toronto Raptors?"}]}
+    for _ in range(20):
+        await graph.ainvoke(inputs)  # Warm up
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await graph.ainvoke(inputs)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+async def main(runs: int, llm_latency: float, rounds: int):
+    graph = langgraph_tools.build_graph(tools=[make_stub_search()], llm=StubChatModel(tool_rounds=1))
+    with tempfile.TemporaryDirectory() as workdir:
+        configs = {"off": Tracer()}
+        for rate in (1.0, 0.1):
+            configs[f"sample {rate:g}"] = Tracer(path=str(Path(workdir) / f"trace_{rate:g}.jsonl"), sample_rate=rate)
+        graphs = {name: instrument_graph(graph, tracer) for name, tracer in configs.items()}
+
+        times = {name: [] for name in configs}
+        for _ in range(rounds):  # Interleaved, so drift in machine load hits every configuration alike
+            for name, traced_graph in graphs.items():
+                times[name] += await time_runs(traced_graph, runs)
+        for tracer in configs.values():
+            tracer.flush()
+
+        base = statistics.median(times["off"])
+        realistic = base + 2 * llm_latency  # Two model calls per run
+        print(f"{rounds * runs} runs per configuration, median per run (2 LLM calls, 1 tool call, 3 nodes)")
+        print(f"{'configuration':<14}{'us/run':>10}{'overhead us':>13}{'worst case':>12}{'at ' + f'{llm_latency:g}s/LLM call':>20}{'spans':>8}")
+        for name, tracer in configs.items():
+            median = statistics.median(times[name])
+            spans = len(load_spans(tracer.path)) if tracer.path and Path(tracer.path).exists() else 0
+            overhead = median - base
+            print(f"{name:<14}{median * 1e6:>10.0f}{overhead * 1e6:>13.0f}{overhead / base:>12.1%}"
+                  f"{overhead / realistic:>20.3%}{spans:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cost of the tracing layer on an instantly answering LangGraph graph")
+    parser.add_argument("--runs", type=int, default=200, help="Runs per configuration and round")
+    parser.add_argument("--rounds", type=int, default=3, help="Interleaved rounds over the configurations")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Model seconds per call for the realistic share")
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.llm_latency, args.rounds))
@@ -1,20 +1,14 @@
-from crewai import Crew, Task, LLM, Process
+import sys
+from pathlib import Path
+from crewai import Crew, Task, Process
 from agents import ComedyAgents
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # Make the repo-level shared package importable
+from shared.model_factory import get_crewai_llm as get_model  # Shared, pooled model clients
+
 # This script demonstrates how to orchestrate multiple CrewAI agents for a collaborative comedy workflow.
 # It sets up agents, assigns them tasks, and runs them as a Crew.
 
-# Base URL for the local Ollama LLM API (not used directly here, but could be for custom LLM endpoints)
-OLLAMA_BASE_URL = "http://localhost:11434"
-
-# Helper function to get an LLM instance by model name
-def get_model(model_name="gpt"):
-    if model_name == "llama":
-        llm = LLM(model="ollama/llama3.2:1b")  # Use local Ollama Llama model
-    elif model_name == "gpt":
-        llm = LLM(model="openai/gpt-4o-mini")  # Use OpenAI GPT model
-    return llm
-
 llm = get_model("llama")  # Choose which LLM to use for the agents
 
 # 1. Create agent instances using the ComedyAgents factory
@@ -1,8 +1,14 @@
-from crewai import Agent, Crew, Process, Task, LLM
+import sys
+from pathlib import Path
+from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
 
+sys.path.append(str(Path(__file__).resolve().parents[4]))  # Make the repo-level shared package importable
+from shared.model_factory import get_crewai_llm
+from shared.tracing import instrument_crewai  # Crew/task/agent/LLM/tool spans when TRACE_PATH is set
+
 @CrewBase
 class CrewaiJokestar():
     """CrewaiJokestar crew"""
@@ -11,10 +17,7 @@ class CrewaiJokestar():
     tasks: List[Task]
 
     def get_model(self,model_name:str):
-        if model_name == "gpt-4o-mini":
-            return LLM(model="openai/gpt-4o-mini")
-        elif model_name == "llama":
-            return LLM(model="ollama/llama3.2:1b",base_url="http://localhost:11434")
+        return get_crewai_llm(model_name)  # Cached and shared across agents and crew instances
 
     @agent
     def joke_star(self) -> Agent:
@@ -49,6 +52,7 @@ class CrewaiJokestar():
     def crew(self) -> Crew:
         """Creates the CrewaiJokestar crew"""
 
+        instrument_crewai()  # Listens on the CrewAI event bus once per process
         return Crew(
             agents=[self.joke_curator(),self.joke_star()], # Automatically created by the @agent decorator
             tasks=[self.joke_curation_task(),self.joke_creation_task()], # Automatically created by the @task decorator
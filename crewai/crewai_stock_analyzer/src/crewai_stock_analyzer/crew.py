@@ -1,6 +1,7 @@
+import sys
+from pathlib import Path
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
 from pydantic import BaseModel, Field
 from typing import List
 from .tools.custom_tool import PushNotificationTool
@@ -10,6 +11,11 @@ from crewai.memory import LongTermMemory, ShortTermMemory, EntityMemory
 from crewai.memory.storage.rag_storage import RAGStorage
 from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
 
+sys.path.append(str(Path(__file__).resolve().parents[4]))  # Make the repo-level shared package importable
+from shared.search import get_search_backend  # Shared, cached web search
+from shared.structured_output import compile_schema  # Precompiled output schemas with local repair
+from shared.tracing import instrument_crewai  # Crew/task/agent/LLM/tool spans when TRACE_PATH is set
+
 
 
 class TrendingCompany(BaseModel):
@@ -44,12 +50,12 @@ class StockPicker():
     @agent
     def trending_company_finder(self) -> Agent:
         return Agent(config=self.agents_config['trending_company_finder'],
-                     tools=[SerperDevTool()], memory=True)
+                     tools=[get_search_backend().as_crewai_tool()], memory=True)
     
     @agent
     def financial_researcher(self) -> Agent:
         return Agent(config=self.agents_config['financial_researcher'], 
-                     tools=[SerperDevTool()])
+                     tools=[get_search_backend().as_crewai_tool()])
 
     @agent
     def stock_picker(self) -> Agent:
@@ -61,6 +67,7 @@ class StockPicker():
         return Task(
             config=self.tasks_config['find_trending_companies'],
             output_pydantic=TrendingCompanyList,
+            converter_cls=compile_schema(TrendingCompanyList).as_crewai_converter(),  # Repair near-miss JSON before an LLM retry
         )
 
     @task
@@ -68,6 +75,7 @@ class StockPicker():
         return Task(
             config=self.tasks_config['research_trending_companies'],
             output_pydantic=TrendingCompanyResearchList,
+            converter_cls=compile_schema(TrendingCompanyResearchList).as_crewai_converter(),  # Repair near-miss JSON before an LLM retry
         )
 
     @task
@@ -83,6 +91,7 @@ class StockPicker():
     def crew(self) -> Crew:
         """Creates the StockPicker crew"""
 
+        instrument_crewai()  # Listens on the CrewAI event bus once per process
         manager = Agent(
             config=self.agents_config['manager'],
             allow_delegation=True
@@ -1,6 +1,11 @@
+import sys
+from pathlib import Path
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
+
+sys.path.append(str(Path(__file__).resolve().parents[4]))  # Make the repo-level shared package importable
+from shared.search import get_search_backend  # Shared, cached web search
+from shared.tracing import instrument_crewai  # Crew/task/agent/LLM/tool spans when TRACE_PATH is set
 
 
 
@@ -17,7 +22,7 @@ class CrewaiToolsContext():
         return Agent(
             config=self.agents_config['researcher'], # type: ignore[index]
             verbose=True,
-            tools=[SerperDevTool()],
+            tools=[get_search_backend().as_crewai_tool()],
         )
 
     @agent
@@ -25,7 +30,7 @@ class CrewaiToolsContext():
         return Agent(
             config=self.agents_config['reporting_analyst'], # type: ignore[index]
             verbose=True,
-            tools=[SerperDevTool()],
+            tools=[get_search_backend().as_crewai_tool()],
         )
     @task
     def research_task(self) -> Task:
@@ -42,6 +47,7 @@ class CrewaiToolsContext():
     @crew
     def crew(self) -> Crew:
         """Creates the CrewaiToolsContext crew"""
+        instrument_crewai()  # Listens on the CrewAI event bus once per process
         return Crew(
             agents=[self.researcher(),self.reporting_analyst()],
             tasks=[self.research_task(),self.reporting_task()],
@@ -0,0 +1,366 @@
+import asyncio
+import json
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Sequence
+
+import aiosqlite
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import WRITES_IDX_MAP, get_checkpoint_metadata
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+# This module provides an async SQLite checkpointer for LangGraph that batches checkpoint writes.
+# - WAL journal with synchronous=NORMAL, so readers never block the writer and commits skip a full fsync
+# - Group commit: every write queued while a commit is in progress (all tasks of a super-step,
+#   and every other chat thread) goes into the next single transaction
+# - Reads use their own connection, so loading one thread does not wait behind another thread's writes
+# CompactingAsyncSqliteSaver additionally stores the message history as deltas against snapshots.
+
+WRITES_SQL = (
+    "INSERT OR REPLACE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+WRITES_IGNORE_SQL = WRITES_SQL.replace("INSERT OR REPLACE", "INSERT OR IGNORE")
+CHECKPOINT_SQL = (
+    "INSERT OR REPLACE INTO checkpoints "
+    "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+class BatchedAsyncSqliteSaver(AsyncSqliteSaver):
+    """AsyncSqliteSaver that group-commits checkpoint writes and reads on a separate connection."""
+
+    def __init__(
+        self,
+        conn: aiosqlite.Connection,
+        read_conn: aiosqlite.Connection | None = None,
+        *,
+        serde=None,
+        max_batch: int = 512,
+        flush_interval: float = 0.0,
+    ):
+        super().__init__(conn, serde=serde)
+        # A plain saver on the read connection handles aget_tuple / alist
+        self.reader = AsyncSqliteSaver(read_conn, serde=self.serde) if read_conn is not None else None
+        self.max_batch = max_batch  # Statements per transaction
+        self.flush_interval = flush_interval  # Extra seconds to wait for more writes before committing
+        self.stats = {"commits": 0, "statements": 0}
+        self._queue: list[tuple[list[tuple[str, list[tuple]]], asyncio.Future]] = []
+        self._flusher: asyncio.Task | None = None
+
+    @classmethod
+    @asynccontextmanager
+    async def from_conn_string(cls, conn_string: str, **kwargs: Any) -> AsyncIterator["BatchedAsyncSqliteSaver"]:
+        """Open a writer and a reader connection to conn_string and flush pending writes on exit."""
+        async with aiosqlite.connect(conn_string) as conn, aiosqlite.connect(conn_string) as read_conn:
+            saver = cls(conn, read_conn, **kwargs)
+            try:
+                yield saver
+            finally:
+                await saver.flush()
+
+    async def setup(self) -> None:
+        if self.is_setup:
+            return
+        await super().setup()  # Creates the tables and switches the database to WAL
+        async with self.lock:
+            await self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.reader is not None:
+            await self.reader.setup()
+
+    # Reads: wait for queued writes, then read without taking the writer's lock
+    async def aget_tuple(self, config: RunnableConfig):
+        await self.flush()
+        if self.reader is None:
+            return await super().aget_tuple(config)
+        return await self.reader.aget_tuple(config)
+
+    async def alist(self, config: RunnableConfig | None, **kwargs: Any):
+        await self.flush()
+        source = super() if self.reader is None else self.reader
+        async for checkpoint_tuple in source.alist(config, **kwargs):
+            yield checkpoint_tuple
+
+    # Writes: serialize in the caller, then queue for the next group commit
+    async def aput(self, config: RunnableConfig, checkpoint, metadata, new_versions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        serialized_metadata = json.dumps(
+            get_checkpoint_metadata(config, metadata), ensure_ascii=False
+        ).encode("utf-8", "ignore")
+        await self._enqueue((CHECKPOINT_SQL, [(
+            str(thread_id),
+            checkpoint_ns,
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            type_,
+            serialized_checkpoint,
+            serialized_metadata,
+        )]))
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        query = WRITES_SQL if all(w[0] in WRITES_IDX_MAP for w in writes) else WRITES_IGNORE_SQL
+        rows = [
+            (
+                str(config["configurable"]["thread_id"]),
+                str(config["configurable"]["checkpoint_ns"]),
+                str(config["configurable"]["checkpoint_id"]),
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        await self._enqueue((query, rows))
+
+    async def _enqueue(self, *statements: tuple[str, list[tuple]]) -> None:
+        # Returns once the rows are committed, so durability matches AsyncSqliteSaver.
+        # Statements queued together always land in the same transaction.
+        await self.setup()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((list(statements), future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        await future
+
+    async def _flush_loop(self) -> None:
+        while self._queue:
+            # Yield (or wait) so the rest of the super-step and other threads can join this batch
+            await asyncio.sleep(self.flush_interval)
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            try:
+                async with self.lock:
+                    for statements, _ in batch:
+                        for sql, rows in statements:
+                            await self.conn.executemany(sql, rows)
+                    await self.conn.commit()
+            except Exception as e:
+                await self.conn.rollback()
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats["commits"] += 1
+            self.stats["statements"] += sum(len(statements) for statements, _ in batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    async def flush(self) -> None:
+        """Wait until every queued write is committed."""
+        while self._flusher is not None and not self._flusher.done():
+            await asyncio.shield(self._flusher)
+
+    async def aclose(self) -> None:
+        """Flush pending writes and close both connections."""
+        await self.flush()
+        await self.conn.close()
+        if self.reader is not None:
+            await self.reader.conn.close()
+
+
+SNAPSHOT_SQL = (
+    "INSERT OR REPLACE INTO message_snapshots (thread_id, checkpoint_ns, snapshot_id, type, messages) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+DELTA_KEY = "__message_delta__"  # Marks a messages channel stored as a delta
+SNAPSHOT_METADATA_KEY = "message_snapshot"  # Checkpoint metadata key naming the snapshot a checkpoint depends on
+
+
+class CompactingAsyncSqliteSaver(BatchedAsyncSqliteSaver):
+    """
+    BatchedAsyncSqliteSaver that stores the messages channel as a delta against a base snapshot.
+    - Each checkpoint stores only the messages added since its snapshot, so storage per step no longer
+      grows with the conversation length
+    - A new snapshot is folded in once the delta reaches snapshot_every messages, or when history is rewritten
+    - With keep_last set, older checkpoints, their writes and unreferenced snapshots are pruned at each new snapshot
+    Loading a thread reads the latest checkpoint (with its short delta) and one snapshot row: the same messages
+    are deserialized as with full checkpoints, so load time is on par, not lower. The gains are storage and
+    write time. The stored format is not readable by the stock savers: keep its database file separate.
+    """
+
+    def __init__(self, conn, read_conn=None, *, snapshot_every: int = 50, keep_last: int | None = None,
+                 max_cached_threads: int = 1024, **kwargs: Any):
+        super().__init__(conn, read_conn, **kwargs)
+        self.snapshot_every = snapshot_every
+        self.keep_last = keep_last
+        self.max_cached_threads = max_cached_threads
+        # (thread_id, checkpoint_ns) -> (snapshot_id, messages) of the latest snapshot written or read
+        self._bases: OrderedDict[tuple[str, str], tuple[str, list]] = OrderedDict()
+
+    async def setup(self) -> None:
+        if self.is_setup:
+            return
+        await super().setup()
+        async with self.lock:
+            await self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS message_snapshots (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    snapshot_id TEXT NOT NULL,
+                    type TEXT,
+                    messages BLOB,
+                    PRIMARY KEY (thread_id, checkpoint_ns, snapshot_id)
+                )"""
+            )
+            await self.conn.commit()
+
+    def _remember_base(self, key: tuple[str, str], snapshot_id: str, messages: list) -> None:
+        self._bases[key] = (snapshot_id, messages)
+        self._bases.move_to_end(key)
+        while len(self._bases) > self.max_cached_threads:
+            self._bases.popitem(last=False)
+
+    async def aput(self, config: RunnableConfig, checkpoint, metadata, new_versions) -> RunnableConfig:
+        messages = checkpoint.get("channel_values", {}).get("messages")
+        if not isinstance(messages, list):
+            return await super().aput(config, checkpoint, metadata, new_versions)
+
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        key = (thread_id, checkpoint_ns)
+        base = self._bases.get(key)
+        if base is None and config["configurable"].get("checkpoint_id"):
+            base = await self._base_of(config)  # Resuming a thread written by an earlier process
+
+        # The delta is valid only while the history still starts with the snapshot (identity check first: fast path)
+        statements = []
+        base_messages = base[1] if base is not None else None
+        extends_base = base_messages is not None and len(messages) >= len(base_messages) and all(
+            a is b or a == b for a, b in zip(messages, base_messages)
+        )
+        if extends_base and len(messages) - len(base_messages) < self.snapshot_every:
+            snapshot_id = base[0]
+            tail = messages[len(base_messages):]
+        else:
+            # Fold the history into a new snapshot
+            snapshot_id = checkpoint["id"]
+            statements.append((SNAPSHOT_SQL, [(thread_id, checkpoint_ns, snapshot_id,
+                                               *self.serde.dumps_typed(list(messages)))]))
+            self._remember_base(key, snapshot_id, list(messages))
+            tail = []
+
+        delta = {DELTA_KEY: True, "snapshot_id": snapshot_id, "tail": tail}
+        stored = {**checkpoint, "channel_values": {**checkpoint["channel_values"], "messages": delta}}
+        type_, serialized_checkpoint = self.serde.dumps_typed(stored)
+        serialized_metadata = json.dumps(
+            {**get_checkpoint_metadata(config, metadata), SNAPSHOT_METADATA_KEY: snapshot_id}, ensure_ascii=False
+        ).encode("utf-8", "ignore")
+        statements.append((CHECKPOINT_SQL, [(
+            thread_id,
+            checkpoint_ns,
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            type_,
+            serialized_checkpoint,
+            serialized_metadata,
+        )]))
+        await self._enqueue(*statements)
+
+        if snapshot_id == checkpoint["id"] and self.keep_last:
+            await self.aprune(thread_id, checkpoint_ns)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def _base_of(self, config: RunnableConfig) -> tuple[str, list] | None:
+        # Load the snapshot behind the parent checkpoint
+        checkpoint_tuple = await self.aget_tuple(config)
+        if checkpoint_tuple is None:
+            return None
+        key = (str(config["configurable"]["thread_id"]), config["configurable"]["checkpoint_ns"])
+        snapshot_id = checkpoint_tuple.metadata.get(SNAPSHOT_METADATA_KEY)
+        cached = self._bases.get(key)
+        if snapshot_id is None or cached is None or cached[0] != snapshot_id:
+            return None
+        return cached
+
+    async def _load_snapshot(self, thread_id: str, checkpoint_ns: str, snapshot_id: str) -> list:
+        key = (thread_id, checkpoint_ns)
+        cached = self._bases.get(key)
+        if cached is not None and cached[0] == snapshot_id:
+            return cached[1]
+        conn = self.reader.conn if self.reader is not None else self.conn
+        async with conn.execute(
+            "SELECT type, messages FROM message_snapshots WHERE thread_id = ? AND checkpoint_ns = ? AND snapshot_id = ?",
+            (thread_id, checkpoint_ns, snapshot_id),
+        ) as cur:
+            row = await cur.fetchone()
+        messages = self.serde.loads_typed((row[0], row[1]))
+        self._remember_base(key, snapshot_id, messages)
+        return messages
+
+    async def _rehydrate(self, checkpoint_tuple):
+        # Replace a stored delta with the full message list (snapshot + tail)
+        if checkpoint_tuple is None:
+            return None
+        delta = checkpoint_tuple.checkpoint.get("channel_values", {}).get("messages")
+        if not isinstance(delta, dict) or not delta.get(DELTA_KEY):
+            return checkpoint_tuple  # Written before delta storage was enabled
+        configurable = checkpoint_tuple.config["configurable"]
+        base = await self._load_snapshot(
+            str(configurable["thread_id"]), configurable.get("checkpoint_ns", ""), delta["snapshot_id"]
+        )
+        checkpoint_tuple.checkpoint["channel_values"]["messages"] = base + delta["tail"]
+        return checkpoint_tuple
+
+    async def aget_tuple(self, config: RunnableConfig):
+        return await self._rehydrate(await super().aget_tuple(config))
+
+    async def alist(self, config: RunnableConfig | None, **kwargs: Any):
+        async for checkpoint_tuple in super().alist(config, **kwargs):
+            yield await self._rehydrate(checkpoint_tuple)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.flush()
+        await super().adelete_thread(thread_id)
+        async with self.lock:
+            await self.conn.execute("DELETE FROM message_snapshots WHERE thread_id = ?", (str(thread_id),))
+            await self.conn.commit()
+        for key in [key for key in self._bases if key[0] == str(thread_id)]:
+            del self._bases[key]
+
+    async def aprune(self, thread_id: str, checkpoint_ns: str = "") -> None:
+        """Apply the retention policy: keep the newest keep_last checkpoints and the snapshots they use."""
+        if not self.keep_last:
+            return
+        await self.flush()
+        async with self.lock:
+            await self.conn.execute(
+                """DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                    SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                    ORDER BY checkpoint_id DESC LIMIT ?)""",
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last),
+            )
+            await self.conn.execute(
+                """DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                    SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)""",
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+            )
+            await self.conn.execute(
+                f"""DELETE FROM message_snapshots WHERE thread_id = ? AND checkpoint_ns = ? AND snapshot_id NOT IN (
+                    SELECT json_extract(CAST(metadata AS TEXT), '$.{SNAPSHOT_METADATA_KEY}') FROM checkpoints
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND metadata IS NOT NULL)""",
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+            )
+            await self.conn.commit()
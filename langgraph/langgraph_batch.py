@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+
+# This script runs a compiled graph over a JSONL file of inputs, offline.
+# - Input lines: {"id": "q1", "message": "Hello, how are you?"} (id defaults to the line number)
+# - Output lines: {"id": "q1", "replies": ["...", "..."]} or {"id": "q1", "error": "..."}, written as runs finish
+# - Bounded concurrency: at most --concurrency graph runs at once, and inputs are read lazily, so memory stays
+#   flat for files of any size
+# - Resume: ids that already have a reply in the output file are skipped; failed ids are retried
+# - Throughput: progress every few seconds and a final items/s
+# The joke graph (langgraph_intro.py) needs no LLM; the tool graph (langgraph_tools.py) runs with a stub LLM
+# and stub search unless --live is given.
+
+
+def read_done_ids(output_path: str) -> set[str]:
+    """Ids that already have a successful result in the output file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short by a crash; that id is simply run again
+            if "error" not in record:
+                done.add(str(record["id"]))
+    return done
+
+
+async def read_inputs(input_path: str, queue: asyncio.Queue, done: set[str], workers: int, stats: dict):
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                item_id, message = str(record.get("id", line_number)), record["message"]
+            except (json.JSONDecodeError, AttributeError, KeyError) as e:
+                stats["failed"] += 1  # A malformed line fails alone; the rest of the batch keeps running
+                print(f"  line {line_number}: invalid input ({e!r})", flush=True)
+                continue
+            if item_id in done:
+                stats["skipped"] += 1
+                continue
+            await queue.put((item_id, message))  # Waits while the workers are busy (backpressure)
+    for _ in range(workers):
+        await queue.put(None)  # One stop marker per worker
+
+
+async def worker(graph, queue: asyncio.Queue, output, stats: dict):
+    while (item := await queue.get()) is not None:
+        item_id, message = item
+        try:
+            result = await graph.ainvoke({"messages": [{"role": "user", "content": message}]})
+            replies = [m.content for m in result["messages"] if m.type == "ai" and m.content]
+            record = {"id": item_id, "replies": replies}
+            stats["completed"] += 1
+        except Exception as e:
+            record = {"id": item_id, "error": repr(e)}
+            stats["failed"] += 1
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")  # Line-buffered: every result survives a crash
+
+
+async def report_progress(stats: dict, started: float, every: float):
+    while True:
+        await asyncio.sleep(every)
+        elapsed = time.perf_counter() - started
+        print(f"  {stats['completed']} done, {stats['failed']} failed, {stats['completed'] / elapsed:.0f} items/s", flush=True)
+
+
+async def run_batch(graph, input_path: str, output_path: str, concurrency: int = 32, progress_every: float = 5.0) -> dict:
+    """Run graph over every input not yet in output_path; returns counts and throughput."""
+    stats = {"completed": 0, "failed": 0, "skipped": 0}
+    done = read_done_ids(output_path)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    started = time.perf_counter()
+    progress = asyncio.create_task(report_progress(stats, started, progress_every))
+    with open(output_path, "a", encoding="utf-8", buffering=1) as output:
+        try:
+            await asyncio.gather(read_inputs(input_path, queue, done, concurrency, stats),
+                                 *(worker(graph, queue, output, stats) for _ in range(concurrency)))
+        finally:
+            progress.cancel()
+    stats["seconds"] = time.perf_counter() - started
+    stats["items_per_s"] = (stats["completed"] + stats["failed"]) / stats["seconds"]
+    return stats
+
+
+def write_sample_inputs(input_path: str, count: int):
+    with open(input_path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": f"q{i}", "message": f"Hello, how are you? ({i})"}) + "\n")
+
+
+def build(graph_name: str, state_mode: str, live: bool, llm_latency: float):
+    from langgraph_graph_registry import get_graph_registry
+
+    if graph_name == "intro":
+        import langgraph_intro
+        return get_graph_registry().get(langgraph_intro.build_graph, state_mode=state_mode)
+
+    import langgraph_tools
+    if live:
+        return get_graph_registry().get(langgraph_tools.build_graph, model_name="gpt", tools=langgraph_tools.tools,
+                                        state_mode=state_mode)
+    from langgraph_stub_llm import StubChatModel, make_stub_search
+    return langgraph_tools.build_graph(tools=[make_stub_search(llm_latency)], state_mode=state_mode,
+                                       llm=StubChatModel(latency=llm_latency, tool_rounds=1))
+
+
+async def main(args):
+    if args.generate:
+        write_sample_inputs(args.input, args.generate)
+        print(f"Wrote {args.generate} inputs to {args.input}")
+    graph = build(args.graph, "typed" if args.typed else "pydantic", args.live, args.llm_latency)
+    stats = await run_batch(graph, args.input, args.output, args.concurrency, args.progress_every)
+    print(f"completed: {stats['completed']}, failed: {stats['failed']}, skipped (already done): {stats['skipped']}")
+    print(f"{stats['seconds']:.1f}s, {stats['items_per_s']:.0f} items/s")
+    if args.graph == "tools" and args.live:
+        from shared.model_factory import aclose_clients
+        await aclose_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a LangGraph graph over a JSONL file of inputs")
+    parser.add_argument("input", help="JSONL file with one {\"id\", \"message\"} object per line")
+    parser.add_argument("output", help="JSONL results file (appended to; completed ids are skipped)")
+    parser.add_argument("--graph", choices=["intro", "tools"], default="intro")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent graph runs")
+    parser.add_argument("--typed", action="store_true", help="Use the TypedDict state mode")
+    parser.add_argument("--live", action="store_true", help="Tool graph: call the real LLM and search")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Tool graph: seconds per stub LLM call")
+    parser.add_argument("--generate", type=int, help="First write this many sample inputs to the input file")
+    parser.add_argument("--progress-every", type=float, default=5.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+    if not args.live:
+        os.environ["LANGSMITH_TRACING"] = "false"  # Offline: no trace uploads (.env is loaded without override)
+    asyncio.run(main(args))
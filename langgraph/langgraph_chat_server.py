@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.tracing import note_queue_wait  # Time waiting for the session lock and a worker, on the run span
+
+# This script serves the checkpointed chatbot of langgraph_checkpointer_interactivechat.py to many clients at once.
+# The graph is compiled once; every conversation is a thread_id in the same checkpointer.
+# - Per-session lock: turns of one thread_id run one after another, different sessions run concurrently
+# - Worker limit: at most --workers graph runs are in flight (LLM and tool calls included)
+# - Backpressure: beyond --max-pending queued or running turns, new requests are rejected with "busy"
+#   instead of piling up unbounded memory and latency
+# Protocol: newline-delimited JSON over TCP. Send {"id": 1, "thread_id": "alice", "message": "hi"}
+# and receive {"id": 1, "thread_id": "alice", "reply": "..."} or {"id": 1, "error": "busy"}.
+# Requests on one connection are handled concurrently and answered as they finish (match them by id).
+
+
+class ServerBusy(Exception):
+    """Raised when too many turns are already queued."""
+
+
+class ChatSessions:
+    """Runs chat turns for many thread_ids on one compiled graph."""
+
+    def __init__(self, graph, max_workers: int = 64, max_pending: int = 1000):
+        self.graph = graph
+        self.max_pending = max_pending
+        self._workers = asyncio.Semaphore(max_workers)
+        self._locks: dict[str, tuple[asyncio.Lock, int]] = {}  # thread_id -> (lock, turns waiting or running)
+        self.pending = 0
+        self.stats = {"completed": 0, "rejected": 0, "failed": 0}
+
+    def _acquire_session(self, thread_id: str) -> asyncio.Lock:
+        lock, users = self._locks.get(thread_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[thread_id] = (lock, users + 1)
+        return lock
+
+    def _release_session(self, thread_id: str) -> None:
+        lock, users = self._locks[thread_id]
+        if users == 1:
+            del self._locks[thread_id]  # No lock kept for idle sessions; history lives in the checkpointer
+        else:
+            self._locks[thread_id] = (lock, users - 1)
+
+    async def chat(self, thread_id: str, user_input: str) -> str:
+        """Run one turn of thread_id and return the AI reply."""
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise ServerBusy(f"{self.pending} turns pending")
+        self.pending += 1
+        lock = self._acquire_session(thread_id)
+        try:
+            queued = time.perf_counter()
+            async with lock, self._workers:
+                note_queue_wait(time.perf_counter() - queued)
+                config = {"configurable": {"thread_id": thread_id}}
+                result = await self.graph.ainvoke({"messages": [{"role": "user", "content": user_input}]}, config=config)
+            self.stats["completed"] += 1
+            return result["messages"][-1].content
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self.pending -= 1
+            self._release_session(thread_id)
+
+
+async def handle_request(sessions: ChatSessions, line: bytes, writer: asyncio.StreamWriter):
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+        reply = await sessions.chat(str(request["thread_id"]), request["message"])
+        response = {"id": request_id, "thread_id": request["thread_id"], "reply": reply}
+    except ServerBusy:
+        response = {"id": request_id, "error": "busy"}
+    except Exception as e:
+        response = {"id": request_id, "error": repr(e)}
+    if not writer.is_closing():
+        writer.write((json.dumps(response) + "\n").encode())
+        await writer.drain()
+
+
+async def serve(sessions: ChatSessions, host: str = "127.0.0.1", port: int = 8765) -> asyncio.Server:
+    """Start the JSON-lines server; returns the asyncio.Server (use `async with` or close())."""
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(handle_request(sessions, line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks, return_exceptions=True)  # Finish the turns already received
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle_connection, host, port, limit=1 << 20)
+
+
+async def main(host: str, port: int, max_workers: int, max_pending: int, db_path: str):
+    from langgraph_checkpointer_interactivechat import build_graph, get_memory
+    from shared.model_factory import aclose_clients
+
+    memory = get_memory("sqlite-async", db_path)
+    graph = build_graph(memory)  # Compiled once, shared by every session
+    sessions = ChatSessions(graph, max_workers=max_workers, max_pending=max_pending)
+    server = await serve(sessions, host, port)
+    print(f"Serving on {host}:{port} (workers={max_workers}, max pending={max_pending})")
+    started = time.perf_counter()
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        print(f"Stopped after {time.perf_counter() - started:.0f}s: {sessions.stats}")
+        await memory.aclose()  # Commit every pending checkpoint and close the connections
+        await aclose_clients()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve the LangGraph checkpointed chatbot to many sessions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=64, help="Maximum concurrent graph runs")
+    parser.add_argument("--max-pending", type=int, default=1000, help="Queued or running turns before rejecting")
+    parser.add_argument("--db", default="memory_compact.db", help="SQLite checkpoint database (compacted format)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port, args.workers, args.max_pending, args.db))
+    except KeyboardInterrupt:
+        pass
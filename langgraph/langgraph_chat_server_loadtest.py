@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+os.environ["LANGSMITH_TRACING"] = "false"  # Measure the server, not trace uploads (.env is loaded without override)
+
+from langgraph_chat_server import ChatSessions, serve
+from langgraph_checkpointer_interactivechat import build_graph, get_memory
+from langgraph_stub_llm import StubChatModel
+
+# This script load-tests langgraph_chat_server.py locally, without an API key.
+# It serves the real chatbot graph (context window, tool node, compacting SQLite checkpointer) with a stub LLM
+# that waits --llm-latency seconds per call, then opens --sessions concurrent clients that each chat --turns times
+# in their own thread_id. It reports turns per second, p50/p99 turn latency and how many turns were rejected as busy.
+
+
+async def run_client(port: int, session: int, turns: int, latencies: list[float], errors: dict):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=1 << 20)
+    for turn in range(turns):
+        started = time.perf_counter()
+        writer.write((json.dumps({"id": turn, "thread_id": f"session-{session}", "message": f"turn {turn}"}) + "\n").encode())
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        if "error" in response:
+            errors[response["error"]] = errors.get(response["error"], 0) + 1
+        else:
+            latencies.append(time.perf_counter() - started)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def main(sessions_count: int, turns: int, llm_latency: float, max_workers: int, max_pending: int):
+    db_path = os.path.join(tempfile.mkdtemp(), "loadtest.db")
+    memory = get_memory("sqlite-async", db_path)
+    graph = build_graph(memory, llm=StubChatModel(latency=llm_latency))
+    sessions = ChatSessions(graph, max_workers=max_workers, max_pending=max_pending)
+    server = await serve(sessions, port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(port, i, turns, latencies, errors) for i in range(sessions_count)))
+    elapsed = time.perf_counter() - started
+
+    server.close()
+    await server.wait_closed()
+    await memory.aclose()
+
+    latencies.sort()
+    print(f"sessions={sessions_count} turns={turns} workers={max_workers} max_pending={max_pending} llm={llm_latency}s")
+    print(f"completed: {len(latencies)} turns in {elapsed:.1f}s ({len(latencies) / elapsed:.0f} turns/s)")
+    if latencies:
+        print(f"latency p50: {statistics.median(latencies) * 1000:.0f} ms, "
+              f"p99: {latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000:.0f} ms")
+    print(f"errors: {errors or 'none'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the LangGraph chat server with a stub LLM")
+    parser.add_argument("--sessions", type=int, default=200, help="Concurrent chat sessions")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per session")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per stub LLM call")
+    parser.add_argument("--workers", type=int, default=64, help="Maximum concurrent graph runs")
+    parser.add_argument("--max-pending", type=int, default=1000, help="Queued or running turns before rejecting")
+    args = parser.parse_args()
+    asyncio.run(main(args.sessions, args.turns, args.llm_latency, args.workers, args.max_pending))
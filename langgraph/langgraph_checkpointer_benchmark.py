@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import Annotated
+
+import aiosqlite
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from pydantic import BaseModel
+
+from langgraph_async_checkpointer import BatchedAsyncSqliteSaver, CompactingAsyncSqliteSaver
+
+# This script benchmarks checkpointers for the interactive chat graph without calling an LLM.
+# It runs 1, 10 and 100 concurrent chat threads (one thread_id each) and reports
+# checkpoints per second and p50/p99 super-step latency for AsyncSqliteSaver and BatchedAsyncSqliteSaver.
+# With --history N it instead grows one thread to N turns and compares database size and load time
+# for full checkpoints against delta storage (CompactingAsyncSqliteSaver). Load time is the median of --loads
+# cold loads (fresh saver, tables already set up); both savers deserialize the whole history, so expect it on par.
+
+
+class State(BaseModel):
+    messages: Annotated[list, add_messages]
+
+
+def build_graph(memory):
+    # Two nodes, so every turn has several super-steps like a chatbot -> tools -> chatbot round-trip
+    def chatbot(state: State) -> State:
+        return State(messages=[AIMessage(content=f"reply {len(state.messages)}")])
+
+    def tools(state: State) -> State:
+        return State(messages=[AIMessage(content="tool result")])
+
+    graph_builder = StateGraph(State)
+    graph_builder.add_node("chatbot", chatbot)
+    graph_builder.add_node("tools", tools)
+    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_edge("chatbot", "tools")
+    graph_builder.add_edge("tools", END)
+    return graph_builder.compile(checkpointer=memory)
+
+
+def make_saver(saver_name: str, db_path: str, **kwargs):
+    if saver_name == "batched":
+        return BatchedAsyncSqliteSaver(aiosqlite.connect(db_path), aiosqlite.connect(db_path), **kwargs)
+    if saver_name == "compacting":
+        return CompactingAsyncSqliteSaver(aiosqlite.connect(db_path), aiosqlite.connect(db_path), **kwargs)
+    return AsyncSqliteSaver(aiosqlite.connect(db_path))
+
+
+async def close_saver(memory):
+    if isinstance(memory, BatchedAsyncSqliteSaver):
+        await memory.aclose()
+    else:
+        await memory.conn.close()
+
+
+async def run_thread(graph, thread_id: str, turns: int, step_latencies: list[float]):
+    config = {"configurable": {"thread_id": thread_id}}
+    for turn in range(turns):
+        started = time.perf_counter()
+        async for _ in graph.astream({"messages": [{"role": "user", "content": f"turn {turn}"}]},
+                                     config=config, stream_mode="updates"):
+            now = time.perf_counter()
+            step_latencies.append(now - started)  # Time from the previous step (or turn start) to this update
+            started = now
+
+
+async def run_case(saver_name: str, threads: int, turns: int) -> dict:
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    memory = make_saver(saver_name, db_path)
+    await memory.setup()
+    graph = build_graph(memory)
+
+    step_latencies: list[float] = []
+    started = time.perf_counter()
+    await asyncio.gather(*(run_thread(graph, f"thread-{i}", turns, step_latencies) for i in range(threads)))
+    elapsed = time.perf_counter() - started
+
+    await close_saver(memory)
+    with sqlite3.connect(db_path) as conn:
+        checkpoints = conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+
+    step_latencies.sort()
+    return {
+        "saver": saver_name,
+        "threads": threads,
+        "checkpoints_per_s": checkpoints / elapsed,
+        "p50_ms": statistics.median(step_latencies) * 1000,
+        "p99_ms": step_latencies[int(len(step_latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def run_history(saver_name: str, turns: int, loads: int) -> dict:
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    memory = make_saver(saver_name, db_path, **({"keep_last": 10} if saver_name == "compacting" else {}))
+    graph = build_graph(memory)
+    config = {"configurable": {"thread_id": "long"}}
+    started = time.perf_counter()
+    for turn in range(turns):
+        await graph.ainvoke({"messages": [{"role": "user", "content": f"turn {turn}"}]}, config=config)
+    write_s = time.perf_counter() - started
+    await close_saver(memory)
+
+    # Load the latest state of the long thread from fresh process-like savers (no in-memory snapshot cache);
+    # opening the connections and creating the tables is not part of the load
+    load_times = []
+    for _ in range(loads):
+        memory = make_saver(saver_name, db_path)
+        await memory.setup()
+        graph = build_graph(memory)
+        started = time.perf_counter()
+        state = await graph.aget_state(config)
+        load_times.append((time.perf_counter() - started) * 1000)
+        await close_saver(memory)
+    return {
+        "saver": saver_name,
+        "messages": len(state.values["messages"]),
+        "write_s": write_s,
+        "load_ms": statistics.median(load_times),
+        "db_mb": os.path.getsize(db_path) / 1e6,
+    }
+
+
+async def main_history(turns: int, loads: int):
+    print(f"{'saver':<12}{'messages':>10}{'write s':>10}{'load ms':>10}{'db MB':>10}   (load: median of {loads})")
+    for saver_name in ["batched", "compacting"]:
+        r = await run_history(saver_name, turns, loads)
+        print(f"{r['saver']:<12}{r['messages']:>10}{r['write_s']:>10.1f}{r['load_ms']:>10.2f}{r['db_mb']:>10.2f}")
+
+
+async def main(turns: int, concurrency: list[int]):
+    print(f"{'saver':<10}{'threads':>8}{'ckpt/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for threads in concurrency:
+        for saver_name in ["async", "batched"]:
+            r = await run_case(saver_name, threads, turns)
+            print(f"{r['saver']:<10}{r['threads']:>8}{r['checkpoints_per_s']:>12.0f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark LangGraph SQLite checkpointers")
+    parser.add_argument("--turns", type=int, default=20, help="Chat turns per thread")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100], help="Concurrent threads")
+    parser.add_argument("--history", type=int, help="Grow one thread to this many turns and compare storage")
+    parser.add_argument("--loads", type=int, default=20, help="Cold loads of the long thread (with --history)")
+    args = parser.parse_args()
+    if args.history:
+        asyncio.run(main_history(args.history, args.loads))
+    else:
+        asyncio.run(main(args.turns, args.concurrency))
@@ -5,16 +5,26 @@ from langgraph.graph import StateGraph
 from langchain_core.messages import HumanMessage, AIMessage
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from langchain.agents import Tool
-from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_community.utilities import GoogleSerperAPIWrapper
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
+from langgraph.prebuilt import tools_condition
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.model_factory import aclose_clients, get_langchain_llm as get_llm  # Shared, pooled model clients
+from shared.search import get_search_backend  # Shared, cached web search
+from shared.tracing import instrument_graph  # Run/node/LLM/tool spans when TRACE_PATH is set
+from langgraph_context_window import ContextWindow, make_async_llm_summarizer, make_llm_summarizer
+from langgraph_parallel_tools import ParallelToolNode
+from langgraph_streaming import stream_reply, astream_reply
 
 # Persistent memory imports
+import asyncio
 import sqlite3
+import aiosqlite
 from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph_async_checkpointer import CompactingAsyncSqliteSaver
 
 # This script demonstrates a LangGraph workflow with persistent memory integration.
 # The agent can use tools (e.g., web search) and maintain chat history across sessions using SQLite or in-memory storage.
@@ -22,34 +32,39 @@ from langgraph.checkpoint.memory import MemorySaver
 load_dotenv()
 
 # Setup Tools
-# Instantiate a Google Serper API wrapper for web search
-serper = GoogleSerperAPIWrapper()
+# Use the shared Serper search backend (cached, coalesced, with a native async path)
+serper = get_search_backend()
 # Define a LangChain Tool for online search
-tool_search = Tool(
+tool_search = serper.as_langchain_tool(
         name="search",
-        func=serper.run,
         description="Useful for when you need more information from an online search"
     )
 
 # List of available tools for the agent
 tools = [tool_search]
 
-# Helper function to get an LLM instance by model name
-def get_llm(model_name: str):
-    if model_name == "gpt":
-        return ChatOpenAI(model="gpt-4o-mini")  # Use OpenAI GPT model
-    elif model_name == "llama":
-        return ChatOllama(model="llama3.2:1b")  # Use local Ollama Llama model
-
 # Helper function to get a memory saver (in-memory or SQLite for persistence)
-def get_memory(memory_type: str = "in-memory"):
+# "sqlite-async" must be called from a running event loop and used with graph.ainvoke
+# The two SQLite modes store checkpoints in different formats, so each has its own default file
+DB_PATHS = {"sqlite": "memory.db", "sqlite-async": "memory_compact.db"}
+
+
+def get_memory(memory_type: str = "in-memory", db_path: str | None = None):
+    db_path = db_path or DB_PATHS.get(memory_type)
     if memory_type == "in-memory":
         return MemorySaver()  # Volatile, in-memory storage
     elif memory_type == "sqlite":
-        db_path = "memory.db"
         conn = sqlite3.connect(db_path, check_same_thread=False)
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'message_snapshots'").fetchone():
+            conn.close()  # SqliteSaver cannot read message deltas: it would fail when loading a thread
+            raise ValueError(f"{db_path} holds compacted checkpoints of the sqlite-async mode; use another file")
         sql_memory = SqliteSaver(conn)  # Persistent SQLite storage
         return sql_memory
+    elif memory_type == "sqlite-async":
+        # Persistent SQLite storage with WAL, batched commits and a separate read connection.
+        # Message history is stored as deltas against a snapshot; only the last 20 checkpoints per thread are kept.
+        return CompactingAsyncSqliteSaver(aiosqlite.connect(db_path), aiosqlite.connect(db_path),
+                                          snapshot_every=50, keep_last=20)
 
 
 ## Step 1. Define State
@@ -58,26 +73,34 @@ class State(BaseModel):
     messages: Annotated[list, add_messages]
 
 
-def main():
-    # Setup LLM and bind tools to it
-    llm = get_llm("gpt")
+def build_graph(memory, llm=None):
+    # Setup LLM and bind tools to it (pass llm to use another model, e.g. a stub for load tests)
+    llm = llm or get_llm("gpt")
     llm_with_tools = llm.bind_tools(tools)
-    
-    # Setup memory - save chat history (choose between in-memory or SQLite)
-    memory = get_memory("sqlite")
+
+    # Trim the history sent to the LLM to a token budget; older turns are folded into a rolling summary
+    # (the async node updates the summary with ainvoke, so one long thread never blocks the server's event loop)
+    context_window = ContextWindow(max_tokens=8000, strategy="summarize", summarizer=make_llm_summarizer(llm),
+                                   async_summarizer=make_async_llm_summarizer(llm))
 
     ## Step 2 -> start graph builder
     graph_builder = StateGraph(State)  # Initialize a stateful graph with the State schema
 
     ## Step 3 -> Define Nodes
     # The chatbot node: generates a response using the LLM (with tool access)
-    def chatbot(state: State) -> State:
-        new_messages = [llm_with_tools.invoke(state.messages)]
+    def chatbot(state: State, config: RunnableConfig) -> State:
+        new_messages = [llm_with_tools.invoke(context_window.select(state.messages, config))]
+        return State(messages=new_messages)
+
+    # Same node for graph.ainvoke: awaits the LLM instead of holding a worker thread, so many sessions can wait at once
+    async def achatbot(state: State, config: RunnableConfig) -> State:
+        new_messages = [await llm_with_tools.ainvoke(await context_window.aselect(state.messages, config))]
         return State(messages=new_messages)
 
     # Add nodes to the graph
-    graph_builder.add_node("chatbot", chatbot)  # Main conversational node
-    graph_builder.add_node("tools", ToolNode(tools=tools))  # Tool node for executing tool calls
+    graph_builder.add_node("chatbot", RunnableLambda(chatbot, afunc=achatbot, name="chatbot"))  # Main conversational node
+    # Tool node for executing tool calls: several searches from one AIMessage run concurrently (max 4 at a time)
+    graph_builder.add_node("tools", ParallelToolNode(tools, limits={"search": 4}, timeout=30.0).as_runnable())
 
 
     ## Step 4 -> create edge
@@ -93,6 +116,13 @@ def main():
 
     ## Step 5 -> compile graph with memory
     graph = graph_builder.compile(checkpointer=memory)  # Compile the graph with persistent memory
+    return instrument_graph(graph)  # Traced if TRACE_PATH is set
+
+
+def main(stream: bool = False):
+    # Setup memory - save chat history (choose between in-memory or SQLite)
+    memory = get_memory("sqlite")
+    graph = build_graph(memory)
 
     ## Step 6 -> create entry for chat and invoke graph
     config = {"configurable": {"thread_id": "1"}}  # Use a thread ID for persistent chat sessions
@@ -109,10 +139,38 @@ def main():
         if user_input.strip().lower() in ["exit", "bye"]:
             print("Goodbye!")
             break
+        if stream:
+            # Print tokens and tool progress as they arrive; Ctrl-C cancels the answer and keeps the thread valid
+            stream_reply(graph, {"messages": [{"role": "user", "content": user_input}]}, config=config)
+            continue
         result = graph.invoke({"messages": [{"role": "user", "content": user_input}]}, config=config)
         print(f"AI: {result['messages'][-1].content}")
 
 
+async def amain(stream: bool = False):
+    # Async mode: checkpoint writes are batched and never block the event loop
+    memory = get_memory("sqlite-async")
+    graph = build_graph(memory)
+    config = {"configurable": {"thread_id": "1"}}  # Each concurrent session uses its own thread ID
+
+    while True:
+        user_input = await asyncio.to_thread(input, "Enter your message: ")  # Keep the loop free while waiting
+        if user_input.strip().lower() in ["exit", "bye"]:
+            print("Goodbye!")
+            break
+        if stream:
+            await astream_reply(graph, {"messages": [{"role": "user", "content": user_input}]}, config=config)
+            continue
+        result = await graph.ainvoke({"messages": [{"role": "user", "content": user_input}]}, config=config)
+        print(f"AI: {result['messages'][-1].content}")
+
+    await memory.aclose()  # Commit every pending checkpoint and close the connections
+    await aclose_clients()
+
+
 if __name__ == "__main__":
-    main()
+    if "--async" in sys.argv:
+        asyncio.run(amain(stream="--stream" in sys.argv))
+    else:
+        main(stream="--stream" in sys.argv)
 
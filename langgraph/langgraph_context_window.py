@@ -0,0 +1,225 @@
+import asyncio
+import functools
+import json
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+# This module trims the chat history sent to the LLM so every call fits a token budget.
+# Strategies:
+# - "sliding":   the most recent messages that fit the budget
+# - "pinned":    like sliding, but system messages are always kept; with pin_tool_messages=True so are tool
+#                results, each with the AIMessage that requested it (tool results are often the largest messages
+#                of a search conversation and pinned ones are never dropped, so this is off by default: unpinned
+#                tool results leave the window, or are summarized, together with their AIMessage)
+# - "summarize": like pinned, plus a rolling summary of everything that fell out of the window;
+#                only messages newly pushed out are summarized, and only when the window overflows; they are
+#                folded in chunks of at most summary_chunk_tokens, so no summarizer call is larger than the window
+# An AIMessage with tool calls and its ToolMessages are kept or dropped together, so the window never
+# starts with an orphaned tool result. Token counts are cached per message id, so a budget check
+# only counts messages it has not seen before.
+# Pinned indices and the rolling summary are kept per thread_id. A call without a thread_id keeps no state
+# between calls (concurrent runs of a shared graph must not see each other's): pinned messages are rescanned
+# and, with "summarize", the messages outside the window are summarized again on every call.
+
+# Rough per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@functools.lru_cache(maxsize=1)  # Loading the encoding is slow; share it between windows
+def _default_encoder() -> Callable[[str], int]:
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: max(1, len(text) // 4)  # ~4 characters per token when tiktoken is unavailable
+
+
+def message_text(message: BaseMessage) -> str:
+    """Text the model sees for a message, including tool call arguments."""
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    if isinstance(message, AIMessage) and message.tool_calls:
+        content += json.dumps([{"name": c["name"], "args": c["args"]} for c in message.tool_calls])
+    return content
+
+
+def _summary_prompt(previous_summary: str, messages: list[BaseMessage]) -> list[BaseMessage]:
+    transcript = "\n".join(f"{m.type}: {message_text(m)}" for m in messages)
+    return [
+        SystemMessage(content="You maintain a running summary of a conversation. "
+                              "Update the summary with the new messages. Keep facts, names, decisions "
+                              "and open questions. Reply with the updated summary only."),
+        HumanMessage(content=f"Current summary:\n{previous_summary or '(empty)'}\n\nNew messages:\n{transcript}"),
+    ]
+
+
+def make_llm_summarizer(llm) -> Callable[[str, list[BaseMessage]], str]:
+    """Summarizer that folds new messages into the previous summary with one LLM call."""
+    def summarize(previous_summary: str, messages: list[BaseMessage]) -> str:
+        return llm.invoke(_summary_prompt(previous_summary, messages)).content
+    return summarize
+
+
+def make_async_llm_summarizer(llm) -> Callable[[str, list[BaseMessage]], Awaitable[str]]:
+    """Same as make_llm_summarizer, awaiting the LLM (for ContextWindow.aselect on an event loop)."""
+    async def asummarize(previous_summary: str, messages: list[BaseMessage]) -> str:
+        return (await llm.ainvoke(_summary_prompt(previous_summary, messages))).content
+    return asummarize
+
+
+class ContextWindow:
+    """Selects the messages passed to the LLM for one call, within max_tokens."""
+
+    def __init__(self, max_tokens: int = 8000, strategy: str = "pinned",
+                 summarizer: Callable[[str, list[BaseMessage]], str] | None = None,
+                 count_tokens: Callable[[str], int] | None = None, max_cached_messages: int = 100_000,
+                 pin_tool_messages: bool = False,
+                 async_summarizer: Callable[[str, list[BaseMessage]], Awaitable[str]] | None = None,
+                 max_threads: int = 10_000, summary_chunk_tokens: int | None = None):
+        if strategy not in ("sliding", "pinned", "summarize"):
+            raise ValueError(f"Unknown context strategy: {strategy}")
+        if strategy == "summarize" and summarizer is None:
+            raise ValueError("The summarize strategy needs a summarizer, e.g. make_llm_summarizer(llm)")
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.summarizer = summarizer
+        self.async_summarizer = async_summarizer  # Used by aselect(); without it aselect runs summarizer on a thread
+        self.count_tokens = count_tokens or _default_encoder()
+        self.max_cached_messages = max_cached_messages
+        self.pin_tool_messages = pin_tool_messages
+        self.summary_chunk_tokens = summary_chunk_tokens or max_tokens // 2  # Message tokens per summarizer call
+        self._token_cache: OrderedDict[str, int] = OrderedDict()  # message id -> tokens
+        # Per-thread state, least recently used thread first; at most max_threads threads are kept. An evicted
+        # thread only loses its cached work: pinned messages are rescanned and, with "summarize", the messages
+        # outside its window are summarized again (in chunks) on its next overflow.
+        self.max_threads = max_threads
+        self._summaries: OrderedDict[str, tuple[str, int]] = OrderedDict()  # thread id -> (summary, messages folded)
+        self._pinned: OrderedDict[str, tuple[int, list[int]]] = OrderedDict()  # thread id -> (scanned, pinned indices)
+
+    def tokens(self, message: BaseMessage) -> int:
+        """Token count of one message, computed once per message id."""
+        key = message.id or str(id(message))
+        cached = self._token_cache.get(key)
+        if cached is None:
+            cached = self.count_tokens(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+            self._token_cache[key] = cached
+            if len(self._token_cache) > self.max_cached_messages:
+                self._token_cache.popitem(last=False)
+        return cached
+
+    def _is_pinned(self, message: BaseMessage) -> bool:
+        if isinstance(message, SystemMessage):
+            return True
+        # A tool result is pinned together with the AIMessage that requested it, so it is never orphaned
+        return self.pin_tool_messages and (isinstance(message, ToolMessage)
+                                           or (isinstance(message, AIMessage) and bool(message.tool_calls)))
+
+    def _pinned_indices(self, thread_id: str | None, messages: list[BaseMessage]) -> list[int]:
+        if thread_id is None:
+            return [i for i, message in enumerate(messages) if self._is_pinned(message)]
+        # Scan only the messages added since the last call (rescan if the history was rewritten)
+        scanned, indices = self._pinned.get(thread_id, (0, []))
+        if scanned > len(messages) or any(not self._is_pinned(messages[i]) for i in indices[-1:]):
+            scanned, indices = 0, []
+        indices = indices + [i for i in range(scanned, len(messages)) if self._is_pinned(messages[i])]
+        self._remember(self._pinned, thread_id, (len(messages), indices))
+        return indices
+
+    def _remember(self, states: OrderedDict, thread_id: str, value) -> None:
+        states[thread_id] = value
+        states.move_to_end(thread_id)
+        while len(states) > self.max_threads:
+            states.popitem(last=False)  # Least recently used thread
+
+    def _window_start(self, messages: list[BaseMessage], budget: int, pinned: set[int]) -> int:
+        # Walk back from the newest message until the budget is used; O(window), not O(history)
+        used = 0
+        start = len(messages)
+        index = len(messages) - 1
+        while index >= 0:
+            if index in pinned:
+                index -= 1
+                continue
+            # A tool result belongs to the AIMessage that requested it: take the whole group or nothing
+            group_start = index
+            while group_start > 0 and isinstance(messages[group_start], ToolMessage):
+                group_start -= 1
+            group_tokens = sum(self.tokens(messages[i]) for i in range(group_start, index + 1) if i not in pinned)
+            if used + group_tokens > budget and start < len(messages):
+                break  # The newest message group is always kept, even over budget
+            used += group_tokens
+            start = group_start
+            index = group_start - 1
+        return start
+
+    def _plan(self, messages: list[BaseMessage], config: dict | None) -> dict:
+        # Everything select() decides before the (optional) summarizer call
+        thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+        thread_id = str(thread_id) if thread_id is not None else None
+        pinned = set(self._pinned_indices(thread_id, messages)) if self.strategy != "sliding" else set()
+        pinned_tokens = sum(self.tokens(messages[i]) for i in pinned)
+
+        summary, folded = self._summaries.get(thread_id, ("", 0)) if thread_id is not None else ("", 0)
+        if thread_id in self._summaries:
+            self._summaries.move_to_end(thread_id)
+        if folded > len(messages):
+            summary, folded = "", 0  # The history was rewritten
+        start = self._window_start(messages, self.max_tokens - pinned_tokens - self._summary_tokens(summary), pinned)
+        return {"thread_id": thread_id, "pinned": pinned, "pinned_tokens": pinned_tokens, "summary": summary,
+                "folded": folded, "start": start}
+
+    def _next_chunk(self, messages: list[BaseMessage], plan: dict, summary: str) -> list[BaseMessage]:
+        # Re-fit the window behind the current summary, then take the next messages pushed out of it that are
+        # not summarized yet, up to summary_chunk_tokens (a single larger message is a chunk of its own)
+        if self.strategy != "summarize":
+            return []
+        pinned = plan["pinned"]
+        budget = self.max_tokens - plan["pinned_tokens"] - self._summary_tokens(summary)
+        plan["start"] = start = max(plan["start"], self._window_start(messages, budget, pinned))
+        chunk, used, index = [], 0, plan["folded"]
+        while index < start:
+            if index not in pinned:
+                tokens = self.tokens(messages[index])
+                if chunk and used + tokens > self.summary_chunk_tokens:
+                    break
+                chunk.append(messages[index])
+                used += tokens
+            index += 1
+        plan["folded"] = max(plan["folded"], index)
+        return chunk
+
+    def _summary_tokens(self, summary: str) -> int:
+        return self.count_tokens(f"Summary of the earlier conversation:\n{summary}") + MESSAGE_OVERHEAD_TOKENS if summary else 0
+
+    def _finish(self, messages: list[BaseMessage], plan: dict, summary: str) -> list[BaseMessage]:
+        pinned, start = plan["pinned"], plan["start"]
+        if self.strategy == "summarize" and plan["thread_id"] is not None and summary != plan["summary"]:
+            self._remember(self._summaries, plan["thread_id"], (summary, plan["folded"]))
+
+        selected = [messages[i] for i in sorted(pinned) if i < start]
+        if self.strategy == "summarize" and summary and start > 0:
+            selected.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+        selected.extend(messages[start:])
+        return selected
+
+    def select(self, messages: list[BaseMessage], config: dict | None = None) -> list[BaseMessage]:
+        """Return the messages to send to the LLM for this call."""
+        plan = self._plan(messages, config)
+        summary = plan["summary"]
+        while chunk := self._next_chunk(messages, plan, summary):
+            summary = self.summarizer(summary, chunk)
+        return self._finish(messages, plan, summary)
+
+    async def aselect(self, messages: list[BaseMessage], config: dict | None = None) -> list[BaseMessage]:
+        """Same as select(), without blocking the event loop while the summary is updated."""
+        plan = self._plan(messages, config)
+        summary = plan["summary"]
+        while chunk := self._next_chunk(messages, plan, summary):
+            if self.async_summarizer is not None:
+                summary = await self.async_summarizer(summary, chunk)
+            else:
+                summary = await asyncio.to_thread(self.summarizer, summary, chunk)
+        return self._finish(messages, plan, summary)
@@ -0,0 +1,107 @@
+import hashlib
+import marshal
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+# This module compiles each LangGraph graph definition once per process and hands out the compiled graph.
+# Building a StateGraph, binding tools and compile() costs milliseconds; a service that needs a graph per
+# request or per tenant should pay that once. Compiled graphs are reentrant: one instance can serve any number
+# of concurrent invoke/ainvoke calls (per-run state lives in the config and the checkpointer, not the graph).
+#
+# Graphs are keyed by:
+# - the definition hash: the bytecode of the builder function, so an edited builder compiles a new graph
+# - the builder arguments: tools by name, description and the function they run (module, qualname and identity,
+#   so two tools with the same name but different code never share a graph), models by name, other objects
+#   (LLMs, checkpointers) by identity
+
+
+def definition_hash(builder: Callable) -> str:
+    """Hash of a builder function's code, including nested functions and constants."""
+    return hashlib.sha256(marshal.dumps(builder.__code__)).hexdigest()[:16]
+
+
+def _function_key(tool) -> tuple:
+    # What a tool runs: its func and coroutine (StructuredTool, @tool), or the tool object itself (BaseTool subclasses)
+    functions = [f for f in (getattr(tool, "func", None), getattr(tool, "coroutine", None)) if f is not None]
+    if not functions:
+        return ("object", id(tool))
+    return tuple((getattr(f, "__module__", None), getattr(f, "__qualname__", type(f).__qualname__), id(f))
+                 for f in functions)
+
+
+def _freeze(value):
+    # Turn builder arguments into a hashable cache key
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if hasattr(value, "name") and hasattr(value, "description"):
+        return ("tool", value.name, value.description, _function_key(value))  # LangChain tools
+    return ("object", id(value))
+
+
+class GraphRegistry:
+    """Memoizes compiled graphs by definition hash and builder arguments, with LRU eviction."""
+
+    def __init__(self, max_graphs: int = 128):
+        self.max_graphs = max_graphs
+        self.stats = {"hits": 0, "misses": 0, "compile_s": 0.0}
+        self._graphs: OrderedDict[tuple, object] = OrderedDict()
+        self._hashes: dict[Callable, str] = {}
+        self._building: dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, builder: Callable, kwargs: dict) -> tuple:
+        digest = self._hashes.get(builder)
+        if digest is None:
+            digest = self._hashes[builder] = definition_hash(builder)
+        return (builder.__module__, builder.__qualname__, digest, _freeze(kwargs))
+
+    def get(self, builder: Callable, **kwargs):
+        """Return builder(**kwargs), compiling it only the first time these arguments are seen."""
+        key = self._key(builder, kwargs)
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is not None:
+                self._graphs.move_to_end(key)
+                self.stats["hits"] += 1
+                return graph
+            building = self._building.setdefault(key, threading.Lock())
+
+        with building:  # Concurrent first requests for the same graph compile it once
+            with self._lock:
+                graph = self._graphs.get(key)
+                if graph is not None:
+                    self.stats["hits"] += 1
+                    return graph
+            started = time.perf_counter()
+            graph = builder(**kwargs)
+            with self._lock:
+                self.stats["misses"] += 1
+                self.stats["compile_s"] += time.perf_counter() - started
+                self._graphs[key] = graph
+                while len(self._graphs) > self.max_graphs:
+                    self._graphs.popitem(last=False)  # Evict the least recently used graph
+                self._building.pop(key, None)
+        return graph
+
+    def clear(self) -> None:
+        with self._lock:
+            self._graphs.clear()
+
+
+_registry: GraphRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_graph_registry() -> GraphRegistry:
+    """Return the process-wide graph registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = GraphRegistry()
+    return _registry
@@ -0,0 +1,46 @@
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")  # The tools graph builds a ChatOpenAI client but never calls it
+
+import langgraph_intro
+import langgraph_tools
+from langgraph_graph_registry import GraphRegistry
+
+# This script measures how long it takes to get a ready-to-invoke graph, with and without the graph registry.
+# "cold" builds the StateGraph, binds tools and compiles on every acquisition (what main() used to do);
+# "warm" asks a GraphRegistry that has already compiled the graph once. No LLM or search calls are made.
+
+
+def measure(acquire, repeat: int) -> list[float]:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        acquire()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main(repeat: int):
+    registry = GraphRegistry()
+    cases = {
+        "intro": (langgraph_intro.build_graph, {}),
+        "tools": (langgraph_tools.build_graph, {"model_name": "gpt", "tools": langgraph_tools.tools}),
+    }
+    print(f"{'graph':<8}{'mode':<6}{'mean us':>12}{'p50 us':>12}{'max us':>12}")
+    for graph_name, (builder, kwargs) in cases.items():
+        registry.get(builder, **kwargs)  # First compile happens once, outside the warm measurement
+        for mode, acquire in [("cold", lambda: builder(**kwargs)), ("warm", lambda: registry.get(builder, **kwargs))]:
+            latencies = measure(acquire, repeat)
+            print(f"{graph_name:<8}{mode:<6}{statistics.mean(latencies) * 1e6:>12.1f}"
+                  f"{statistics.median(latencies) * 1e6:>12.1f}{max(latencies) * 1e6:>12.1f}")
+    print(f"registry stats: {registry.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cold vs warm compiled-graph acquisition")
+    parser.add_argument("--repeat", type=int, default=200, help="Acquisitions per case")
+    args = parser.parse_args()
+    main(args.repeat)
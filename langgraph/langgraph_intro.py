@@ -7,6 +7,13 @@ from langchain_core.messages import HumanMessage, AIMessage
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.tracing import instrument_graph  # Run/node spans when TRACE_PATH is set
+from langgraph_graph_registry import get_graph_registry
+from langgraph_state import MessagesDict, ValidatedGraph
 
 # This script demonstrates a simple LangGraph workflow for a conversational AI agent.
 # It uses a stateful graph to orchestrate a multi-step, message-based interaction.
@@ -51,29 +58,32 @@ class State(BaseModel):
     messages: Annotated[list, add_messages]
 
 
-def main():
+def build_graph(state_mode: str = "pydantic"):
+    # "pydantic": State is validated on every step; "typed": a plain dict state, only the input is validated
+    StateType = State if state_mode == "pydantic" else MessagesDict
+
     ## Step 2 -> start graph builder
-    graph_builder = StateGraph(State)  # Initialize a stateful graph with the State schema
+    graph_builder = StateGraph(StateType)  # Initialize a stateful graph with the State schema
 
     ## Step 3 -> Define Nodes
     # Each node is a function that takes the current state and returns a new state
-    def first_node(old_state: State) -> State:
+    def first_node(old_state: StateType) -> StateType:
         # Node 1: Greets the user and tells a random AI joke
         reply = f"""Node 1: Hello, how are you?  let me tell you a joke. 
         {get_ai_joke()}"""
         messages = [{"role": "assistant", "content": reply}]
         
-        # State is immutable, so we need to create a new state object
-        new_state = State(messages=messages)
+        # State is immutable, so we need to create a new state object (a plain dict in typed mode)
+        new_state = StateType(messages=messages)
 
         return new_state
 
-    def second_node(old_state: State) -> State:
+    def second_node(old_state: StateType) -> StateType:
         # Node 2: Responds with a funny comment about the joke
         reply = f"""Node 2: {get_funny_comment()}"""
         messages=[{"role": "assistant", "content":reply}]
-        # State is immutable, so we need to create a new state object
-        new_state = State(messages=messages)
+        # State is immutable, so we need to create a new state object (a plain dict in typed mode)
+        new_state = StateType(messages=messages)
         return new_state
 
     ## add nodes to graph
@@ -89,7 +99,13 @@ def main():
 
 
     ##Step 5 -> compile graph
-    graph = graph_builder.compile()  # Compile the graph into an executable workflow
+    graph = instrument_graph(graph_builder.compile())  # Compile the graph into an executable workflow (traced if enabled)
+    return graph if state_mode == "pydantic" else ValidatedGraph(graph, State)
+
+
+def main(state_mode: str = "pydantic"):
+    # The compiled graph is built once per process and reused (it is safe to invoke concurrently)
+    graph = get_graph_registry().get(build_graph, state_mode=state_mode)
 
     ##Step 6 -> invoke graph
     messages=[{"role": "human", "content": "Hello, how are you?"}]
@@ -110,5 +126,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(state_mode="typed" if "--typed" in sys.argv else "pydantic")
 
@@ -0,0 +1,161 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import sys
+import threading
+import time
+import weakref
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.tracing import note_queue_wait  # Waits for a tool slot show up as queue_ms on the tool span
+
+# This module is a drop-in replacement for the prebuilt ToolNode when the model asks for several tools at once.
+# - Independent tool calls from one AIMessage run concurrently (thread pool for sync graphs, asyncio for async ones)
+# - Per-tool concurrency caps, e.g. at most 4 searches in flight across all threads of the process
+# - Per-call timeouts: a slow tool returns an error ToolMessage instead of stalling the turn. The wait for a free
+#   slot (or worker thread) is bounded by the same timeout, so tools hung in the background (a sync worker thread
+#   cannot be interrupted and keeps its slot until the tool returns) never block later turns
+# - Results are returned in the same order as the tool calls, so the transcript is deterministic
+
+
+class ParallelToolNode:
+    """Runs the tool calls of the last AIMessage concurrently with per-tool limits and timeouts."""
+
+    def __init__(self, tools: list, max_workers: int = 8, limits: dict[str, int] | None = None,
+                 default_limit: int = 4, timeout: float = 30.0, timeouts: dict[str, float] | None = None):
+        self.tools = {tool.name: tool for tool in tools}
+        self.limits = {name: (limits or {}).get(name, default_limit) for name in self.tools}
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tools")
+        self._thread_limits = {name: threading.BoundedSemaphore(limit) for name, limit in self.limits.items()}
+        # Semaphores are bound to one event loop: one set per loop, dropped with the loop
+        self._loop_limits: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]] = \
+            weakref.WeakKeyDictionary()
+
+    def as_runnable(self, name: str = "tools") -> RunnableLambda:
+        """Graph node with both sync and async paths: graph_builder.add_node("tools", node.as_runnable())."""
+        return RunnableLambda(self.run, afunc=self.arun, name=name)
+
+    @staticmethod
+    def _tool_calls(state) -> list[dict]:
+        messages = state["messages"] if isinstance(state, dict) else state.messages
+        last = messages[-1] if messages else None
+        if not isinstance(last, AIMessage):
+            raise ValueError("ParallelToolNode expects the last message to be an AIMessage with tool calls")
+        return last.tool_calls
+
+    @staticmethod
+    def _error(call: dict, error: str) -> ToolMessage:
+        return ToolMessage(content=f"Error: {error}", tool_call_id=call["id"], name=call["name"], status="error")
+
+    def _timeout(self, call: dict) -> float:
+        return self.timeouts.get(call["name"], self.timeout)
+
+    def _invoke(self, call: dict, index: int, started: dict[int, float], abandoned: set[int],
+                submitted: float) -> ToolMessage:
+        queued = time.perf_counter()
+        slot = self._thread_limits[call["name"]]
+        if not slot.acquire(timeout=max(submitted + self._timeout(call) - queued, 0.0)):
+            return self._error(call, f"{call['name']} timed out waiting for a free slot")
+        try:
+            if index in abandoned:
+                return self._error(call, f"{call['name']} timed out waiting for a free slot")
+            note_queue_wait(time.perf_counter() - queued)
+            started[index] = time.perf_counter()  # The timeout counts from here, as on the async path
+            return self.tools[call["name"]].invoke({**call, "type": "tool_call"})
+        finally:
+            slot.release()
+
+    def run(self, state) -> dict:
+        """Sync path: fan the calls out on the shared thread pool."""
+        calls = self._tool_calls(state)
+        results: list[ToolMessage | None] = [None] * len(calls)
+        started: dict[int, float] = {}  # Call index -> when its tool started running (after waiting for a slot)
+        abandoned: set[int] = set()  # Calls that gave up waiting for a slot or a worker thread
+        submitted = time.perf_counter()
+        futures = {}
+        for index, call in enumerate(calls):
+            if call["name"] not in self.tools:
+                results[index] = self._error(call, f"{call['name']} is not a valid tool, try one of {list(self.tools)}.")
+                continue
+            # Run in a copy of the node's context, so the tool run keeps its parent (callbacks, tracing)
+            future = self._executor.submit(contextvars.copy_context().run, self._invoke, call, index, started,
+                                           abandoned, submitted)
+            futures[future] = index
+
+        # Every call has its own deadline (start + timeout), so calls time out independently, not one after another.
+        # A call that has not started waits at most one timeout (from submission) for a slot and a worker thread.
+        pending = set(futures)
+        while pending:
+            now = time.perf_counter()
+            deadlines = []
+            for future in list(pending):
+                index = futures[future]
+                if index in started:
+                    deadline, error = started[index] + self._timeout(calls[index]), "timed out"
+                else:
+                    deadline, error = submitted + self._timeout(calls[index]), "timed out waiting for a free slot"
+                if now >= deadline and not future.done():
+                    # The worker thread cannot be interrupted; it finishes in the background and frees its slot then
+                    abandoned.add(index)
+                    future.cancel()  # Never runs if it is still queued for a worker thread
+                    results[index] = self._error(calls[index], f"{calls[index]['name']} {error}")
+                    pending.discard(future)
+                else:
+                    deadlines.append(deadline)
+            if not pending:
+                break
+            # Wake up at the next deadline (a call that starts later only moves its own deadline later)
+            done, _ = concurrent.futures.wait(pending, timeout=max(min(deadlines) - now, 0.0),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = self._error(calls[index], repr(e))
+        return {"messages": results}
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        # A semaphore that has made a caller wait holds its loop, so weak keys alone would not free closed loops
+        for loop in [loop for loop in self._loop_limits if loop.is_closed()]:
+            del self._loop_limits[loop]
+        semaphores = self._loop_limits.setdefault(asyncio.get_running_loop(), {})
+        semaphore = semaphores.get(name)
+        if semaphore is None:
+            semaphore = semaphores[name] = asyncio.Semaphore(self.limits[name])
+        return semaphore
+
+    async def _ainvoke(self, call: dict) -> ToolMessage:
+        if call["name"] not in self.tools:
+            return self._error(call, f"{call['name']} is not a valid tool, try one of {list(self.tools)}.")
+        semaphore = self._semaphore(call["name"])
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self._timeout(call))
+        except asyncio.TimeoutError:
+            return self._error(call, f"{call['name']} timed out waiting for a free slot")
+        try:
+            note_queue_wait(time.perf_counter() - started)
+            return await asyncio.wait_for(self.tools[call["name"]].ainvoke({**call, "type": "tool_call"}),
+                                          timeout=self._timeout(call))
+        except asyncio.TimeoutError:
+            return self._error(call, f"{call['name']} timed out")
+        except Exception as e:
+            return self._error(call, repr(e))
+        finally:
+            semaphore.release()
+
+    async def arun(self, state) -> dict:
+        """Async path: one task per call, gathered in call order."""
+        calls = self._tool_calls(state)
+        return {"messages": list(await asyncio.gather(*(self._ainvoke(call) for call in calls)))}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
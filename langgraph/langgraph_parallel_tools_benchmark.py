@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Annotated
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from langgraph.prebuilt import ToolNode, tools_condition
+from pydantic import BaseModel
+
+from langgraph_parallel_tools import ParallelToolNode
+from langgraph_stub_llm import make_stub_search
+
+# This script benchmarks the tools node of langgraph_tools.py without calling an LLM or the search API.
+# A fake chatbot node emits N search calls in one AIMessage, then answers; the fake search sleeps for --latency.
+# It compares a sequential tool node, the prebuilt ToolNode and ParallelToolNode (capped at 4 and at 2 concurrent searches),
+# on the sync (invoke) and async (ainvoke) paths, and reports the mean and p95 turn latency.
+
+
+class State(BaseModel):
+    messages: Annotated[list, add_messages]
+
+
+def sequential_node(tools: list):
+    tools_by_name = {tool.name: tool for tool in tools}
+
+    def run(state: State) -> dict:
+        calls = state.messages[-1].tool_calls
+        return {"messages": [tools_by_name[call["name"]].invoke({**call, "type": "tool_call"}) for call in calls]}
+
+    return run
+
+
+def build_graph(tools_node, calls: int):
+    # Fake LLM: first call asks for `calls` searches, the call after the tool results answers
+    def chatbot(state: State) -> State:
+        if state.messages[-1].type != "tool":
+            tool_calls = [{"name": "search", "args": {"query": f"entity {i}"}, "id": f"call_{i}"} for i in range(calls)]
+            return State(messages=[AIMessage(content="", tool_calls=tool_calls)])
+        return State(messages=[AIMessage(content="done")])
+
+    graph_builder = StateGraph(State)
+    graph_builder.add_node("chatbot", chatbot)
+    graph_builder.add_node("tools", tools_node)
+    graph_builder.add_conditional_edges("chatbot", tools_condition, "tools")
+    graph_builder.add_edge("tools", "chatbot")
+    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_edge("chatbot", END)
+    return graph_builder.compile()
+
+
+def make_nodes(tools: list) -> dict:
+    return {
+        "sequential": sequential_node(tools),
+        "ToolNode": ToolNode(tools=tools),
+        "parallel cap 4": ParallelToolNode(tools).as_runnable(),  # default_limit=4
+        "parallel cap 2": ParallelToolNode(tools, limits={"search": 2}).as_runnable(),
+    }
+
+
+def check_order(result: dict, calls: int):
+    tool_messages = [m for m in result["messages"] if m.type == "tool"]
+    assert [m.tool_call_id for m in tool_messages] == [f"call_{i}" for i in range(calls)], "results out of order"
+
+
+def run_sync(graph, calls: int, turns: int) -> list[float]:
+    latencies = []
+    for _ in range(turns):
+        started = time.perf_counter()
+        result = graph.invoke({"messages": [{"role": "user", "content": "compare these companies"}]})
+        latencies.append(time.perf_counter() - started)
+        check_order(result, calls)
+    return latencies
+
+
+async def run_async(graph, calls: int, turns: int) -> list[float]:
+    latencies = []
+    for _ in range(turns):
+        started = time.perf_counter()
+        result = await graph.ainvoke({"messages": [{"role": "user", "content": "compare these companies"}]})
+        latencies.append(time.perf_counter() - started)
+        check_order(result, calls)
+    return latencies
+
+
+def main(calls_list: list[int], latency: float, turns: int):
+    tools = [make_stub_search(latency)]  # Stands in for the Serper round-trip
+    print(f"{'tool node':<16}{'path':<7}{'calls':>6}{'mean ms':>10}{'p95 ms':>10}")
+    for calls in calls_list:
+        for node_name, node in make_nodes(tools).items():
+            graph = build_graph(node, calls)
+            for path in ["sync", "async"]:
+                latencies = run_sync(graph, calls, turns) if path == "sync" else asyncio.run(run_async(graph, calls, turns))
+                latencies.sort()
+                p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+                print(f"{node_name:<16}{path:<7}{calls:>6}{statistics.mean(latencies) * 1000:>10.1f}{p95 * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs parallel tool execution")
+    parser.add_argument("--calls", type=int, nargs="+", default=[1, 3, 6], help="Tool calls per AIMessage")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per fake search call")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per case")
+    args = parser.parse_args()
+    main(args.calls, args.latency, args.turns)
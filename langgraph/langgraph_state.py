@@ -0,0 +1,55 @@
+from typing import Annotated, TypedDict
+
+from langgraph.graph.message import add_messages
+
+# This module holds the lightweight state mode for the example graphs.
+# With a Pydantic State, LangGraph builds and validates a State model for every node input, and every node
+# allocates another State just to carry its delta to the add_messages reducer. For cheap, high-volume graphs
+# that validation can be a visible share of CPU. In "typed" mode the graph state is a plain TypedDict (no
+# per-step validation or copies) and the Pydantic model only checks the input of each call: the new messages
+# (the delta the reducer appends), not the history in the checkpointer. The result is not validated again
+# unless validate_result=True: it is built by the graph's own nodes from validated inputs.
+# On the example graphs (one list field) there is no measurable gain; it pays off only for states with many or
+# nested fields. Measure with langgraph_state_benchmark.py before relying on it.
+
+STATE_MODES = ("pydantic", "typed")
+
+
+class MessagesDict(TypedDict):
+    # Same shape as the Pydantic State of the examples; nodes return {"messages": [...]} deltas
+    messages: Annotated[list, add_messages]
+
+
+def messages_of(state) -> list:
+    """Messages of a graph state in either mode."""
+    return state["messages"] if isinstance(state, dict) else state.messages
+
+
+class ValidatedGraph:
+    """A compiled TypedDict-state graph that validates each call's input with a Pydantic model (and, opt-in, its result)."""
+
+    def __init__(self, graph, schema, validate_result: bool = False):
+        self.graph = graph
+        self.schema = schema
+        self.validate_result = validate_result
+
+    def _validate(self, value):
+        if value is None:
+            return None  # Resuming from the checkpointer: no new input
+        # dict(model) keeps the field values as they are (messages stay message objects)
+        return dict(self.schema.model_validate(value))
+
+    def invoke(self, inputs, config=None, **kwargs):
+        result = self.graph.invoke(self._validate(inputs), config, **kwargs)
+        if self.validate_result:
+            self._validate(result)
+        return result
+
+    async def ainvoke(self, inputs, config=None, **kwargs):
+        result = await self.graph.ainvoke(self._validate(inputs), config, **kwargs)
+        if self.validate_result:
+            self._validate(result)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)  # stream, get_state, ... go straight to the compiled graph
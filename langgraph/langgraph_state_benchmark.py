@@ -0,0 +1,68 @@
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")  # langgraph_tools builds its default client at import
+os.environ["LANGSMITH_TRACING"] = "false"  # Measure the graph, not trace uploads
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import langgraph_intro
+import langgraph_tools
+from langgraph_stub_llm import StubChatModel, make_stub_search
+
+# This microbenchmark compares the Pydantic State and the lightweight TypedDict state ("typed" mode)
+# on the two-node joke graph of langgraph_intro.py and the tool loop of langgraph_tools.py.
+# The tool loop uses a stub LLM that asks for --rounds searches before answering and a search that returns
+# immediately, so only graph overhead is measured. Each input starts with --history earlier messages,
+# since per-step validation cost grows with the size of the state. The modes are interleaved --repeat times and
+# the median speedup is reported with its range: a range that straddles 1.00x means no measurable difference.
+
+
+def make_history(size: int) -> list:
+    history = []
+    for i in range(size // 2):
+        history.append(HumanMessage(content=f"question {i}", id=f"h{i}"))
+        history.append(AIMessage(content=f"answer {i}", id=f"a{i}"))
+    return history
+
+
+def steps_per_second(graph, history: list, steps_per_run: int, seconds: float) -> float:
+    runs = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        graph.invoke({"messages": history + [HumanMessage(content="tell me more")]})
+        runs += 1
+    return runs * steps_per_run / (time.perf_counter() - started)
+
+
+def main(history_size: int, rounds: int, seconds: float, repeat: int):
+    history = make_history(history_size)
+    search = make_stub_search()
+    llm = StubChatModel(tool_rounds=rounds)
+    print(f"history={history_size} messages, tool rounds={rounds}")
+    print(f"{'graph':<12}{'pydantic steps/s':>18}{'typed steps/s':>16}{'speedup':>10}{'range':>16}")
+    cases = {
+        "joke": (lambda mode: langgraph_intro.build_graph(state_mode=mode), 2),
+        "tool loop": (lambda mode: langgraph_tools.build_graph(tools=[search], state_mode=mode, llm=llm), 2 * rounds + 1),
+    }
+    for name, (build, steps_per_run) in cases.items():
+        graphs = {mode: build(mode) for mode in ["pydantic", "typed"]}
+        rates = {mode: [] for mode in graphs}
+        for _ in range(repeat):  # Interleaved, so drift in machine load hits both modes alike
+            for mode, graph in graphs.items():
+                rates[mode].append(steps_per_second(graph, history, steps_per_run, seconds))
+        speedups = [typed / pydantic for typed, pydantic in zip(rates["typed"], rates["pydantic"])]
+        print(f"{name:<12}{statistics.median(rates['pydantic']):>18.0f}{statistics.median(rates['typed']):>16.0f}"
+              f"{statistics.median(speedups):>9.2f}x{f'{min(speedups):.2f}-{max(speedups):.2f}x':>16}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Steps per second with Pydantic vs TypedDict graph state")
+    parser.add_argument("--history", type=int, default=20, help="Earlier messages in every input")
+    parser.add_argument("--rounds", type=int, default=2, help="Tool calls per run in the tool loop")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Measurement time per run")
+    parser.add_argument("--repeat", type=int, default=7, help="Interleaved runs per mode (the median is reported)")
+    args = parser.parse_args()
+    main(args.history, args.rounds, args.seconds, args.repeat)
@@ -0,0 +1,132 @@
+import asyncio
+import signal
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+# This module streams a LangGraph chat turn to the terminal.
+# Tokens from the chatbot node are printed as they arrive, tool calls show progress events,
+# and Ctrl-C stops the turn early. A cancelled turn never leaves an AIMessage with unanswered
+# tool calls in the checkpoint, so the next turn of the same thread is still a valid conversation.
+
+CANCELLED_TOOL_RESULT = "Cancelled by the user before the tool finished."
+
+
+class _Renderer:
+    def __init__(self, chat_node: str):
+        self.chat_node = chat_node
+        self.at_line_start = True
+        self.text = ""
+
+    def _start_line(self, prefix: str = "AI: "):
+        if self.at_line_start:
+            print(prefix, end="", flush=True)
+            self.at_line_start = False
+
+    def _end_line(self):
+        if not self.at_line_start:
+            print(flush=True)
+            self.at_line_start = True
+
+    def render(self, mode: str, chunk) -> None:
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") != self.chat_node or not isinstance(message, AIMessageChunk):
+                return
+            for tool_call in message.tool_call_chunks:
+                if tool_call.get("name"):
+                    self._end_line()
+                    print(f"  [calling {tool_call['name']}...]", flush=True)
+            if isinstance(message.content, str) and message.content:
+                self._start_line()
+                print(message.content, end="", flush=True)
+                self.text += message.content
+        elif mode == "updates":
+            for node, update in chunk.items():
+                if node == self.chat_node or update is None:
+                    continue
+                messages = update.get("messages", []) if isinstance(update, dict) else getattr(update, "messages", [])
+                for message in messages:
+                    if isinstance(message, ToolMessage):
+                        self._end_line()
+                        print(f"  [{message.name or 'tool'} finished: {len(str(message.content))} chars]", flush=True)
+
+    def finish(self, cancelled: bool = False) -> None:
+        if cancelled:
+            self._start_line("")
+            print(" [cancelled]", end="")
+        self._end_line()
+
+
+def _unanswered_tool_calls(values: dict) -> list[ToolMessage]:
+    # Tool results to append when the last message asks for tools that never answered
+    messages = values.get("messages", []) if values else []
+    if not messages or not isinstance(messages[-1], AIMessage) or not messages[-1].tool_calls:
+        return []
+    return [ToolMessage(content=CANCELLED_TOOL_RESULT, tool_call_id=call["id"], name=call["name"])
+            for call in messages[-1].tool_calls]
+
+
+def repair_thread(graph, config: dict | None, tools_node: str = "tools") -> None:
+    """After a cancelled turn, answer any pending tool calls so the thread stays valid."""
+    if graph.checkpointer is None or not config:
+        return  # Nothing was persisted
+    tool_messages = _unanswered_tool_calls(graph.get_state(config).values)
+    if tool_messages:
+        graph.update_state(config, {"messages": tool_messages}, as_node=tools_node)
+
+
+async def arepair_thread(graph, config: dict | None, tools_node: str = "tools") -> None:
+    """Async version of repair_thread."""
+    if graph.checkpointer is None or not config:
+        return
+    tool_messages = _unanswered_tool_calls((await graph.aget_state(config)).values)
+    if tool_messages:
+        await graph.aupdate_state(config, {"messages": tool_messages}, as_node=tools_node)
+
+
+def stream_reply(graph, inputs: dict, config: dict | None = None, chat_node: str = "chatbot") -> str | None:
+    """Run one turn, printing tokens and tool progress as they arrive. Returns None if cancelled with Ctrl-C."""
+    renderer = _Renderer(chat_node)
+    try:
+        for mode, chunk in graph.stream(inputs, config=config, stream_mode=["messages", "updates"]):
+            renderer.render(mode, chunk)
+    except KeyboardInterrupt:
+        renderer.finish(cancelled=True)
+        repair_thread(graph, config)
+        return None
+    renderer.finish()
+    return renderer.text
+
+
+async def astream_reply(graph, inputs: dict, config: dict | None = None, chat_node: str = "chatbot") -> str | None:
+    """Async version of stream_reply; Ctrl-C cancels only the current turn, not the event loop."""
+    renderer = _Renderer(chat_node)
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    interrupted = False
+
+    def on_sigint():
+        nonlocal interrupted
+        interrupted = True
+        task.cancel()
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, on_sigint)
+        handles_sigint = True
+    except (NotImplementedError, RuntimeError):
+        handles_sigint = False  # e.g. Windows event loops: Ctrl-C ends the program instead
+    try:
+        async for mode, chunk in graph.astream(inputs, config=config, stream_mode=["messages", "updates"]):
+            renderer.render(mode, chunk)
+    except asyncio.CancelledError:
+        if not interrupted:
+            raise  # Cancelled by someone else, not by Ctrl-C
+        task.uncancel()
+        renderer.finish(cancelled=True)
+        await arepair_thread(graph, config)
+        return None
+    finally:
+        if handles_sigint:
+            loop.remove_signal_handler(signal.SIGINT)
+    renderer.finish()
+    return renderer.text
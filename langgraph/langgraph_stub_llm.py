@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import Tool
+
+# This module holds offline stand-ins for the LLM and the search tool, for benchmarks, load tests and batch
+# runs without API keys. The stub model waits `latency` seconds per call (like a remote LLM), asks for
+# `tool_rounds` searches after each human message, then answers.
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model that answers after a fixed delay, optionally requesting searches first."""
+    latency: float = 0.0
+    tool_rounds: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages) -> ChatResult:
+        done = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            done += isinstance(message, ToolMessage)
+        if done < self.tool_rounds:
+            call = {"name": "search", "args": {"query": f"{messages[-1].content} {done}"}, "id": f"call_{done}"}
+            message = AIMessage(content="", tool_calls=[call])
+        else:
+            message = AIMessage(content=f"reply to {len(messages)} messages")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+def make_stub_search(latency: float = 0.0) -> Tool:
+    """Search tool with the same name as the real one that answers after a fixed delay."""
+    def search(query: str) -> str:
+        time.sleep(latency)
+        return f"results for {query}"
+
+    async def asearch(query: str) -> str:
+        await asyncio.sleep(latency)
+        return f"results for {query}"
+
+    return Tool(name="search", func=search, coroutine=asearch, description="Stub search")
@@ -5,11 +5,20 @@ from langgraph.graph import StateGraph
 from langchain_core.messages import HumanMessage, AIMessage
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from langchain.agents import Tool
-from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_community.utilities import GoogleSerperAPIWrapper
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
+from langgraph.prebuilt import tools_condition
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.model_factory import get_langchain_llm as get_llm  # Shared, pooled model clients
+from shared.search import get_search_backend  # Shared, cached web search
+from shared.tracing import instrument_graph  # Run/node/LLM/tool spans when TRACE_PATH is set
+from langgraph_context_window import ContextWindow
+from langgraph_parallel_tools import ParallelToolNode
+from langgraph_graph_registry import get_graph_registry
+from langgraph_state import MessagesDict, ValidatedGraph, messages_of
+from langgraph_streaming import stream_reply
 
 # This script demonstrates a LangGraph workflow that integrates external tools (e.g., web search)
 # into a stateful, graph-based conversational agent. The agent can decide when to use a tool node
@@ -18,25 +27,17 @@ from langchain_ollama import ChatOllama
 load_dotenv()
 
 # Setup Tools
-# Instantiate a Google Serper API wrapper for web search
-serper = GoogleSerperAPIWrapper()
+# Use the shared Serper search backend (cached, coalesced, with a native async path)
+serper = get_search_backend()
 # Define a LangChain Tool for online search
-tool_search = Tool(
+tool_search = serper.as_langchain_tool(
         name="search",
-        func=serper.run,
         description="Useful for when you need more information from an online search"
     )
 
 # List of available tools for the agent
 tools = [tool_search]
 
-# Helper function to get an LLM instance by model name
-def get_llm(model_name: str):
-    if model_name == "gpt":
-        return ChatOpenAI(model="gpt-4o-mini")  # Use OpenAI GPT model
-    elif model_name == "llama":
-        return ChatOllama(model="llama3.2:1b")  # Use local Ollama Llama model
-
 
 ## Step 1. Define State
 class State(BaseModel):
@@ -44,23 +45,34 @@ class State(BaseModel):
     messages: Annotated[list, add_messages]
 
 
-def main():
-    # Setup LLM and bind tools to it
-    llm = get_llm("gpt")
+def build_graph(model_name: str = "gpt", tools: list = tools, state_mode: str = "pydantic", llm=None):
+    # Setup LLM and bind tools to it (pass llm to use another model, e.g. a stub for benchmarks)
+    llm = llm or get_llm(model_name)
     llm_with_tools = llm.bind_tools(tools)  # Bind the tools to the LLM for tool-augmented responses
 
+    # Trim the history sent to the LLM to a token budget (system messages are always kept)
+    context_window = ContextWindow(max_tokens=8000, strategy="pinned")
+
     ## Step 2 -> start graph builder
-    graph_builder = StateGraph(State)  # Initialize a stateful graph with the State schema
+    # "pydantic": State is validated on every step; "typed": a plain dict state, only the input is validated
+    StateType = State if state_mode == "pydantic" else MessagesDict
+    graph_builder = StateGraph(StateType)  # Initialize a stateful graph with the State schema
 
     ## Step 3 -> Define Nodes
     # The chatbot node: generates a response using the LLM (with tool access)
-    def chatbot(state: State) -> State:
-        new_messages = [llm_with_tools.invoke(state.messages)]
-        return State(messages=new_messages)
+    def chatbot(state: StateType, config: RunnableConfig) -> StateType:
+        new_messages = [llm_with_tools.invoke(context_window.select(messages_of(state), config))]
+        return StateType(messages=new_messages)
+
+    # Same node for graph.ainvoke: awaits the LLM instead of holding a worker thread (batch runs, servers)
+    async def achatbot(state: StateType, config: RunnableConfig) -> StateType:
+        new_messages = [await llm_with_tools.ainvoke(context_window.select(messages_of(state), config))]
+        return StateType(messages=new_messages)
 
     # Add nodes to the graph
-    graph_builder.add_node("chatbot", chatbot)  # Main conversational node
-    graph_builder.add_node("tools", ToolNode(tools=tools))  # Tool node for executing tool calls
+    graph_builder.add_node("chatbot", RunnableLambda(chatbot, afunc=achatbot, name="chatbot"))  # Main conversational node
+    # Tool node for executing tool calls: several searches from one AIMessage run concurrently (max 4 at a time)
+    graph_builder.add_node("tools", ParallelToolNode(tools, limits={"search": 4}, timeout=30.0).as_runnable())
 
 
     ## Step 4 -> create edge
@@ -75,7 +87,13 @@ def main():
 
 
     ## Step 5 -> compile graph
-    graph = graph_builder.compile()  # Compile the graph into an executable workflow
+    graph = instrument_graph(graph_builder.compile())  # Compile the graph into an executable workflow (traced if enabled)
+    return graph if state_mode == "pydantic" else ValidatedGraph(graph, State)
+
+
+def main(stream: bool = False, state_mode: str = "pydantic"):
+    # The compiled graph is cached per model and tool set, so repeated calls skip bind_tools and compile()
+    graph = get_graph_registry().get(build_graph, model_name="gpt", tools=tools, state_mode=state_mode)
 
     ## Step 6 -> create entry for chat and invoke graph
     def chat(user_input: str, history):
@@ -91,10 +109,14 @@ def main():
         if user_input.strip().lower() in ["exit", "bye"]:
             print("Goodbye!")
             break
+        if stream:
+            # Print tokens and tool progress as they arrive; Ctrl-C cancels the current answer
+            stream_reply(graph, {"messages": [{"role": "user", "content": user_input}]})
+            continue
         result = graph.invoke({"messages": [{"role": "user", "content": user_input}]})
         print(f"AI: {result['messages'][-1].content}")
 
 
 if __name__ == "__main__":
-    main()
+    main(stream="--stream" in sys.argv, state_mode="typed" if "--typed" in sys.argv else "pydantic")
 
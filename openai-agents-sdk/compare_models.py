@@ -0,0 +1,151 @@
+# Import necessary classes and functions from the agents package
+from agents import Agent, ModelSettings, Runner
+from agents import trace
+from dotenv import load_dotenv  # For loading environment variables from a .env file
+from dataclasses import dataclass
+from typing import Callable
+import argparse
+import asyncio  # For running asynchronous code
+import time
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.model_factory import get_agents_model as get_model, aclose_clients  # Shared, pooled model clients
+from shared.tracing import instrument_agents  # Local span file alongside the SDK traces when TRACE_PATH is set
+
+# This script sends the same prompt to several models at once and compares them.
+# Every run is streamed, so besides total latency it records time-to-first-token and token usage.
+# Modes:
+# - "all":    wait for every model (wall-clock time is the slowest model, not the sum)
+# - "first":  start every model, keep the first acceptable answer and cancel the rest
+# - "hedged": start the first model; if it has not answered after --hedge-delay seconds, also start the next one
+#             (and so on); keep the first acceptable answer and cancel the rest. This cuts the tail latency when
+#             the local model stalls without paying for every model on every request.
+
+# Load environment variables from .env file
+load_dotenv()
+instrument_agents()
+
+MODES = ("all", "first", "hedged")
+
+
+@dataclass
+class ModelResult:
+    model: str
+    output: str | None = None
+    latency_s: float | None = None
+    ttft_s: float | None = None  # Time to first output token
+    input_tokens: int = 0
+    output_tokens: int = 0
+    error: str | None = None
+    cancelled: bool = False
+
+
+def is_acceptable(result: ModelResult) -> bool:
+    """Default acceptance check for first-wins and hedged modes: any non-empty answer without an error."""
+    return result.error is None and bool(result.output)
+
+
+async def run_model(model_name: str, instructions: str, user_input: str, result: ModelResult) -> ModelResult:
+    """Run one agent on one model, streaming, and fill in result as it goes."""
+    agent = Agent(name=f"Assistant ({model_name})", instructions=instructions, model=get_model(model_name=model_name),
+                  model_settings=ModelSettings(include_usage=True))  # Ask chat-completions backends for token usage
+    started = time.perf_counter()
+    streamed = Runner.run_streamed(agent, user_input)
+    try:
+        async for event in streamed.stream_events():
+            if (result.ttft_s is None and event.type == "raw_response_event"
+                    and getattr(event.data, "type", "") == "response.output_text.delta"):
+                result.ttft_s = time.perf_counter() - started
+        result.output = str(streamed.final_output)
+    except asyncio.CancelledError:
+        streamed.cancel()  # Stop the underlying model call, not just our reader
+        result.cancelled = True
+        raise
+    except Exception as e:
+        result.error = repr(e)
+    finally:
+        result.latency_s = time.perf_counter() - started
+        usage = streamed.context_wrapper.usage
+        result.input_tokens, result.output_tokens = usage.input_tokens, usage.output_tokens
+    return result
+
+
+async def _cancel(tasks: list[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)  # Let cancelled runs clean up before returning
+
+
+async def compare_models(model_names: list[str], instructions: str, user_input: str, mode: str = "all",
+                         hedge_delay: float = 2.0,
+                         accept: Callable[[ModelResult], bool] = is_acceptable) -> tuple[ModelResult | None, list[ModelResult]]:
+    """
+    Send user_input to every model in model_names concurrently.
+    Returns (winner, results): winner is the first acceptable result (None in "all" mode or if none was acceptable),
+    results has one entry per model in model_names order, including cancelled and never-started runs.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode}, expected one of {MODES}")
+    results = [ModelResult(model=name) for name in model_names]
+
+    with trace(f"Compare models ({mode})"):
+        if mode == "all":
+            await asyncio.gather(*(run_model(name, instructions, user_input, result)
+                                   for name, result in zip(model_names, results)))
+            return None, results
+
+        # first / hedged: launch runs (all at once, or one more every hedge_delay) until one is acceptable
+        pending: set[asyncio.Task] = set()
+        waiting = list(zip(model_names, results))
+        winner = None
+        launch_next = True
+        try:
+            while winner is None and (pending or waiting):
+                if waiting and launch_next:
+                    launch = waiting if mode == "first" else waiting[:1]
+                    for name, result in launch:
+                        pending.add(asyncio.create_task(run_model(name, instructions, user_input, result)))
+                    waiting = waiting[len(launch):]
+                timeout = hedge_delay if mode == "hedged" and waiting else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                launch_next = not done  # The hedge delay passed without an answer
+                for task in done:
+                    if accept(task.result()):
+                        winner = winner or task.result()
+                    else:
+                        launch_next = True  # A failed run is backed up right away
+        finally:
+            await _cancel(list(pending))
+        return winner, results
+
+
+def print_results(winner: ModelResult | None, results: list[ModelResult]):
+    print(f"{'model':<14}{'latency s':>10}{'ttft s':>8}{'in tok':>8}{'out tok':>8}  status")
+    for r in results:
+        status = "cancelled" if r.cancelled else r.error or ("not started" if r.latency_s is None else "ok")
+        latency = f"{r.latency_s:.2f}" if r.latency_s is not None else "-"
+        ttft = f"{r.ttft_s:.2f}" if r.ttft_s is not None else "-"
+        print(f"{r.model:<14}{latency:>10}{ttft:>8}{r.input_tokens:>8}{r.output_tokens:>8}  {status}")
+    for r in [winner] if winner else [r for r in results if r.output]:
+        print(f"\n Result from {r.model}: \n {r.output} \n {'*' * 100}")
+
+
+async def main(user_input: str, model_names: list[str], mode: str, hedge_delay: float):
+    system_prompt = "You are a standup comedian. You are funny and you are good at making people laugh."
+    started = time.perf_counter()
+    winner, results = await compare_models(model_names, system_prompt, user_input, mode=mode, hedge_delay=hedge_delay)
+    print_results(winner, results)
+    print(f"\nWall-clock: {time.perf_counter() - started:.2f}s")
+    await aclose_clients()  # Release pooled connections before the event loop closes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send one prompt to several models concurrently")
+    parser.add_argument("prompt", nargs="?", default="Tell a joke about Autonomous AI Agents")
+    parser.add_argument("--models", nargs="+", default=["llama", "gpt"], help="Model names known to the model factory")
+    parser.add_argument("--mode", choices=MODES, default="all")
+    parser.add_argument("--hedge-delay", type=float, default=2.0, help="Seconds before a hedged backup request starts")
+    args = parser.parse_args()
+    asyncio.run(main(args.prompt, args.models, args.mode, args.hedge_delay))
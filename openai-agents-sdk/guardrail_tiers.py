@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+# This module puts two cheap tiers in front of an LLM input guardrail.
+# - Tier 1 "rules": a local regex classifier (no network, microseconds). It settles only clear cases:
+#   profanity or threats aimed at the reader are inappropriate, and a strict allowlist of short, known-safe
+#   phrasings (greetings, thanks, acknowledgements) is clean. Having no bad keyword proves nothing (abuse and threats
+#   can be phrased without one), so everything else goes to the next tiers.
+# - Tier 2 "cache": verdicts of earlier LLM checks, keyed by a hash of the normalized text.
+# - Tier 3 "llm": the guardrail agent, for any other text that was not seen before.
+
+PROFANITY = r"(?:f[ua*]ck|sh[i!*]t|b[i!*]tch|asshole|bastard|dickhead|cunt|motherf[ua*]ck|wanker|twat)\w*"
+
+# Explicit abuse and threats aimed at the reader: inappropriate without asking the LLM.
+# Profanity alone is not enough ("the bastard sword is a medieval weapon"): it must be addressed to someone.
+BLOCK_PATTERNS = [
+    rf"\b(?:you|u|ya|your|you'?re|ur)\b(?:\W+\w+){{0,4}}?\W+{PROFANITY}",
+    rf"\b{PROFANITY}\W+(?:\w+\W+){{0,4}}?(?:you|u|ya|off)\b",
+    r"\b(?:i ?will|i'?ll|gonna|going to)\s+(?:kill|hurt|murder|shoot|stab|beat)\s+(?:you|u|ya)\b",
+    r"\b(?:kill|hang|shoot)\s+your ?self\b",
+    r"\bkys\b",
+]
+
+# Known-safe phrasings: the whole (normalized) message must match one of these to pass without the LLM
+ALLOW_PATTERNS = [
+    r"(?:hi|hello|hey|good (?:morning|afternoon|evening))(?: (?:team|all|everyone|there))?",
+    r"(?:thanks|thank you|thx|many thanks)(?: (?:so much|a lot|very much))?(?: for (?:your|the) help)?",
+    r"(?:ok|okay|sure|yes|no|got it|sounds good|noted|will do|of course)",
+    r"(?:bye|goodbye|see you(?: (?:tomorrow|later|soon))?|have a (?:nice|good|great) (?:day|evening|weekend))",
+    r"(?:how are you|how is it going|what time is it)",
+]
+
+# Common obfuscations: f4ck, $hit, 1diot
+LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s"})
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and undo simple character substitutions."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"\s+", " ", text.casefold().translate(LEET)).strip()
+
+
+@dataclass
+class GuardrailVerdict:
+    is_inappropriate: bool
+    reason: str
+    tier: str  # "rules", "cache" or "llm"
+
+
+class RuleClassifier:
+    """Regex tier: returns a verdict for clear cases and None when the text needs the cache or the LLM."""
+
+    def __init__(self, block_patterns: list[str] = BLOCK_PATTERNS, allow_patterns: list[str] = ALLOW_PATTERNS):
+        self.block = re.compile("|".join(block_patterns))
+        self.allow = re.compile("|".join(f"(?:{pattern})" for pattern in allow_patterns))
+
+    def classify(self, text: str) -> GuardrailVerdict | None:
+        normalized = normalize_text(text)
+        match = self.block.search(normalized)
+        if match:
+            return GuardrailVerdict(True, f"Matched blocked expression '{match.group(0)}'", "rules")
+        if self.allow.fullmatch(normalized.rstrip(" .!?,")):
+            return GuardrailVerdict(False, "Known-safe phrasing", "rules")
+        return None  # No proof either way: cache, then the LLM
+
+
+class VerdictCache:
+    """LRU cache of LLM verdicts keyed by a hash of the normalized text."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[bool, str]] = OrderedDict()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(normalize_text(text).encode()).hexdigest()
+
+    def get(self, key: str) -> GuardrailVerdict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return GuardrailVerdict(entry[0], entry[1], "cache")
+
+    def set(self, key: str, verdict: GuardrailVerdict) -> None:
+        self._entries[key] = (verdict.is_inappropriate, verdict.reason)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class TieredGuardrail:
+    """Rules, then cached verdicts, then the LLM check; identical concurrent LLM checks share one call."""
+
+    def __init__(self, llm_check: Callable[[str], Awaitable[tuple[bool, str]]],
+                 rules: RuleClassifier | None = None, cache: VerdictCache | None = None):
+        self.llm_check = llm_check
+        self.rules = rules or RuleClassifier()
+        self.cache = cache if cache is not None else VerdictCache()
+        self.stats = {"rules": 0, "cache": 0, "llm": 0}
+        self.seconds = {"rules": 0.0, "cache": 0.0, "llm": 0.0}
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def check(self, text: str) -> GuardrailVerdict:
+        started = time.perf_counter()
+        verdict = self.rules.classify(text)
+        if verdict is None:
+            key = self.cache.key(text)
+            verdict = self.cache.get(key)
+            if verdict is None:
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._inflight[key] = asyncio.ensure_future(self._llm(text, key))
+                    future.add_done_callback(lambda _: self._inflight.pop(key, None))
+                    verdict = await asyncio.shield(future)
+                else:
+                    shared = await asyncio.shield(future)  # Same text already being checked: no second LLM call
+                    verdict = GuardrailVerdict(shared.is_inappropriate, shared.reason, "cache")
+        self.stats[verdict.tier] += 1
+        self.seconds[verdict.tier] += time.perf_counter() - started
+        return verdict
+
+    async def _llm(self, text: str, key: str) -> GuardrailVerdict:
+        is_inappropriate, reason = await self.llm_check(text)
+        verdict = GuardrailVerdict(is_inappropriate, reason, "llm")
+        self.cache.set(key, verdict)
+        return verdict
+
+    def llm_share(self) -> float:
+        """Share of checks that needed an LLM call."""
+        total = sum(self.stats.values())
+        return self.stats["llm"] / total if total else 0.0
@@ -1,35 +1,26 @@
 # Import necessary classes and functions from the agents package
 from agents import (
     Agent,
+    FunctionTool,
     Runner,
-    OpenAIChatCompletionsModel,
-    AsyncOpenAI,
     trace,
     WebSearchTool,
 )
 import asyncio  # For running asynchronous code
+import dataclasses
+import json
+import re
 from dotenv import load_dotenv  # For loading environment variables from a .env file
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.model_factory import get_agents_model as get_model, aclose_clients  # Shared, pooled model clients
+from shared.tracing import instrument_agents  # Local span file alongside the SDK traces when TRACE_PATH is set
 
 # Load environment variables from .env file
 load_dotenv()
-
-# Get Model - Local LLM Ollama, LLM GPT
-def get_model(model_name="llama"):
-    """
-    Returns a model instance based on the model_name.
-    - If 'llama', returns a local Ollama LLM model wrapped for OpenAI compatibility.
-    - If 'gpt', returns the string identifier for the GPT model.
-    """
-    if model_name == "llama":
-        external_client = AsyncOpenAI(
-            base_url="http://localhost:11434/v1", api_key="not-needed"
-        )
-        model = OpenAIChatCompletionsModel(
-            openai_client=external_client, model="llama3.2:1b"
-        )
-    elif model_name == "gpt":
-        model = "gpt-4o-mini"
-    return model
+instrument_agents()
 
 # Agent to be used as a tool for web searching
 web_searcher_tool = Agent(
@@ -75,18 +66,115 @@ search_reporter = Agent(
             )],
     )
 
-# Main function to run the multi-agent workflow
-async def main(user_input: str):
-    
+# Shares the result of identical tool calls within one run, so both reporters never search for the same thing twice
+class ToolCallDedup:
+    def __init__(self):
+        self._calls: dict[tuple[str, str], asyncio.Task] = {}
+        self.stats = {"calls": 0, "deduplicated": 0}
+
+    @staticmethod
+    def _key(tool_name: str, input_json: str) -> tuple[str, str]:
+        # Same tool, same arguments (ignoring case and whitespace in string values)
+        try:
+            args = json.loads(input_json)
+        except json.JSONDecodeError:
+            return tool_name, input_json
+        args = {k: re.sub(r"\s+", " ", v).strip().lower() if isinstance(v, str) else v for k, v in args.items()}
+        return tool_name, json.dumps(args, sort_keys=True)
+
+    def _forget_failure(self, key: tuple[str, str], task: asyncio.Task):
+        if task.cancelled() or task.exception() is not None:
+            self._calls.pop(key, None)  # Failed calls are not shared; the next identical call tries again
+
+    def wrap(self, tool: FunctionTool) -> FunctionTool:
+        async def on_invoke_tool(ctx, input_json: str):
+            key = self._key(tool.name, input_json)
+            task = self._calls.get(key)
+            if task is None:
+                self.stats["calls"] += 1
+                task = self._calls[key] = asyncio.ensure_future(tool.on_invoke_tool(ctx, input_json))
+                task.add_done_callback(lambda t: self._forget_failure(key, t))
+            else:
+                self.stats["deduplicated"] += 1
+            return await asyncio.shield(task)
+        return dataclasses.replace(tool, on_invoke_tool=on_invoke_tool)
+
+    def agent(self, agent: Agent) -> Agent:
+        """Copy of agent whose function tools go through this run's dedup cache."""
+        return agent.clone(tools=[self.wrap(t) if isinstance(t, FunctionTool) else t for t in agent.tools])
+
+
+# Pipeline mode: the summary streams, and each update gets its details run as soon as its line is complete
+async def run_pipeline(user_input: str, echo: bool = True) -> tuple[str, list[str], dict]:
+    dedup = ToolCallDedup()
+    summary_agent = dedup.agent(search_reporter).clone(
+        instructions=search_reporter.instructions + "\nPut each update on its own line.")
+    details_agent = dedup.agent(details_reporter)
+    details_tasks: list[asyncio.Task] = []
+
+    def start_details(update: str):
+        update = update.strip()
+        if update:
+            details_tasks.append(asyncio.create_task(Runner.run(details_agent, update)))
+
+    with trace("Search and details pipeline"):
+        streamed = Runner.run_streamed(summary_agent, user_input)
+        line = ""
+        if echo:
+            print("\nResult from search_reporter (streaming): ")
+        try:
+            async for event in streamed.stream_events():
+                if event.type == "raw_response_event" and getattr(event.data, "type", "") == "response.output_text.delta":
+                    if echo:
+                        print(event.data.delta, end="", flush=True)
+                    line += event.data.delta
+                    *complete, line = line.split("\n")
+                    for update in complete:
+                        start_details(update)  # Details for this update start while the summary keeps streaming
+            start_details(line)
+            if echo:
+                print()
+
+            details = []
+            for i, task in enumerate(details_tasks, 1):
+                result = await task
+                details.append(result.final_output)
+                if echo:
+                    print(f"\nDetails for update {i}: \n {result.final_output} \n")
+        finally:
+            for task in details_tasks:
+                task.cancel()
+    return str(streamed.final_output), details, dedup.stats
+
+
+# Run the multi-agent workflow on one input; clients stay open so runner.py can send many inputs on one loop
+# pipeline=True (runner.py --pipeline) streams the summary and runs the details per update, with deduplicated searches
+async def handle(user_input: str, pipeline: bool = False) -> dict:
+    if pipeline:
+        summary, details, stats = await run_pipeline(user_input, echo=False)
+        return {"summary": summary, "details": details, "web_searches": stats}
     # Handoffs: first get a summary, then get more details
     with trace("Search Reporter"):
         result_summary = await Runner.run(search_reporter, user_input)
         
     with trace("Details Reporter"):
         result_details = await Runner.run(details_reporter, result_summary.final_output)
-    
-    print(f"\nResult from search_reporter: \n {result_summary.final_output} \n")
-    print(f"\nResult from details_reporter: \n {result_details.final_output} \n {'*' * 100}")
+    return {"summary": result_summary.final_output, "details": result_details.final_output}
+
+
+# Main function to run the multi-agent workflow
+async def main(user_input: str, pipeline: bool = False):
+    if pipeline:
+        summary, details, stats = await run_pipeline(user_input)
+        print(f"{'*' * 100}\n{len(details)} details runs, web searches: {stats['calls']} run, {stats['deduplicated']} deduplicated")
+        await aclose_clients()  # Release pooled connections before the event loop closes
+        return
+
+    result = await handle(user_input)
+    print(f"\nResult from search_reporter: \n {result['summary']} \n")
+    print(f"\nResult from details_reporter: \n {result['details']} \n {'*' * 100}")
+
+    await aclose_clients()  # Release pooled connections before the event loop closes
 
 # Entry point for running the script directly
 if __name__ == "__main__":
@@ -94,6 +182,7 @@ if __name__ == "__main__":
         main(
             user_input="""Search the web for local sports news, and give me 1 interesting update in a sentence.
             I am interested in the Toronto Raptors, Toronto Blue Jays, and Toronto Maple Leafs.
-            """
+            """,
+            pipeline="--pipeline" in sys.argv,  # Stream the summary and start each details run as its update arrives
         )
     )
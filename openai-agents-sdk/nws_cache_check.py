@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.stub_server import StubConfig, StubServer, stub_env
+
+# This script checks the NWS response cache of single_agent_tools.py against the local stub server
+# (shared/stub_server.py), whose alerts route sends ETag / Last-Modified and answers conditional requests with 304.
+# - a first lookup fetches the payload; a repeat within NWS_CACHE_TTL makes no request
+# - identical lookups that arrive together share one request
+# - after the TTL expires, the lookup revalidates: the stub answers 304 and the cached payload is returned
+# Exits with status 1 if any step does not behave as expected.
+
+
+async def check(server: StubServer, ttl: float, lookups: int) -> list[str]:
+    import single_agent_tools as tools
+
+    url = f"{tools.NWS_API_BASE}/alerts/active/area/CA"
+    failures = []
+
+    def expect(name: str, ok: bool, detail: str):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+        if not ok:
+            failures.append(name)
+
+    try:
+        first = await tools.make_nws_request(url)
+        expect("first fetch", first is not None and server.stats["tool_requests"] == 1,
+               f"{server.stats['tool_requests']} request(s), etag {tools._nws_cache[url].etag if url in tools._nws_cache else None}")
+
+        cached = await tools.make_nws_request(url)
+        expect("fresh hit", cached is first and server.stats["tool_requests"] == 1,
+               f"{server.stats['tool_requests']} request(s) after a lookup within the TTL")
+
+        await asyncio.sleep(ttl * 1.5)
+        before = server.stats["tool_requests"]
+        results = await asyncio.gather(*(tools.make_nws_request(url) for _ in range(lookups)))
+        expect("revalidation", server.stats["tool_requests"] - before == 1 and server.stats["not_modified"] == 1,
+               f"{lookups} lookups after the TTL: {server.stats['tool_requests'] - before} request(s), "
+               f"{server.stats['not_modified']} answered 304")
+        expect("cached data", all(result is first for result in results),
+               "the revalidated lookups return the cached payload")
+
+        fresh = await tools.make_nws_request(url)
+        expect("TTL refreshed", fresh is first and server.stats["tool_requests"] - before == 1,
+               "a lookup right after the 304 makes no request")
+
+        # A changed payload must not be masked by the cache: a stale validator gets a full 200
+        tools._nws_cache[url] = tools._nws_cache[url]._replace(fetched_at=0.0, etag='"stale"', last_modified=None)
+        changed = await tools.make_nws_request(url)
+        expect("stale validator", changed is not first and changed == first and server.stats["not_modified"] == 1,
+               "a non-matching ETag gets the full payload")
+    finally:
+        await tools.close_nws_client()
+    return failures
+
+
+def main(args):
+    server = StubServer(StubConfig(tool_latency=args.tool_latency))
+    server.start_in_thread()  # Its own loop, so the check's requests are answered concurrently
+    os.environ.update(stub_env(server.url))  # Before single_agent_tools is imported: it reads these at import
+    os.environ["NWS_CACHE_TTL"] = str(args.ttl)
+    try:
+        failures = asyncio.run(check(server, args.ttl, args.lookups))
+    finally:
+        server.stop_thread()
+    print("all checks passed" if not failures else f"{len(failures)} check(s) failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the NWS cache's TTL, coalescing and 304 revalidation")
+    parser.add_argument("--ttl", type=float, default=0.5, help="NWS_CACHE_TTL for the check, in seconds")
+    parser.add_argument("--lookups", type=int, default=10, help="Concurrent lookups after the TTL expires")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="Stub seconds per alerts request")
+    main(parser.parse_args())
@@ -0,0 +1,160 @@
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from dotenv import load_dotenv  # For loading environment variables from a .env file
+from pydantic import BaseModel
+import argparse
+import asyncio  # For running asynchronous code
+import functools
+import importlib
+import inspect
+import json
+import time
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.model_factory import aclose_clients  # Shared, pooled model clients
+
+# This module runs many inputs through one of the example scripts on a single long-lived event loop.
+# Calling asyncio.run(main(...)) per input creates and destroys a loop every time and throws away every
+# pooled connection; here the loop, the model clients and their connections are shared by all inputs.
+# Every script exposes `async def handle(user_input)` for one input, and optionally `async def aclose()`
+# for its own clients. Usage:
+#   python runner.py single_agent_tools inputs.txt --concurrency 8 > results.jsonl
+#   echo "What is the weather in Ohio?" | python runner.py single_agent_tools -
+#   python runner.py multi_agent_tools inputs.txt --pipeline   (handle(..., pipeline=True), where a script supports it)
+
+# Load environment variables from .env file
+load_dotenv()
+
+SCRIPTS = ["single_agent", "single_agent_tools", "multi_agent_tools", "single_agent_stucturedoutput_gaurdrails"]
+
+
+@dataclass
+class InputResult:
+    index: int
+    input: str
+    output: Any = None
+    error: str | None = None
+    seconds: float = 0.0
+
+
+async def _aiter(inputs: Iterable[str] | AsyncIterable[str]) -> AsyncIterator[str]:
+    if hasattr(inputs, "__aiter__"):
+        async for item in inputs:
+            yield item
+    else:
+        for item in inputs:
+            yield item
+
+
+async def run_inputs(handler: Callable[[str], Awaitable[Any]], inputs: Iterable[str] | AsyncIterable[str],
+                     concurrency: int = 8) -> AsyncIterator[InputResult]:
+    """Run handler on every input, at most `concurrency` at a time; yields results as they finish."""
+    async def run_one(index: int, user_input: str) -> InputResult:
+        result = InputResult(index=index, input=user_input)
+        started = time.perf_counter()
+        try:
+            result.output = await handler(user_input)
+        except Exception as e:
+            result.error = repr(e)
+        result.seconds = time.perf_counter() - started
+        return result
+
+    # The next input and the running inputs are awaited together, so a finished result is yielded right away
+    # even when the next input is slow to arrive (stdin); inputs are read lazily, so a stream of any length works
+    source = _aiter(inputs)
+    reader: asyncio.Task | None = None
+    pending: set[asyncio.Task] = set()
+    index = 0
+    try:
+        while True:
+            if reader is None and source is not None and len(pending) < concurrency:
+                reader = asyncio.ensure_future(anext(source))
+            waiting = pending | ({reader} if reader is not None else set())
+            if not waiting:
+                break
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if reader in done:
+                done.discard(reader)
+                try:
+                    user_input = reader.result()
+                except StopAsyncIteration:
+                    source = None  # Every input has been read
+                else:
+                    pending.add(asyncio.create_task(run_one(index, user_input)))
+                    index += 1
+                reader = None
+            for task in done:
+                pending.discard(task)
+                yield task.result()
+    finally:
+        tasks = pending | ({reader} if reader is not None else set())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if source is not None:
+            await source.aclose()
+
+
+async def run_all(handler: Callable[[str], Awaitable[Any]], inputs: Iterable[str] | AsyncIterable[str],
+                  concurrency: int = 8) -> list[InputResult]:
+    """Run every input and return the results in input order."""
+    results = [result async for result in run_inputs(handler, inputs, concurrency)]
+    return sorted(results, key=lambda result: result.index)
+
+
+def to_json(value: Any) -> Any:
+    """JSON-friendly form of agent outputs (Pydantic models, dataclasses, lists of them)."""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    return value if value is None or isinstance(value, (str, int, float, bool)) else str(value)
+
+
+async def read_lines(path: str) -> AsyncIterator[str]:
+    """Non-empty lines of a file, or of stdin for "-", read without blocking the loop."""
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        while line := await asyncio.to_thread(stream.readline):
+            if line.strip():
+                yield line.strip()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+async def main(script: str, path: str, concurrency: int, pipeline: bool = False):
+    module = importlib.import_module(script)
+    handler = module.handle
+    if pipeline:
+        if "pipeline" not in inspect.signature(module.handle).parameters:
+            raise SystemExit(f"{script}.handle has no pipeline mode")
+        handler = functools.partial(module.handle, pipeline=True)
+    started = time.perf_counter()
+    count = 0
+    try:
+        async for result in run_inputs(handler, read_lines(path), concurrency):
+            print(json.dumps({**asdict(result), "output": to_json(result.output)}, ensure_ascii=False), flush=True)
+            count += 1
+    finally:
+        if hasattr(module, "aclose"):
+            await module.aclose()
+        await aclose_clients()  # Release pooled connections once, after the last input
+    elapsed = time.perf_counter() - started
+    print(f"{count} inputs in {elapsed:.1f}s ({count / elapsed:.2f} inputs/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many inputs through an example agent on one event loop")
+    parser.add_argument("script", choices=SCRIPTS)
+    parser.add_argument("inputs", help="Text file with one input per line, or - for stdin")
+    parser.add_argument("--concurrency", type=int, default=8, help="Inputs processed at the same time")
+    parser.add_argument("--pipeline", action="store_true", help="Pipelined mode of the script (multi_agent_tools)")
+    args = parser.parse_args()
+    asyncio.run(main(args.script, args.inputs, args.concurrency, args.pipeline))
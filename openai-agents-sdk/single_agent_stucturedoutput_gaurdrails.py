@@ -1,11 +1,23 @@
 # Import necessary classes and functions from the agents package
-from agents import Agent, Runner, OpenAIChatCompletionsModel, AsyncOpenAI, trace, input_guardrail, OutputGuardrailTripwireTriggered, RunContextWrapper, output_guardrail, GuardrailFunctionOutput
+from agents import Agent, Runner, trace, input_guardrail, OutputGuardrailTripwireTriggered, RunContextWrapper, output_guardrail, GuardrailFunctionOutput
+from agents import InputGuardrailTripwireTriggered
 import asyncio  # For running asynchronous code
+import dataclasses
 from dotenv import load_dotenv  # For loading environment variables from a .env file
 from pydantic import BaseModel  # For data validation and structured output
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.model_factory import get_agents_model as get_model, aclose_clients  # Shared, pooled model clients
+from shared.tracing import instrument_agents  # Local span file alongside the SDK traces when TRACE_PATH is set
+from guardrail_tiers import TieredGuardrail  # Local rules and cached verdicts before the LLM guardrail
+from runner import run_all  # Many inputs on one event loop
+from shared.structured_output import compile_schema, StructuredOutputError  # Precompiled output schemas with local repair
 
 # Load environment variables from .env file
 load_dotenv()
+instrument_agents()
 
 # Define the output schema for checking if a name is in the message
 class NameCheckOutput(BaseModel):
@@ -16,23 +28,11 @@ class NameCheckOutput(BaseModel):
 class InappropriateMessageCheckOutput(BaseModel):
     is_message_inappropriate: bool  # True if the message is inappropriate
     message: str  # Explanation or feedback
-    
-# Base URL for the local Ollama LLM API
-OLLAMA_BASE_URL = "http://localhost:11434/v1"
-
-def get_model(model_name="llama"):
-    """
-    Returns a model instance based on the model_name.
-    - If 'llama', returns a local Ollama LLM model wrapped for OpenAI compatibility.
-    - If 'gpt', returns the string identifier for the GPT model.
-    """
-    if model_name == "llama":
-        external_client = AsyncOpenAI(base_url=OLLAMA_BASE_URL, api_key="not-needed")
-        model = OpenAIChatCompletionsModel(openai_client=external_client, model="llama3.2:1b")
-    elif model_name == "gpt":
-        model = "gpt-4o-mini"
-    return model
 
+# Output schemas compiled once: strict parsing first, then local repair of near-miss JSON instead of a failed run
+name_check_schema = compile_schema(NameCheckOutput)
+inappropriate_check_schema = compile_schema(InappropriateMessageCheckOutput)
+    
 # System prompt for the message checker agent
 SYSTEM_PROMPT = "You are a message checker. You are given a message and you need to check if the name is in the message. If it is, you need to return True and a message. If it is not, you need to return False and a message."
 
@@ -43,16 +43,47 @@ gaurdrail_agent = Agent(
     name="Gaurdrail Agent",
     instructions="You are a gaurdrail agent. You are given a message and you need to check if the message is inappropriate. If it is, you need to return True and a message. If it is not, you need to return False and a message.",
     model=get_model(model_name="gpt"),
-    output_type=InappropriateMessageCheckOutput
+    output_type=inappropriate_check_schema.as_agents_output_type()
 )
 
+# LLM tier of the guardrail: only called for ambiguous messages that were not checked before
+# The verdict is streamed and checked as it arrives: malformed output is cut off at its first bad token and asked once more
+async def check_with_gaurdrail_agent(message: str) -> tuple[bool, str]:
+    for attempt in range(2):
+        streamed = Runner.run_streamed(gaurdrail_agent, message)  # Run the guardrail agent
+        try:
+            verdict = await inappropriate_check_schema.watch_agents_stream(streamed)
+        except StructuredOutputError:
+            if attempt:
+                raise
+            continue
+        finally:
+            record_usage("guardrail", streamed.context_wrapper.usage)
+        return verdict.is_message_inappropriate, verdict.message
+
+# Token usage of the guardrail and main agent calls, including main runs that the tripwire cancelled
+usage_ledger = {"guardrail_requests": 0, "guardrail_tokens": 0, "main_requests": 0, "main_tokens": 0,
+                "cancelled_main_runs": 0}
+
+def record_usage(kind: str, usage):
+    usage_ledger[f"{kind}_requests"] += usage.requests
+    usage_ledger[f"{kind}_tokens"] += usage.total_tokens
+
+# Tiered guardrail: keyword rules settle clear cases, earlier LLM verdicts are reused, the agent handles the rest
+tiered_gaurdrail = TieredGuardrail(llm_check=check_with_gaurdrail_agent)
+
 # Input guardrail function to check for inappropriate messages
+# SDK default (run_in_parallel=True): the message checker starts while the guardrail is still deciding. The SDK holds
+# the result back until the guardrail passes and cancels the in-flight model call if the tripwire fires, so a clean
+# message takes max(guardrail, agent) instead of guardrail + agent.
 @input_guardrail
 async def gaurdrail_against_inappropriate_message(ctx, agent, message):
-    result = await Runner.run(gaurdrail_agent, message)  # Run the guardrail agent
-    is_inappropriate = result.final_output.is_message_inappropriate  # Check if inappropriate
+    text = message if isinstance(message, str) else str(message)  # Input items when called with a conversation
+    verdict = await tiered_gaurdrail.check(text)
+    is_inappropriate = verdict.is_inappropriate  # Check if inappropriate
     return GuardrailFunctionOutput(
-        output_info={"message_inappropriate": result.final_output},  # Pass guardrail output
+        output_info={"message_inappropriate": InappropriateMessageCheckOutput(
+            is_message_inappropriate=is_inappropriate, message=verdict.reason), "tier": verdict.tier},  # Pass guardrail output
         tripwire_triggered=is_inappropriate,  # Trigger guardrail if inappropriate
     )
    
@@ -61,31 +92,59 @@ message_checker = Agent(
     name="Message Checker",
     instructions=SYSTEM_PROMPT,
     model=get_model(model_name="gpt"),
-    output_type=NameCheckOutput,
+    output_type=name_check_schema.as_agents_output_type(),
     input_guardrails=[gaurdrail_against_inappropriate_message]  # Attach input guardrail
 )
 
-# Main function to run the message checker agent
-async def main(user_input: str):
+# Blocking mode (opt-in): the verdict comes first, so a blocked message costs no main-agent tokens,
+# at the price of guardrail + agent latency for every clean message
+blocking_message_checker = message_checker.clone(
+    input_guardrails=[dataclasses.replace(gaurdrail_against_inappropriate_message, run_in_parallel=False)]
+)
+
+# Check one message; clients stay open so several messages can share one event loop
+async def handle(user_input: str, blocking: bool = False) -> dict:
+    agent = blocking_message_checker if blocking else message_checker
     with trace("Message Checker"):
-        result = await Runner.run(message_checker, user_input)  # Run the agent with user input
-        print(f"User message:\n{user_input} \n\n Result from message_checker: \n {result.final_output} \n {'*' * 100}")  # Print the result
+        try:
+            result = await Runner.run(agent, user_input)  # Run the agent with user input
+            record_usage("main", result.context_wrapper.usage)
+            return {"blocked": False, "result": result.final_output}
+        except InputGuardrailTripwireTriggered as e:
+            if e.run_data:
+                record_usage("main", e.run_data.context_wrapper.usage)  # Main-agent calls that finished before the trip
+            if not blocking:
+                usage_ledger["cancelled_main_runs"] += 1  # Its in-flight request may still be billed for the prompt
+            info = e.guardrail_result.output.output_info
+            return {"blocked": True, "tier": info["tier"], "reason": info["message_inappropriate"].message}
+
+# Main function to run the message checker agent on every message, on one event loop
+async def main(user_inputs: list[str], blocking: bool = False):
+    results = await run_all(lambda text: handle(text, blocking), user_inputs, concurrency=len(user_inputs))
+    for item in results:
+        if item.error:
+            print(f"User message:\n{item.input} \n\n Failed: \n {item.error} \n {'*' * 100}")
+        elif item.output["blocked"]:
+            print(f"User message:\n{item.input} \n\n Blocked by the input guardrail ({item.output['tier']}): \n {item.output['reason']} \n {'*' * 100}")
+        else:
+            print(f"User message:\n{item.input} \n\n Result from message_checker: \n {item.output['result']} \n {'*' * 100}")  # Print the result
+        print(f"Latency: {item.seconds:.2f}s ({'guardrail first' if blocking else 'parallel'})")
+    print(f"Usage: {usage_ledger}")
+
+    await aclose_clients()  # Release pooled connections before the event loop closes
 
 
 # Entry point for running the script directly
 if __name__ == "__main__":
     
-    user_input = """
+    user_inputs = [
+    """
     He Stole John Wick's Car, Sir, Uhhh ... and Killed His Dog 
+    """,
     """
-    asyncio.run(main(user_input=user_input))
-
-    user_input = """
     I could've had class. I could've been a contender.
     I could've been somebody, instead of a bum, which is what I am.
-    """
-    asyncio.run(main(user_input=user_input))
-
-
-
-
+    """,
+    ]
+    blocking = "--blocking" in sys.argv  # Wait for the guardrail before starting the message checker
+    asyncio.run(main(user_inputs=user_inputs, blocking=blocking))  # One event loop for both messages
@@ -1,33 +1,114 @@
 # Import necessary classes and functions from the agents package
 from agents import Agent, Runner
-from agents import OpenAIChatCompletionsModel, AsyncOpenAI, trace, function_tool
+from agents import trace, function_tool
 import asyncio  # For running asynchronous code
+import functools
 from dotenv import load_dotenv  # For loading environment variables from a .env file
-from typing import Any  # For type annotations
+from typing import Any, NamedTuple  # For type annotations
 import httpx  # For making async HTTP requests
+import importlib.util
+import os
+import time
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.model_factory import get_agents_model as get_model, aclose_clients  # Shared, pooled model clients
+from shared.tracing import instrument_agents  # Local span file alongside the SDK traces when TRACE_PATH is set
 
 # Load environment variables from .env file
 load_dotenv()
+instrument_agents()
 
-# Base URL for the National Weather Service API
-NWS_API_BASE = "https://api.weather.gov"
+# Base URL for the National Weather Service API (override with NWS_API_BASE to point at a local stub server)
+NWS_API_BASE = os.getenv("NWS_API_BASE", "https://api.weather.gov")
 # User-Agent string required by the NWS API
 USER_AGENT = "weather-app/1.0"
+# Seconds a cached response is served without asking the NWS API again
+NWS_CACHE_TTL = float(os.getenv("NWS_CACHE_TTL", "60"))
+
+
+# Cached NWS response with the validators needed for conditional requests
+class NWSCacheEntry(NamedTuple):
+    fetched_at: float
+    etag: str | None
+    last_modified: str | None
+    data: dict[str, Any]
+
+
+_nws_client: httpx.AsyncClient | None = None  # Pooled, keep-alive client shared by every request
+_nws_cache: dict[str, NWSCacheEntry] = {}  # URL -> last response
+_nws_inflight: dict[str, asyncio.Task] = {}  # URL -> request already on the wire
+
+
+def get_nws_client() -> httpx.AsyncClient:
+    """Return the module-level NWS client, creating it on first use (HTTP/2 when the h2 package is installed)."""
+    global _nws_client
+    if _nws_client is None or _nws_client.is_closed:
+        _nws_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            headers={
+                "User-Agent": USER_AGENT,  # Required by NWS API
+                "Accept": "application/geo+json"  # Request GeoJSON response
+            },
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+            timeout=30.0,
+        )
+    return _nws_client
+
+
+async def close_nws_client() -> None:
+    """Close the pooled NWS client (its connections are bound to the running event loop)."""
+    global _nws_client
+    if _nws_client is not None:
+        await _nws_client.aclose()
+        _nws_client = None
+    _nws_inflight.clear()
+
+
+async def _fetch_nws(url: str, cached: NWSCacheEntry | None) -> dict[str, Any] | None:
+    # Send a conditional request when we have validators, so an unchanged payload costs a 304 and no body
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    try:
+        response = await get_nws_client().get(url, headers=headers)  # Make async GET request
+        if response.status_code == 304 and cached is not None:
+            _nws_cache[url] = cached._replace(fetched_at=time.monotonic())  # Payload unchanged, refresh the TTL
+            return cached.data
+        response.raise_for_status()  # Raise error for bad status
+        data = response.json()  # Parse JSON
+        _nws_cache[url] = NWSCacheEntry(
+            time.monotonic(), response.headers.get("ETag"), response.headers.get("Last-Modified"), data
+        )
+        return data
+    except Exception:
+        return None  # Return None on any error
+
+
+def _forget_inflight(url: str, task: asyncio.Task) -> None:
+    # Only drop our own entry: after close_nws_client() a newer request for the same URL may be registered
+    if _nws_inflight.get(url) is task:
+        del _nws_inflight[url]
+
 
 # Make an async request to the NWS API with error handling
 async def make_nws_request(url: str) -> dict[str, Any] | None:
-    """Make a request to the NWS API with proper error handling."""
-    headers = {
-        "User-Agent": USER_AGENT,  # Required by NWS API
-        "Accept": "application/geo+json"  # Request GeoJSON response
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=30.0)  # Make async GET request
-            response.raise_for_status()  # Raise error for bad status
-            return response.json()  # Return parsed JSON
-        except Exception:
-            return None  # Return None on any error
+    """Make a request to the NWS API with proper error handling, caching and request coalescing."""
+    cached = _nws_cache.get(url)
+    if cached is not None and time.monotonic() - cached.fetched_at < NWS_CACHE_TTL:
+        return cached.data  # Fresh enough, no network round-trip
+
+    # Identical lookups that arrive while a request is in flight share its result
+    task = _nws_inflight.get(url)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_nws(url, cached))
+        _nws_inflight[url] = task
+        task.add_done_callback(functools.partial(_forget_inflight, url))
+    return await asyncio.shield(task)
 
 # Format a single alert feature into a readable string
 def format_alert(feature: dict) -> str:
@@ -48,7 +129,7 @@ async def get_alerts(state: str) -> str:
     Args:
         state: Two-letter US state code (e.g. CA, NY)
     """
-    url = f"{NWS_API_BASE}/alerts/active/area/{state}"  # Build API URL for state
+    url = f"{NWS_API_BASE}/alerts/active/area/{state.strip().upper()}"  # Build API URL for state
     data = await make_nws_request(url)  # Fetch data from NWS API
     if not data or "features" not in data:
         return "Unable to fetch alerts or no alerts found."
@@ -57,18 +138,6 @@ async def get_alerts(state: str) -> str:
     alerts = [format_alert(feature) for feature in data["features"]]  # Format each alert
     return "\n---\n".join(alerts)  # Join alerts with separator
 
-# Get a model instance for either local LLM (Ollama) or GPT
-def get_model(model_name="llama"):
-    if model_name == "llama":
-        # Create AsyncOpenAI client for local Ollama server
-        external_client = AsyncOpenAI(base_url="http://localhost:11434/v1", api_key="not-needed")
-        # Wrap client in OpenAIChatCompletionsModel for compatibility
-        model = OpenAIChatCompletionsModel(openai_client=external_client, model="llama3.2:1b")
-    elif model_name == "gpt":
-        # Use GPT model identifier
-        model = "gpt-4o-mini"
-    return model
-
 # System prompt for the weather reporter agent
 SYSTEM_PROMPT = """
 You are a weather reporter. You are responsible for reporting the weather alerts for a given state.
@@ -78,18 +147,30 @@ You have access to the following tools:
 You will be given a state. You will use the get_alerts tool to get the weather alerts for the state.
 """
 
+# Weather reporter agent, created once and reused by every run
+weather_reporter = Agent(
+    name="Weather Reporter",  # Name of the agent
+    instructions=SYSTEM_PROMPT,  # System prompt for the agent
+    model=get_model(model_name="gpt"),  # GPT model
+    tools=[get_alerts]  # Register the get_alerts tool
+)
+
+# Run the weather reporter on one input; clients stay open so runner.py can send many inputs on one loop
+async def handle(user_input: str) -> str:
+    result = await Runner.run(weather_reporter, user_input)  # Run the agent with user input
+    return result.final_output
+
+# Close this script's own clients (runner.py calls it once, after the last input)
+async def aclose():
+    await close_nws_client()  # Release the pooled NWS connections
+
 # Main function to run the weather reporter agent
 async def main(user_input: str):
-    model = get_model(model_name="gpt")  # Get the GPT model
-    weather_reporter = Agent(
-        name="Weather Reporter",  # Name of the agent
-        instructions=SYSTEM_PROMPT,  # System prompt for the agent
-        model=model,  # Model to use
-        tools=[get_alerts]  # Register the get_alerts tool
-    )
-    
-    result = await Runner.run(weather_reporter, user_input)  # Run the agent with user input
-    print(f"\nResult from weather_reporter: \n {result.final_output} \n {'*' * 100}")  # Print the result
+    output = await handle(user_input)
+    print(f"\nResult from weather_reporter: \n {output} \n {'*' * 100}")  # Print the result
+
+    await aclose()
+    await aclose_clients()  # Release pooled connections before the event loop closes
 
 
 # Entry point for running the script directly
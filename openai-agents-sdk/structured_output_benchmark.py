@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")  # The guardrail script builds its clients at import
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Make the repo-level shared package importable
+from shared.structured_output import StructuredOutputError, compile_schema
+from single_agent_stucturedoutput_gaurdrails import InappropriateMessageCheckOutput, NameCheckOutput
+
+# This script measures the structured-output layer offline, on the output models of the guardrail script and,
+# when crewai is installed, of the stock analyzer crew (fed with its saved outputs in crewai_stock_analyzer/output).
+# - Parse: strict fast path, and the incremental parser fed in token-sized chunks as a stream would be
+# - Repair: each near-miss variant of every payload, repaired locally; the time is compared with an LLM retry.
+#   Truncated outputs are only repaired when the cut falls in an optional field: a value cut off mid-way is dropped
+# - Early abort: how much of a broken output had streamed when the incremental parser rejected it
+
+STOCK_ANALYZER = Path(__file__).resolve().parents[1] / "crewai" / "crewai_stock_analyzer"
+
+
+def load_payloads() -> list[tuple[object, str]]:
+    """(compiled schema, clean JSON output) pairs."""
+    payloads = [
+        (compile_schema(NameCheckOutput), json.dumps({"is_name_in_message": True, "message": "The name Sarah is in the message. She introduces herself at the end."})),
+        (compile_schema(NameCheckOutput), json.dumps({"is_name_in_message": False, "message": "No name was found in the message. It only mentions a meeting time."})),
+        (compile_schema(InappropriateMessageCheckOutput), json.dumps(
+            {"is_message_inappropriate": False, "message": "This is a quote from the film On the Waterfront, not abuse."})),
+    ]
+    try:
+        sys.path.append(str(STOCK_ANALYZER / "src"))
+        from crewai_stock_analyzer.crew import TrendingCompanyList, TrendingCompanyResearchList
+    except ImportError:
+        print("crewai is not installed: the stock analyzer outputs are skipped")
+        return payloads
+    for model, name in [(TrendingCompanyList, "trending_companies.json"), (TrendingCompanyResearchList, "research_report.json")]:
+        payloads.append((compile_schema(model), (STOCK_ANALYZER / "output" / name).read_text(encoding="utf-8").strip()))
+    return payloads
+
+
+# Near misses seen in LLM output, each derived from a clean payload
+VARIANTS = {
+    "fenced + prose": lambda text, schema: f"Here is the result:\n```json\n{text}\n```\nLet me know if you need more.",
+    "trailing commas": lambda text, schema: text.replace("}", ",}").replace("]", ",]"),
+    "python repr": lambda text, schema: repr(json.loads(text)),  # Single quotes, True/False/None
+    "unquoted keys": lambda text, schema: re.sub(r'"(\w+)":', r"\1:", text),
+    "missing commas": lambda text, schema: re.sub(r'(["\d\]}el]),\s*"', r'\1\n"', text),
+    "raw newlines": lambda text, schema: text.replace(". ", ".\n"),
+    "truncated": lambda text, schema: text[:int(len(text) * 0.8)],
+    "bare list": lambda text, schema: json.dumps(next(iter(json.loads(text).values()))) if schema.root.list_field else None,
+}
+
+
+def corrupt(text: str) -> tuple[str, int]:
+    """Output with a token no repair can fix half-way through, and that position."""
+    values = [match.end() - 1 for match in re.finditer(r'":\s*"', text)]  # Where string values start
+    position = next((p for p in values if p >= len(text) // 2), values[-1])
+    return text[:position] + "<see above>" + text[position:], position
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def try_repair(schema, broken: str) -> None:
+    try:
+        schema.repair(broken)
+    except StructuredOutputError:
+        pass  # Rejected (e.g. a required field cut off mid-value): the framework re-asks the model
+
+
+def feed_stream(schema, text: str, chunk: int = 4) -> str:
+    parser = schema.stream()
+    for i in range(0, len(text), chunk):  # About one token per chunk
+        parser.feed(text[i:i + chunk])
+    return parser.close()
+
+
+def main(repeat: int, retry_latency: float):
+    payloads = load_payloads()
+    total_chars = sum(len(text) for _, text in payloads)
+
+    print(f"Parse ({len(payloads)} payloads, {total_chars} characters, mean of {repeat} runs)")
+    strict = sum(timed(lambda: schema.model.model_validate_json(text), repeat) for schema, text in payloads)
+    streamed = sum(timed(lambda: feed_stream(schema, text), repeat) for schema, text in payloads)
+    print(f"  {'strict (pydantic)':<24}{strict / len(payloads) * 1e6:>10.1f} us/output{total_chars / strict / 1e6:>10.2f} MB/s")
+    print(f"  {'incremental, 4-char chunks':<24}{streamed / len(payloads) * 1e6:>10.1f} us/output{total_chars / streamed / 1e6:>10.2f} MB/s")
+
+    print(f"\nRepair (compared with an LLM retry of {retry_latency:.1f}s)")
+    print(f"  {'variant':<18}{'repaired':>10}{'us/output':>12}")
+    repaired = attempts = 0
+    repair_seconds = 0.0
+    for name, variant in VARIANTS.items():
+        cases = [(schema, broken) for schema, text in payloads if (broken := variant(text, schema)) not in (None, text)]
+        if not cases:
+            continue
+        ok = 0
+        for schema, broken in cases:
+            try:
+                schema.model.model_validate_json(broken)
+                raise AssertionError(f"{name} variant is valid JSON already")
+            except ValueError:
+                pass
+            try:
+                schema.parse(broken)
+                ok += 1
+            except StructuredOutputError:
+                pass
+        seconds = sum(timed(lambda: try_repair(schema, broken), repeat) for schema, broken in cases)
+        print(f"  {name:<18}{f'{ok}/{len(cases)}':>10}{seconds / len(cases) * 1e6:>12.1f}")
+        repaired, attempts, repair_seconds = repaired + ok, attempts + len(cases), repair_seconds + seconds
+    print(f"  {attempts} near misses, {repaired} repaired locally: {repaired * retry_latency:.1f}s of LLM retries avoided"
+          f" for {repair_seconds * 1000:.2f}ms of repair")
+
+    print("\nEarly abort (unrecoverable token half-way through the output)")
+    for schema, text in payloads:
+        broken, bad_at = corrupt(text)
+        parser = schema.stream()
+        try:
+            for i in range(0, len(broken), 4):
+                parser.feed(broken[i:i + 4])
+            print(f"  {schema.name}: not detected")
+        except StructuredOutputError:
+            print(f"  {schema.name:<32} rejected after {parser.position}/{len(broken)} characters "
+                  f"({parser.position / len(broken):.0%} streamed, bad token at {bad_at})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse, repair and early-abort benchmark of the structured-output layer")
+    parser.add_argument("--repeat", type=int, default=2000, help="Runs per measurement")
+    parser.add_argument("--retry-latency", type=float, default=2.0, help="Seconds an LLM retry would take")
+    args = parser.parse_args()
+    main(args.repeat, args.retry_latency)
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import threading
+from typing import Any
+
+from shared.search import SearchCache
+
+# This module is a prompt-prefix stabilization layer and a local response cache for model clients.
+# - Prefix stabilization: system prompts are dedented and stripped, tools are sent in name order, and OpenAI
+#   requests carry a prompt_cache_key per (model, system prompt, tools), so every turn of an agent sends the
+#   same leading tokens and provider-side (OpenAI) or local-server (Ollama, llama.cpp) prefix caching applies
+# - Response cache: answers are stored under a hash of the normalized (model, system, messages, tools, options);
+#   a repeated request (e.g. re-running the same research task) is answered locally, with zero token usage
+# - Identical requests in flight at the same time share one model call
+# - Metrics: hit rate, tokens saved, and how much of each request's message list repeats the previous request
+#   of the same agent (the part a prefix cache can reuse)
+# The cache reuses the TTL + LRU store of shared/search.py, in memory and optionally in a SQLite file.
+
+
+def _digest(data: Any) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _normalize(value: Any) -> Any:
+    # Trailing whitespace and indentation of the whole text do not change what the model is asked
+    if isinstance(value, str):
+        return "\n".join(line.rstrip() for line in inspect.cleandoc(value).splitlines())
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+
+def request_key(model: str, system: list[str], messages: list[dict], tools: list[dict], **options) -> str:
+    """Cache key of a model request: normalized system prompts, messages and tools, plus model and options."""
+    return _digest({"model": model, "system": _normalize(system), "messages": _normalize(messages),
+                    "tools": sorted(tools, key=lambda tool: tool.get("name", "")), "options": options})
+
+
+class LLMResponseCache:
+    """Local cache of model responses, shared by every wrapped client of the process, with hit-rate metrics."""
+
+    def __init__(self, store: SearchCache | None = None, enabled: bool = True):
+        self.store = store if store is not None else SearchCache(ttl=7 * 24 * 3600.0)
+        self.enabled = enabled
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "saved_prompt_tokens": 0, "saved_completion_tokens": 0,
+                      "messages": 0, "prefix_messages": 0}
+        self._last_request: dict[str, list[str]] = {}  # First message digest -> message digests of the last request
+        self._inflight: dict[tuple[int, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self) -> float:
+        answered = self.stats["hits"] + self.stats["coalesced"] + self.stats["misses"]
+        return (self.stats["hits"] + self.stats["coalesced"]) / answered if answered else 0.0
+
+    @property
+    def prefix_reuse(self) -> float:
+        """Share of sent messages that repeat, in order, the start of the previous request of the same agent."""
+        return self.stats["prefix_messages"] / self.stats["messages"] if self.stats["messages"] else 0.0
+
+    def note_prefix(self, message_digests: list[str]) -> None:
+        # Requests are grouped by their first message (the agent's system prompt)
+        if not message_digests:
+            return
+        with self._lock:
+            previous = self._last_request.get(message_digests[0], [])
+            shared = 0
+            for a, b in zip(previous, message_digests):
+                if a != b:
+                    break
+                shared += 1
+            self._last_request[message_digests[0]] = message_digests
+            self.stats["messages"] += len(message_digests)
+            self.stats["prefix_messages"] += shared
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"LLM cache: {s['hits']} hits, {s['coalesced']} coalesced, {s['misses']} misses "
+                f"(hit rate {self.hit_rate:.0%}), saved {s['saved_prompt_tokens']} prompt + "
+                f"{s['saved_completion_tokens']} completion tokens; prefix reuse {self.prefix_reuse:.0%}")
+
+    # Framework adapters
+    def as_autogen_client(self, client):
+        """AutoGen ChatCompletionClient that stabilizes prompt prefixes and answers repeated requests from the cache."""
+        from autogen_core.models import ChatCompletionClient, CreateResult, RequestUsage, SystemMessage
+        from autogen_core.tools import Tool
+
+        cache = self
+        model = getattr(client, "_raw_config", {}).get("model") or type(client).__name__
+        routing = _supports_prompt_cache_key(client)
+
+        def prepare(messages, tools, tool_choice, json_output, extra_create_args):
+            # Same system prompt text and tool order on every turn, so the request prefix never changes
+            messages = [SystemMessage(content=inspect.cleandoc(m.content)) if isinstance(m, SystemMessage) else m
+                        for m in messages]
+            schemas = {(tool.schema if isinstance(tool, Tool) else tool)["name"]: tool for tool in tools}
+            tools = [schemas[name] for name in sorted(schemas)]
+            dumped = [m.model_dump(mode="json") for m in messages]
+            system = [m["content"] for m in dumped if m["type"] == "SystemMessage"]
+            tool_schemas = [tool.schema if isinstance(tool, Tool) else tool for tool in tools]
+            if isinstance(json_output, type):
+                json_output = json_output.model_json_schema()
+            key = request_key(model, system, [m for m in dumped if m["type"] != "SystemMessage"], tool_schemas,
+                              tool_choice=tool_choice if isinstance(tool_choice, str) else tool_choice.name,
+                              json_output=json_output, extra_create_args=dict(extra_create_args))
+            if routing and "prompt_cache_key" not in extra_create_args:
+                # Routes requests with the same prefix to the same OpenAI cache; not part of the response key
+                extra_create_args = {**extra_create_args,
+                                     "prompt_cache_key": _digest([model, system, sorted(schemas)])[:32]}
+            cache.note_prefix([_digest(m) for m in dumped])
+            return messages, tools, extra_create_args, key
+
+        def lookup(key: str):
+            if not cache.enabled:
+                return None
+            stored = cache.store.get(key)
+            if stored is None:
+                return None
+            result = CreateResult.model_validate_json(stored)
+            cache.stats["hits"] += 1
+            cache.stats["saved_prompt_tokens"] += result.usage.prompt_tokens
+            cache.stats["saved_completion_tokens"] += result.usage.completion_tokens
+            return result.model_copy(update={"cached": True, "usage": RequestUsage(prompt_tokens=0, completion_tokens=0)})
+
+        def remember(key: str, result) -> None:
+            if cache.enabled and not result.cached:
+                cache.store.set(key, result.model_dump_json())
+
+        class CachedChatCompletionClient(ChatCompletionClient):
+            """Wraps one model client; any number of wrappers share the cache."""
+
+            async def create(self, messages, *, tools=[], tool_choice="auto", json_output=None, extra_create_args={},
+                             cancellation_token=None):
+                messages, tools, extra_create_args, key = prepare(messages, tools, tool_choice, json_output,
+                                                                  extra_create_args)
+                cached = lookup(key)
+                if cached is not None:
+                    return cached
+
+                async def fetch():
+                    result = await client.create(messages, tools=tools, tool_choice=tool_choice,
+                                                 json_output=json_output, extra_create_args=extra_create_args,
+                                                 cancellation_token=cancellation_token)
+                    remember(key, result)
+                    return result
+
+                if not cache.enabled:
+                    cache.stats["misses"] += 1
+                    return await fetch()
+                # In-flight requests are tracked per event loop, since futures cannot be awaited across loops
+                inflight_key = (id(asyncio.get_running_loop()), key)
+                task = cache._inflight.get(inflight_key)
+                if task is None:
+                    cache.stats["misses"] += 1
+                    task = asyncio.ensure_future(fetch())
+                    cache._inflight[inflight_key] = task
+                    task.add_done_callback(lambda _: cache._inflight.pop(inflight_key, None))
+                    return await asyncio.shield(task)
+                cache.stats["coalesced"] += 1
+                result = await asyncio.shield(task)
+                return result.model_copy(update={"cached": True,
+                                                 "usage": RequestUsage(prompt_tokens=0, completion_tokens=0)})
+
+            async def create_stream(self, messages, *, tools=[], tool_choice="auto", json_output=None,
+                                    extra_create_args={}, cancellation_token=None):
+                messages, tools, extra_create_args, key = prepare(messages, tools, tool_choice, json_output,
+                                                                  extra_create_args)
+                cached = lookup(key)
+                if cached is not None:
+                    if isinstance(cached.content, str) and cached.content:
+                        yield cached.content  # The whole answer as one chunk
+                    yield cached
+                    return
+                cache.stats["misses"] += 1
+                async for item in client.create_stream(messages, tools=tools, tool_choice=tool_choice,
+                                                       json_output=json_output, extra_create_args=extra_create_args,
+                                                       cancellation_token=cancellation_token):
+                    if isinstance(item, CreateResult):
+                        remember(key, item)
+                    yield item
+
+            async def close(self) -> None:
+                pass  # The wrapped client is shared: shared.model_factory.aclose_clients() closes it
+
+            def actual_usage(self):
+                return client.actual_usage()
+
+            def total_usage(self):
+                return client.total_usage()
+
+            def count_tokens(self, messages, *, tools=[]) -> int:
+                return client.count_tokens(messages, tools=tools)
+
+            def remaining_tokens(self, messages, *, tools=[]) -> int:
+                return client.remaining_tokens(messages, tools=tools)
+
+            @property
+            def capabilities(self):
+                return client.capabilities
+
+            @property
+            def model_info(self):
+                return client.model_info
+
+        return CachedChatCompletionClient()
+
+
+def _supports_prompt_cache_key(client) -> bool:
+    # Only OpenAI's chat-completions clients accept prompt_cache_key (newer openai packages only)
+    try:
+        from autogen_ext.models.openai import BaseOpenAIChatCompletionClient
+        from openai.types.chat.completion_create_params import CompletionCreateParamsBase
+    except ImportError:
+        return False
+    return isinstance(client, BaseOpenAIChatCompletionClient) and "prompt_cache_key" in CompletionCreateParamsBase.__annotations__
+
+
+_cache: LLMResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """
+    Return the process-wide model response cache, so every agent shares it.
+    LLM_CACHE_TTL (seconds), LLM_CACHE_SIZE (entries; 0 turns the response cache off, prefix stabilization stays)
+    and LLM_CACHE_PATH (SQLite file, so a re-run in a new process is answered from the cache) configure it.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            size = int(os.getenv("LLM_CACHE_SIZE", "4096"))
+            store = SearchCache(
+                max_entries=size,
+                ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+                path=os.getenv("LLM_CACHE_PATH") or None,
+                table="llm_cache",
+            )
+            _cache = LLMResponseCache(store=store, enabled=size > 0)
+    return _cache
@@ -0,0 +1,197 @@
+import asyncio
+import atexit
+import os
+import threading
+from typing import Any, Callable
+
+import httpx  # Installed with every framework (openai, ollama and litellm all depend on it)
+
+# This module is the single place where model clients are created for all four frameworks
+# (OpenAI Agents SDK, LangGraph/LangChain, AutoGen and CrewAI).
+# Clients are cached by (provider, model, base_url) and share pooled keep-alive HTTP connections,
+# so building an agent no longer pays for a new client, TCP connection and TLS handshake.
+# Framework packages are imported lazily, so each framework's environment only needs its own dependencies.
+
+# Base URLs for the local Ollama server (native API and OpenAI-compatible API); override with OLLAMA_URL
+OLLAMA_NATIVE_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_BASE_URL = f"{OLLAMA_NATIVE_URL}/v1"
+
+# Short model names used across the examples, mapped to the provider model identifiers
+MODELS = {
+    "gpt": "gpt-4o-mini",
+    "gpt-4o-mini": "gpt-4o-mini",
+    "llama": "llama3.2:1b",
+}
+
+# Connection pool settings shared by every HTTP client created here
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+_clients: dict[tuple[str, str, str | None], Any] = {}
+_http_clients: dict[tuple[str, str | None], httpx.Client | httpx.AsyncClient] = {}
+_lock = threading.RLock()  # Re-entrant: client builders fetch pooled HTTP clients under the same lock
+
+
+def _resolve(model_name: str) -> str:
+    if model_name not in MODELS:
+        raise ValueError(f"Unknown model name: {model_name}. Expected one of {sorted(MODELS)}")
+    return MODELS[model_name]
+
+
+def _cached(provider: str, model: str, base_url: str | None, build: Callable[[], Any]) -> Any:
+    # Return the cached client for this key, building it only on first use
+    key = (provider, model, base_url)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = build()
+            _clients[key] = client
+    return client
+
+
+def get_http_client(base_url: str | None = None) -> httpx.Client:
+    """Return a pooled, keep-alive synchronous HTTP client shared by every model client for base_url."""
+    key = ("sync", base_url)
+    with _lock:
+        client = _http_clients.get(key)
+        if client is None:
+            client = httpx.Client(limits=POOL_LIMITS, timeout=HTTP_TIMEOUT)
+            _http_clients[key] = client
+    return client
+
+
+def get_async_http_client(base_url: str | None = None) -> httpx.AsyncClient:
+    """Return a pooled, keep-alive asynchronous HTTP client shared by every model client for base_url."""
+    key = ("async", base_url)
+    with _lock:
+        client = _http_clients.get(key)
+        if client is None:
+            client = httpx.AsyncClient(limits=POOL_LIMITS, timeout=HTTP_TIMEOUT)
+            _http_clients[key] = client
+    return client
+
+
+# OpenAI Agents SDK
+def get_agents_model(model_name: str = "llama"):
+    """
+    Returns a model for an OpenAI Agents SDK Agent.
+    - If 'llama', returns the local Ollama model wrapped for OpenAI compatibility (cached, pooled client).
+    - If 'gpt', returns the string identifier for the GPT model (the SDK reuses its default client).
+    """
+    model = _resolve(model_name)
+    if model_name == "llama":
+        from agents import AsyncOpenAI, OpenAIChatCompletionsModel
+
+        def build():
+            external_client = AsyncOpenAI(
+                base_url=OLLAMA_BASE_URL,
+                api_key="not-needed",
+                http_client=get_async_http_client(OLLAMA_BASE_URL),
+            )
+            return OpenAIChatCompletionsModel(openai_client=external_client, model=model)
+
+        return _cached("agents", model, OLLAMA_BASE_URL, build)
+    return model
+
+
+# LangChain / LangGraph
+def get_langchain_llm(model_name: str):
+    """Returns a cached LangChain chat model for the given model name."""
+    model = _resolve(model_name)
+    if model_name == "llama":
+        from langchain_ollama import ChatOllama
+
+        return _cached("langchain", model, OLLAMA_NATIVE_URL,
+                       lambda: ChatOllama(model=model, base_url=OLLAMA_NATIVE_URL))
+
+    from langchain_openai import ChatOpenAI
+
+    return _cached("langchain", model, None,
+                   lambda: ChatOpenAI(model=model,
+                                      http_client=get_http_client(),
+                                      http_async_client=get_async_http_client()))
+
+
+# AutoGen
+def get_autogen_model_client(model_name: str):
+    """Returns a cached AutoGen chat completion client for the given model name."""
+    model = _resolve(model_name)
+    if model_name == "llama":
+        from autogen_ext.models.ollama import OllamaChatCompletionClient
+
+        return _cached("autogen", model, OLLAMA_NATIVE_URL,
+                       lambda: OllamaChatCompletionClient(model=model, host=OLLAMA_NATIVE_URL))
+
+    from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+    return _cached("autogen", model, None, lambda: OpenAIChatCompletionClient(model=model))
+
+
+# CrewAI
+def get_crewai_llm(model_name: str = "gpt"):
+    """Returns a cached CrewAI LLM for the given model name (LiteLLM keeps the HTTP connections pooled)."""
+    model = _resolve(model_name)
+    from crewai import LLM
+
+    if model_name == "llama":
+        return _cached("crewai", model, OLLAMA_NATIVE_URL,
+                       lambda: LLM(model=f"ollama/{model}", base_url=OLLAMA_NATIVE_URL))
+    return _cached("crewai", model, None, lambda: LLM(model=f"openai/{model}"))
+
+
+# Shutdown
+def _underlying_client(client: Any) -> Any:
+    # Agents SDK models keep their AsyncOpenAI client on a private attribute
+    return getattr(client, "_client", None) or getattr(client, "openai_client", None)
+
+
+async def aclose_clients() -> None:
+    """
+    Close every cached async client and its pooled connections.
+    Call this at the end of an asyncio entry point: async connections are bound to the event loop
+    that opened them, so closing here also lets a later asyncio.run() start with fresh clients.
+    """
+    with _lock:
+        clients = list(_clients.items())
+        http_clients = list(_http_clients.items())
+        for key, _ in clients:
+            # Drop every client that holds async connections (LangChain's ChatOpenAI holds the shared async pool)
+            if key[0] in ("agents", "autogen", "langchain"):
+                del _clients[key]
+        for key, _ in http_clients:
+            if key[0] == "async":
+                del _http_clients[key]
+
+    for key, client in clients:
+        if key[0] == "autogen":
+            await client.close()
+        elif key[0] == "agents":
+            openai_client = _underlying_client(client)
+            if openai_client is not None:
+                await openai_client.close()
+    for key, http_client in http_clients:
+        if key[0] == "async":
+            await http_client.aclose()
+
+
+def close_clients() -> None:
+    """Close every cached client at interpreter shutdown."""
+    with _lock:
+        sync_clients = [c for k, c in _http_clients.items() if k[0] == "sync"]
+        has_async = any(k[0] == "async" for k in _http_clients) or any(
+            k[0] in ("agents", "autogen") for k in _clients)
+
+    for http_client in sync_clients:
+        http_client.close()
+    if has_async:
+        try:
+            asyncio.run(aclose_clients())
+        except Exception:
+            pass  # Connections bound to an already closed event loop are dropped by the OS on exit
+
+    with _lock:
+        _clients.clear()
+        _http_clients.clear()
+
+
+atexit.register(close_clients)
@@ -0,0 +1,280 @@
+import asyncio
+import concurrent.futures
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from shared.model_factory import get_async_http_client, get_http_client
+
+# This module is the single web-search backend (Google Serper) shared by LangGraph, AutoGen and CrewAI.
+# - Native async path plus a sync path for frameworks that call tools synchronously
+# - Request coalescing: identical in-flight queries share one HTTP call
+# - Query-normalized result cache with TTL and LRU eviction, in memory and optionally on disk (SQLite)
+# - One adapter per framework, so every agent in a process shares the same cache and connection pool
+
+# Override with SERPER_URL to point at a local stub server (shared/stub_server.py)
+SERPER_URL = os.getenv("SERPER_URL", "https://google.serper.dev/search")
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings share a cache entry."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def format_results(results: dict, k: int = 10) -> str:
+    """Turn a Serper JSON response into the same plain-text snippets GoogleSerperAPIWrapper.run returns."""
+    snippets = []
+    answer_box = results.get("answerBox")
+    if answer_box:
+        answer = answer_box.get("answer") or answer_box.get("snippet") or answer_box.get("snippetHighlighted")
+        if answer:
+            return answer if isinstance(answer, str) else " ".join(answer)
+
+    knowledge_graph = results.get("knowledgeGraph")
+    if knowledge_graph:
+        title = knowledge_graph.get("title")
+        if knowledge_graph.get("type"):
+            snippets.append(f"{title}: {knowledge_graph['type']}.")
+        if knowledge_graph.get("description"):
+            snippets.append(knowledge_graph["description"])
+        for attribute, value in knowledge_graph.get("attributes", {}).items():
+            snippets.append(f"{title} {attribute}: {value}.")
+
+    for result in results.get("organic", [])[:k]:
+        if "snippet" in result:
+            snippets.append(result["snippet"])
+        for attribute, value in result.get("attributes", {}).items():
+            snippets.append(f"{attribute}: {value}.")
+
+    if not snippets:
+        return "No good Google Search Result was found"
+    return " ".join(snippets)
+
+
+class SearchCache:
+    """
+    TTL + LRU cache of search results (or any strings), optionally persisted to a table of a SQLite file.
+    The table is pruned when it is opened and every prune_every writes: expired rows, then the oldest rows past
+    max_entries, are deleted.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, path: str | None = None,
+                 table: str = "search_cache", prune_every: int = 100):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.table = table
+        self.prune_every = prune_every
+        self._writes = 0
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()  # key -> (created_at, value)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT, created_at REAL)"
+            )
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_created_at ON {table} (created_at)")
+            self._prune()
+            self._db.commit()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)  # Mark as most recently used
+                    return entry[1]
+                del self._entries[key]
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                return None
+            self._remember(key, row[1], row[0])  # Promote the disk hit into memory
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, now),
+                )
+                self._writes += 1
+                if self._writes % self.prune_every == 0:
+                    self._prune()
+                self._db.commit()
+
+    def _prune(self) -> None:
+        # Keeps the file bounded: max_entries and ttl apply on disk as well as in memory
+        self._db.execute(f"DELETE FROM {self.table} WHERE created_at <= ?", (time.time() - self.ttl,))
+        self._db.execute(
+            f"DELETE FROM {self.table} WHERE key IN "
+            f"(SELECT key FROM {self.table} ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def _remember(self, key: str, created_at: float, value: str) -> None:
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)  # Evict the least recently used entry
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class SearchBackend:
+    """Cached, coalescing Serper web search with sync and async entry points."""
+
+    def __init__(self, api_key: str | None = None, cache: SearchCache | None = None, k: int = 10,
+                 url: str = SERPER_URL):
+        self.api_key = api_key or os.getenv("SERPER_API_KEY", "")
+        self.cache = cache if cache is not None else SearchCache()
+        self.k = k
+        self.url = url
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+        self._sync_inflight: dict[str, concurrent.futures.Future] = {}
+        self._async_inflight: dict[tuple[int, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def _request(self, query: str) -> tuple[dict, dict]:
+        headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
+        return headers, {"q": query, "num": self.k}
+
+    def search(self, query: str) -> str:
+        """Run a search synchronously (LangChain Tool func, CrewAI _run)."""
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        with self._lock:
+            future = self._sync_inflight.get(key)
+            owner = future is None
+            if owner:
+                future = concurrent.futures.Future()
+                self._sync_inflight[key] = future
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return future.result()  # Another thread is already fetching this query
+
+        try:
+            headers, payload = self._request(query)
+            response = get_http_client(self.url).post(self.url, headers=headers, json=payload)
+            response.raise_for_status()
+            result = format_results(response.json(), self.k)
+            self.cache.set(key, result)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._sync_inflight.pop(key, None)
+
+    async def asearch(self, query: str) -> str:
+        """Run a search asynchronously (LangChain Tool coroutine, AutoGen FunctionTool)."""
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        # In-flight requests are tracked per event loop, since futures cannot be awaited across loops
+        inflight_key = (id(asyncio.get_running_loop()), key)
+        task = self._async_inflight.get(inflight_key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = asyncio.ensure_future(self._afetch(query, key))
+            self._async_inflight[inflight_key] = task
+            task.add_done_callback(lambda _: self._async_inflight.pop(inflight_key, None))
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def _afetch(self, query: str, key: str) -> str:
+        headers, payload = self._request(query)
+        response = await get_async_http_client(self.url).post(self.url, headers=headers, json=payload)
+        response.raise_for_status()
+        result = format_results(response.json(), self.k)
+        self.cache.set(key, result)
+        return result
+
+    async def abatch(self, queries: list[str]) -> list[str]:
+        """Run several searches concurrently; duplicates share one request."""
+        return list(await asyncio.gather(*(self.asearch(query) for query in queries)))
+
+    # Framework adapters
+    def as_langchain_tool(self, name: str = "search",
+                          description: str = "Useful for when you need more information from an online search"):
+        """LangChain Tool with both sync and async paths (LangGraph ToolNode, LangChainToolAdapter)."""
+        from langchain_core.tools import Tool
+
+        return Tool(name=name, func=self.search, coroutine=self.asearch, description=description)
+
+    def as_autogen_tool(self, name: str = "internet_search", description: str = "Tool for searching on internet"):
+        """AutoGen FunctionTool that calls the async path directly."""
+        from autogen_core.tools import FunctionTool
+
+        async def internet_search(query: str) -> str:
+            return await self.asearch(query)
+
+        return FunctionTool(internet_search, description=description, name=name)
+
+    def as_crewai_tool(self, name: str = "Search the internet",
+                       description: str = "A tool that can be used to search the internet with a search_query."):
+        """CrewAI BaseTool taking the same search_query argument as SerperDevTool."""
+        from crewai.tools import BaseTool
+        from pydantic import BaseModel, Field
+
+        backend = self
+
+        class SearchToolInput(BaseModel):
+            """Input schema for the cached search tool."""
+            search_query: str = Field(..., description="Mandatory search query you want to use to search the internet")
+
+        class CachedSearchTool(BaseTool):
+            args_schema: type[BaseModel] = SearchToolInput
+
+            def _run(self, search_query: str) -> str:
+                return backend.search(search_query)
+
+        return CachedSearchTool(name=name, description=description)
+
+
+_backend: SearchBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend() -> SearchBackend:
+    """
+    Return the process-wide search backend, so every agent shares one cache.
+    SEARCH_CACHE_TTL (seconds), SEARCH_CACHE_SIZE (entries) and SEARCH_CACHE_PATH (SQLite file) configure the cache.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            cache = SearchCache(
+                max_entries=int(os.getenv("SEARCH_CACHE_SIZE", "1024")),
+                ttl=float(os.getenv("SEARCH_CACHE_TTL", "3600")),
+                path=os.getenv("SEARCH_CACHE_PATH") or None,
+            )
+            _backend = SearchBackend(cache=cache)
+    return _backend
+
@@ -0,0 +1,458 @@
+import functools
+import json
+import re
+from typing import Any
+
+from pydantic import BaseModel, ValidationError
+
+# This module is the structured-output layer shared by the Agents SDK and CrewAI examples.
+# - Each Pydantic output model is compiled once (compile_schema) into a small tree of expected value kinds
+# - IncrementalParser checks streamed JSON as it arrives, so a wrong value type, an unknown key (for models
+#   that forbid extras) or broken syntax is reported at the first bad character, not after the full generation
+# - The same parser repairs common near-misses locally, instead of paying for an LLM retry:
+#   prose or ``` fences around the JSON, trailing or missing commas, single quotes, unquoted keys,
+#   Python literals (True/False/None), raw newlines in strings, output cut off mid-object, and a bare list
+#   for a model whose only field is that list. A value cut off mid-way is never accepted: it is dropped, so only
+#   an optional field survives the cut (with its default); a missing required field fails the repair
+# - One adapter per framework: an Agents SDK output schema and a CrewAI converter that repair before retrying
+
+# Value kinds a field of each JSON-schema type accepts (Pydantic lax mode coerces "3" to 3 and "true" to True)
+_ALLOWED = {
+    "string": {"string"},
+    "number": {"number", "string"},
+    "integer": {"number", "string"},
+    "boolean": {"boolean", "number", "string"},
+    "object": {"object"},
+    "array": {"array"},
+    "null": {"null"},
+}
+_ANY_KIND = {"string", "number", "boolean", "object", "array", "null"}
+
+# Kind of a value, from its first character
+_START_KIND = {"{": "object", "[": "array", '"': "string", "'": "string", "-": "number", "+": "number", ".": "number",
+               "t": "boolean", "f": "boolean", "T": "boolean", "F": "boolean", "n": "null", "N": "null",
+               **{digit: "number" for digit in "0123456789"}}
+_LITERALS = {"true": "true", "True": "true", "false": "false", "False": "false", "null": "null", "None": "null"}
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+_WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+_JSON_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_STRING_RUN = {'"': re.compile(r'[^"\\\n\r]*'), "'": re.compile(r"[^'\\\n\r]*")}
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+
+class StructuredOutputError(ValueError):
+    """Output that cannot be turned into the model, even after local repair."""
+
+    def __init__(self, message: str, position: int | None = None):
+        super().__init__(message if position is None else f"{message} (at character {position})")
+        self.position = position
+
+
+class _Node:
+    """Compiled schema of one value: the kinds it accepts and, for objects and arrays, its children."""
+    __slots__ = ("allowed", "properties", "required", "closed", "items", "list_field")
+
+    def __init__(self, allowed=frozenset(_ANY_KIND), properties=None, required=frozenset(), closed=False, items=None):
+        self.allowed = allowed
+        self.properties: dict[str, "_Node"] | None = properties
+        self.required = required
+        self.closed = closed  # Unknown keys are an error (extra="forbid")
+        self.items: "_Node | None" = items
+        self.list_field = None  # Name of the only field, when it is a list (a bare list is wrapped into it)
+        if properties and len(properties) == 1:
+            (name, child), = properties.items()
+            if child.allowed == {"array"}:
+                self.list_field = name
+
+
+_ANY = _Node()
+
+
+def _compile_node(schema: dict, defs: dict) -> _Node:
+    if "$ref" in schema:
+        schema = defs[schema["$ref"].rsplit("/", 1)[-1]]
+    options = schema.get("anyOf") or schema.get("oneOf")
+    if options:
+        nodes = [_compile_node(option, defs) for option in options]
+        structured = [node for node in nodes if node.allowed != {"null"}]
+        base = structured[0] if len(structured) == 1 else _ANY  # Optional[X] keeps X's structure
+        return _Node(frozenset().union(*(n.allowed for n in nodes)), base.properties, base.required, base.closed, base.items)
+    types = schema.get("type")
+    if types is None:
+        return _ANY
+    types = [types] if isinstance(types, str) else types
+    allowed = frozenset().union(*(_ALLOWED.get(t, _ANY_KIND) for t in types))
+    properties = items = None
+    if "object" in types and "properties" in schema:
+        properties = {name: _compile_node(child, defs) for name, child in schema["properties"].items()}
+    if "array" in types and "items" in schema:
+        items = _compile_node(schema["items"], defs)
+    return _Node(allowed, properties, frozenset(schema.get("required", ())),
+                 schema.get("additionalProperties") is False, items)
+
+
+class _Frame:
+    __slots__ = ("kind", "node", "state", "count", "key", "seen", "mark")
+
+    def __init__(self, kind: str, node: _Node):
+        self.kind = kind  # "object" or "array"
+        self.node = node
+        self.state = "key" if kind == "object" else "value"
+        self.count = 0  # Members written so far
+        self.key: str | None = None
+        self.seen: set[str] = set()
+        self.mark = 0  # Output length before the current member, to drop it if the text is cut off
+
+
+class _Token:
+    __slots__ = ("kind", "role", "quote", "chars", "escape", "unicode")
+
+    def __init__(self, kind: str, role: str, quote: str = ""):
+        self.kind = kind  # "string", "number" or "word"
+        self.role = role  # "key" or "value"
+        self.quote = quote
+        self.chars: list[str] = []
+        self.escape = False
+        self.unicode: str | None = None  # Hex digits of a \uXXXX escape in progress
+
+
+class IncrementalParser:
+    """
+    Push parser for one JSON document checked against a compiled schema.
+    feed() raises StructuredOutputError at the first character that cannot lead to a valid document;
+    close() returns the document as canonical JSON, closing whatever a truncated output left open and dropping
+    the value it was cut off in.
+    """
+
+    def __init__(self, schema: "CompiledSchema"):
+        self.schema = schema
+        self.position = 0  # Characters consumed
+        self.started = False
+        self.done = False
+        self.truncated = False
+        self._out: list[str] = []
+        self._stack: list[_Frame] = []
+        self._token: _Token | None = None
+        self._suffix = ""  # Closes the object a bare list was wrapped into
+
+    # Input
+    def feed(self, chunk: str) -> None:
+        i, n = 0, len(chunk)
+        while i < n:
+            if self.done:
+                self.position += n - i  # Text after the document (closing fence, sign-off) is ignored
+                return
+            token = self._token
+            if token is not None:
+                if token.kind == "string":
+                    i = self._scan_string(chunk, i, token)
+                    continue
+                c = chunk[i]
+                if c in (_NUMBER_CHARS if token.kind == "number" else _WORD_CHARS):
+                    token.chars.append(c)
+                    i += 1
+                    self.position += 1
+                    continue
+                self._finish_token()
+                if self.done:
+                    continue
+            c = chunk[i]
+            if not self.started:
+                if c == "{" or c == "[":  # Anything before the document (prose, ```json) is skipped
+                    self.started = True
+                    self._value(c, self.schema.root, root=True)
+            elif not c.isspace():
+                self._char(c)
+            i += 1
+            self.position += 1
+
+    def close(self) -> str:
+        """Canonical JSON of the document; a cut-off output is closed after its last complete member."""
+        if not self.started:
+            raise StructuredOutputError("No JSON object found", self.position)
+        if self._token is not None:
+            # A value cut off mid-way (a string without its closing quote, a number that may have had more digits)
+            # is dropped, not closed: an optional field falls back to its default, a required one fails below
+            self.truncated = True
+            token, self._token = self._token, None
+            frame = self._stack[-1]
+            if token.role == "value":
+                self._drop_member(frame)
+            else:
+                del self._out[frame.mark:]  # A key cut off mid-way
+                frame.state = "next"
+        while self._stack:
+            self.truncated = True
+            frame = self._stack[-1]
+            if frame.kind == "object" and frame.state in ("colon", "value"):
+                self._drop_member(frame)  # A key whose value never arrived
+            if frame.kind == "object" and frame.node.required - frame.seen and len(self._stack) > 1:
+                self._stack.pop()
+                self._drop_member(self._stack[-1])  # An object cut off before its required fields
+                continue
+            self._close(frame)
+        return self.text()
+
+    def text(self) -> str:
+        return "".join(self._out)
+
+    def _drop_member(self, frame: _Frame) -> None:
+        del self._out[frame.mark:]
+        if frame.kind == "object":
+            frame.seen.discard(frame.key)
+        frame.state = "next"
+
+    def _fail(self, message: str):
+        raise StructuredOutputError(message, self.position)
+
+    # Structure
+    def _char(self, c: str) -> None:
+        frame = self._stack[-1]
+        state = frame.state
+        if frame.kind == "object":
+            if state == "key" or state == "next":
+                if c == "}":
+                    return self._close(frame)  # Also accepts a trailing comma
+                if state == "next" and c == ",":
+                    frame.state = "key"
+                    return
+                if c == '"' or c == "'" or c in _WORD_CHARS:  # Quoted or bare key; a missing comma is tolerated
+                    frame.mark = len(self._out)
+                    if frame.count:
+                        self._out.append(",")
+                    if c in _WORD_CHARS:
+                        self._token = _Token("word", "key")
+                        self._token.chars.append(c)
+                    else:
+                        self._token = _Token("string", "key", c)
+                    return
+                return self._fail(f"Expected a key or '}}', got {c!r}")
+            if state == "colon":
+                if c == ":":
+                    frame.state = "value"
+                    return
+                return self._fail(f"Expected ':' after key {frame.key!r}, got {c!r}")
+            return self._value(c, self._child(frame))
+        if c == "]" and (state == "value" or state == "next"):
+            return self._close(frame)
+        if state == "next":
+            if c == ",":
+                frame.state = "value"
+                return
+            if c not in "{[\"'":
+                return self._fail(f"Expected ',' or ']', got {c!r}")
+        frame.mark = len(self._out)
+        if frame.count:
+            self._out.append(",")
+        return self._value(c, frame.node.items or _ANY)
+
+    def _child(self, frame: _Frame) -> _Node:
+        properties = frame.node.properties
+        return properties.get(frame.key, _ANY) if properties else _ANY
+
+    def _value(self, c: str, node: _Node, root: bool = False) -> None:
+        kind = _START_KIND.get(c)
+        if kind is None:
+            return self._fail(f"Unexpected character {c!r}")
+        if kind not in node.allowed:
+            if root and kind == "array" and node.list_field:
+                self._out.append("{" + json.dumps(node.list_field) + ":")  # [...] for {"field": [...]}
+                self._suffix = "}"
+                node = node.properties[node.list_field]
+            else:
+                where = f"field {self._stack[-1].key!r}" if self._stack and self._stack[-1].kind == "object" else "value"
+                return self._fail(f"Expected {'/'.join(sorted(node.allowed))} for {where}, got {kind}")
+        if kind == "object" or kind == "array":
+            self._out.append(c)
+            self._stack.append(_Frame(kind, node))
+        elif kind == "string":
+            self._token = _Token("string", "value", c)
+        else:
+            self._token = _Token("number" if kind == "number" else "word", "value")
+            self._token.chars.append(c)
+
+    def _close(self, frame: _Frame) -> None:
+        if frame.kind == "object":
+            missing = frame.node.required - frame.seen
+            if missing:
+                return self._fail(f"Missing required field(s) {', '.join(sorted(missing))}")
+            self._out.append("}")
+        else:
+            self._out.append("]")
+        self._stack.pop()
+        self._member_done()
+
+    def _member_done(self) -> None:
+        if self._stack:
+            frame = self._stack[-1]
+            frame.count += 1
+            frame.state = "next"
+        else:
+            self._out.append(self._suffix)
+            self.done = True
+
+    # Tokens
+    def _scan_string(self, chunk: str, i: int, token: _Token) -> int:
+        n = len(chunk)
+        run = _STRING_RUN[token.quote]
+        while i < n:
+            c = chunk[i]
+            if token.unicode is not None:
+                token.unicode += c
+                if len(token.unicode) == 4:
+                    try:
+                        token.chars.append(chr(int(token.unicode, 16)))
+                    except ValueError:
+                        token.chars.append("\\u" + token.unicode)  # Not hex: keep the text as written
+                    token.unicode = None
+            elif token.escape:
+                token.escape = False
+                if c == "u":
+                    token.unicode = ""
+                else:
+                    token.chars.append(_ESCAPES.get(c, c))  # \" \' \\ \/ and unknown escapes keep the character
+            elif c == "\\":
+                token.escape = True
+            elif c == token.quote:
+                self.position += 1
+                self._finish_token()
+                return i + 1
+            elif c == "\n" or c == "\r":
+                token.chars.append(c)  # Raw newline inside a string: escaped on output
+            else:
+                end = run.match(chunk, i).end()
+                token.chars.append(chunk[i:end])
+                self.position += end - i
+                i = end
+                continue
+            i += 1
+            self.position += 1
+        return i
+
+    def _finish_token(self) -> None:
+        token, self._token = self._token, None
+        text = "".join(token.chars)
+        if token.kind == "string":
+            if any("\ud800" <= ch <= "\udfff" for ch in text):
+                text = text.encode("utf-16", "surrogatepass").decode("utf-16", "replace")  # Join \u surrogate pairs
+            if token.role == "key":
+                return self._key(text)
+            self._out.append(json.dumps(text, ensure_ascii=False))
+        elif token.role == "key":
+            return self._key(text)
+        elif token.kind == "number":
+            if not _JSON_NUMBER.fullmatch(text):
+                try:
+                    number = float(text)  # +1, .5, 1. and similar
+                except ValueError:
+                    return self._fail(f"Invalid number {text!r}")
+                text = json.dumps(int(number) if number.is_integer() and "." not in text and "e" not in text.lower() else number)
+            self._out.append(text)
+        else:
+            literal = _LITERALS.get(text)
+            if literal is None:
+                return self._fail(f"Unexpected word {text!r}")
+            self._out.append(literal)
+        self._member_done()
+
+    def _key(self, key: str) -> None:
+        frame = self._stack[-1]
+        properties = frame.node.properties
+        if frame.node.closed and properties is not None and key not in properties:
+            return self._fail(f"Unknown field {key!r}")
+        frame.key = key
+        frame.seen.add(key)
+        frame.state = "colon"
+        self._out.append(json.dumps(key, ensure_ascii=False) + ":")
+
+
+class CompiledSchema:
+    """A Pydantic output model compiled once: strict fast-path parsing, incremental checks and local repair."""
+
+    def __init__(self, model: type[BaseModel]):
+        self.model = model
+        self.name = model.__name__
+        json_schema = model.model_json_schema()
+        self.root = _compile_node(json_schema, json_schema.get("$defs", {}))
+        self.stats = {"clean": 0, "repaired": 0, "failed": 0, "aborted": 0}
+
+    def stream(self) -> IncrementalParser:
+        """New incremental parser for one streamed output."""
+        return IncrementalParser(self)
+
+    def repair(self, text: str) -> str:
+        """Canonical JSON for a near-miss output; raises StructuredOutputError if it cannot be repaired."""
+        parser = self.stream()
+        parser.feed(text)
+        return parser.close()
+
+    def parse(self, text: str) -> BaseModel:
+        """Validate output text as the model, repairing it locally when the strict parse fails."""
+        try:
+            result = self.model.model_validate_json(text)  # Pydantic's compiled validator: the common case
+            self.stats["clean"] += 1
+            return result
+        except ValidationError:
+            pass
+        try:
+            result = self.model.model_validate_json(self.repair(text))
+        except (StructuredOutputError, ValidationError) as e:
+            self.stats["failed"] += 1
+            raise e if isinstance(e, StructuredOutputError) else StructuredOutputError(str(e)) from e
+        self.stats["repaired"] += 1
+        return result
+
+    async def watch_agents_stream(self, streamed) -> Any:
+        """
+        Check a Runner.run_streamed result as its text arrives; the run is cancelled at the first bad character
+        and StructuredOutputError is raised, so a retry can start right away. Returns the final output.
+        """
+        parser = self.stream()
+        async for event in streamed.stream_events():
+            if event.type == "raw_response_event" and getattr(event.data, "type", "") == "response.output_text.delta":
+                try:
+                    parser.feed(event.data.delta)
+                except StructuredOutputError:
+                    streamed.cancel()  # Stop paying for tokens that will be thrown away
+                    self.stats["aborted"] += 1
+                    raise
+        return streamed.final_output
+
+    def as_agents_output_type(self):
+        """Agents SDK output schema: the SDK's own validation first, local repair instead of a failed run."""
+        from agents import AgentOutputSchema, ModelBehaviorError
+
+        compiled = self
+
+        class RepairingOutputSchema(AgentOutputSchema):
+            def validate_json(self, json_str: str) -> Any:
+                try:
+                    return super().validate_json(json_str)
+                except ModelBehaviorError:
+                    try:
+                        return compiled.parse(json_str)
+                    except StructuredOutputError as e:
+                        raise ModelBehaviorError(f"Invalid JSON for {compiled.name}: {e}") from e
+
+        return RepairingOutputSchema(self.model)
+
+    def as_crewai_converter(self):
+        """CrewAI converter class (Task converter_cls): local repair before the LLM conversion retries."""
+        from crewai.utilities.converter import Converter
+
+        compiled = self
+
+        class RepairingConverter(Converter):
+            def to_pydantic(self, current_attempt=1):
+                try:
+                    return compiled.parse(self.text)
+                except StructuredOutputError:
+                    return super().to_pydantic(current_attempt)
+
+        return RepairingConverter
+
+
+@functools.lru_cache(maxsize=None)
+def compile_schema(model: type[BaseModel]) -> CompiledSchema:
+    """The compiled schema of a model, built on first use and shared by every agent and task."""
+    return CompiledSchema(model)
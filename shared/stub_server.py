@@ -0,0 +1,435 @@
+import argparse
+import asyncio
+import itertools
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+import hashlib
+
+# This module is a local stand-in for the model and tool APIs the examples call, so every framework can be
+# benchmarked offline and deterministically.
+# - OpenAI chat completions (POST /v1/chat/completions, streamed or not, tool calls, json_schema output)
+# - Ollama (POST /api/chat, NDJSON streaming by default, GET /api/tags, POST /api/show)
+# - Serper search (POST /search) and the NWS alerts API (GET /alerts/active/area/{state}, with ETag and
+#   Last-Modified validators; a conditional request for an unchanged payload gets 304 Not Modified)
+# - Configurable latency (time to first token), token rate and a tool-call script: while tools are offered,
+#   the first `tool_rounds` answers of a user turn are tool calls, then the text reply
+# - CrewAI's text tool protocol (Action / Action Input / Final Answer) when the prompt asks for it
+# - Server-side stats (GET /stats, POST /stats/reset): requests, tokens and the seconds spent "in the model",
+#   so a benchmark can tell model time from framework overhead
+# Point the examples at it with the variables from stub_env(url):
+#   python -m shared.stub_server --port 8765 --latency 0.2 --tokens-per-s 50
+
+
+@dataclass
+class StubConfig:
+    latency: float = 0.2  # Seconds before the first token
+    tokens_per_s: float = 100.0  # Generation speed; 0 answers instantly
+    reply: str = "This is a stub reply from the local model server. It stands in for a real model answer."
+    tool_rounds: int = 1  # Tool-call answers per user turn when tools are offered
+    tool_calls: list[dict] = field(default_factory=list)  # [{"name": ..., "arguments": {...}}], one per round
+    tool_latency: float = 0.05  # Seconds per search or weather request
+
+    @classmethod
+    def from_file(cls, path: str) -> "StubConfig":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+
+def stub_env(base_url: str) -> dict[str, str]:
+    """Environment variables that point the OpenAI, Ollama, Serper and NWS clients at the stub server."""
+    return {
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "OPENAI_API_BASE": f"{base_url}/v1",  # LiteLLM (CrewAI)
+        "OPENAI_API_KEY": "sk-stub",
+        "OLLAMA_URL": base_url,
+        "SERPER_URL": f"{base_url}/search",
+        "SERPER_API_KEY": "stub",
+        "NWS_API_BASE": base_url,
+    }
+
+
+def split_tokens(text: str) -> list[str]:
+    """Word-sized pieces standing in for model tokens."""
+    return re.findall(r"\s*\S+", text) or [text]
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    return sum(len(str(m.get("content") or "")) for m in messages) // 4 + 1
+
+
+def sample_from_schema(schema: dict, defs: dict | None = None, text: str = "stub") -> object:
+    """A minimal instance of a JSON schema (structured output, tool arguments)."""
+    defs = defs if defs is not None else schema.get("$defs", schema.get("definitions", {}))
+    if "$ref" in schema:
+        return sample_from_schema(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, text)
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return sample_from_schema(options[0], defs, text)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type", "object")
+    kind = next((k for k in kind if k != "null"), "string") if isinstance(kind, list) else kind
+    if kind == "object":
+        return {name: sample_from_schema(child, defs, text) for name, child in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [sample_from_schema(schema["items"], defs, text)] if "items" in schema else []
+    return {"string": text, "integer": 1, "number": 1.0, "boolean": False, "null": None}.get(kind, text)
+
+
+class StubServer:
+    """OpenAI/Ollama-compatible stub model server (plus Serper and NWS stubs) on asyncio streams."""
+
+    def __init__(self, config: StubConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.host = host
+        self.port = port
+        self._ids = itertools.count(1)
+        self._server: asyncio.AbstractServer | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._connections: set[asyncio.Task] = set()
+        self._started_http = formatdate(usegmt=True)  # Last-Modified of the alerts payload
+        self.reset_stats()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def reset_stats(self) -> None:
+        self.stats = {"llm_requests": 0, "tool_requests": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                      "model_seconds": 0.0, "tool_seconds": 0.0, "errors": 0, "in_flight": 0, "peak_in_flight": 0,
+                      "not_modified": 0}
+
+    # Lifecycle
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # Port 0 picks a free port
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for task in self._connections:
+                task.cancel()  # Idle keep-alive connections would otherwise outlive the server
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> str:
+        """Run the server on its own event loop in a daemon thread; returns its base URL."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="stub-model-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    def stop_thread(self) -> None:
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = self._thread = None
+
+    # HTTP
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:  # Keep-alive: one connection serves many requests
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                await self._route(method, path.split("?", 1)[0], json.loads(body) if body else {}, writer, headers)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # Client went away, or the server is stopping
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _send(self, writer, status: int, body: bytes, content_type: str = "application/json",
+                    headers: dict[str, str] | None = None):
+        reason = {200: "OK", 304: "Not Modified", 404: "Not Found", 400: "Bad Request"}.get(status, "OK")
+        extra = "".join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n{extra}"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def _send_json(self, writer, payload, status: int = 200):
+        await self._send(writer, status, json.dumps(payload).encode())
+
+    async def _start_chunked(self, writer, content_type: str):
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nTransfer-Encoding: chunked\r\n\r\n".encode())
+        await writer.drain()
+
+    async def _chunk(self, writer, data: str):
+        payload = data.encode()
+        writer.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+        await writer.drain()
+
+    async def _end_chunked(self, writer):
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _route(self, method: str, path: str, body: dict, writer, headers: dict[str, str] | None = None):
+        if method == "POST" and path.endswith("/chat/completions"):
+            return await self._timed_llm(self._openai_chat(body, writer))
+        if method == "POST" and path == "/api/chat":
+            return await self._timed_llm(self._ollama_chat(body, writer))
+        if method == "POST" and path == "/search":
+            return await self._tool(writer, {"organic": [
+                {"title": f"Stub result {i}", "link": f"https://example.com/{i}",
+                 "snippet": f"Stub search result {i} for: {body.get('q', '')}"} for i in range(1, 4)]})
+        if method == "GET" and path.startswith("/alerts/active/area/"):
+            state = path.rsplit("/", 1)[-1]
+            return await self._tool(writer, {"features": [{"properties": {
+                "event": "Heat Advisory", "areaDesc": f"Stub county, {state}", "severity": "Moderate",
+                "description": "Stub alert from the local server.", "instruction": "None."}}]}, headers or {})
+        if method == "GET" and path == "/stats":
+            return await self._send_json(writer, self.stats)
+        if method == "POST" and path == "/stats/reset":
+            self.reset_stats()
+            return await self._send_json(writer, self.stats)
+        if method == "GET" and path.endswith("/models"):
+            return await self._send_json(writer, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        if method == "GET" and path == "/api/tags":
+            return await self._send_json(writer, {"models": [{"name": "stub", "model": "stub"}]})
+        if method == "POST" and path == "/api/show":
+            return await self._send_json(writer, {"modelfile": "", "parameters": "", "template": "",
+                                                  "details": {"family": "stub"}, "model_info": {},
+                                                  "capabilities": ["completion", "tools"]})
+        await self._send_json(writer, {"error": f"No stub for {method} {path}"}, status=404)
+
+    async def _timed_llm(self, handler):
+        self.stats["llm_requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+        started = time.perf_counter()
+        try:
+            await handler
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+            self.stats["model_seconds"] += time.perf_counter() - started
+
+    async def _tool(self, writer, payload: dict, request_headers: dict[str, str] | None = None):
+        self.stats["tool_requests"] += 1
+        started = time.perf_counter()
+        await asyncio.sleep(self.config.tool_latency)
+        self.stats["tool_seconds"] += time.perf_counter() - started
+        if request_headers is None:
+            return await self._send_json(writer, payload)
+        # Validators: the payload is deterministic, so its hash is a stable ETag and the server start its date
+        body = json.dumps(payload).encode()
+        validators = {"ETag": f'"{hashlib.sha1(body).hexdigest()[:16]}"', "Last-Modified": self._started_http}
+        if self._not_modified(request_headers, validators):
+            self.stats["not_modified"] += 1
+            return await self._send(writer, 304, b"", headers=validators)
+        await self._send(writer, 200, body, headers=validators)
+
+    @staticmethod
+    def _not_modified(request_headers: dict[str, str], validators: dict[str, str]) -> bool:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        if "if-none-match" in request_headers:
+            return validators["ETag"] in [tag.strip() for tag in request_headers["if-none-match"].split(",")]
+        if "if-modified-since" in request_headers:
+            try:
+                return parsedate_to_datetime(request_headers["if-modified-since"]) >= \
+                    parsedate_to_datetime(validators["Last-Modified"])
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    # Model behaviour
+    def _plan(self, messages: list[dict], tools: list[dict]) -> tuple[str | None, list[dict]]:
+        """(text, tool calls) for the next assistant message, following the tool-call script."""
+        last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+        user_text = str(messages[last_user].get("content") or "") if last_user >= 0 else ""
+        rounds = sum(1 for m in messages[last_user + 1:] if m.get("role") == "assistant" and m.get("tool_calls"))
+        react_tools = self._react_tools(messages) if not tools else None
+        if react_tools is not None:
+            observed = sum(1 for m in messages if m.get("role") == "assistant" and "Observation:" in str(m.get("content")))
+            if observed < self.config.tool_rounds and react_tools:
+                name, arguments = self._scripted_call(observed, react_tools, user_text)
+                return f"Thought: I need more information.\nAction: {name}\nAction Input: {json.dumps(arguments)}", []
+            return f"Thought: I now know the final answer\nFinal Answer: {self.config.reply}", []
+        if tools and rounds < self.config.tool_rounds:
+            offered = {tool["function"]["name"]: tool["function"].get("parameters", {}) for tool in tools}
+            name, arguments = self._scripted_call(rounds, offered, user_text)
+            return None, [{"id": f"call_{next(self._ids)}", "name": name, "arguments": arguments}]
+        return self.config.reply, []
+
+    def _scripted_call(self, round_index: int, offered: dict[str, dict], user_text: str) -> tuple[str, dict]:
+        script = self.config.tool_calls
+        if round_index < len(script) and script[round_index]["name"] in offered:
+            return script[round_index]["name"], script[round_index].get("arguments", {})
+        name, parameters = next(iter(offered.items()))  # Default: the first offered tool, arguments from its schema
+        return name, sample_from_schema(parameters or {"type": "object"}, text=user_text[:80] or "stub")
+
+    @staticmethod
+    def _react_tools(messages: list[dict]) -> dict[str, dict] | None:
+        # CrewAI's text protocol: "Action: ..., only one name of [Tool A, Tool B]" and "Final Answer:"
+        prompt = "\n".join(str(m.get("content") or "") for m in messages if m.get("role") in ("system", "user"))
+        if "Final Answer:" not in prompt:
+            return None
+        match = re.search(r"only one name of \[([^\]]*)\]", prompt)
+        names = [name.strip() for name in match.group(1).split(",") if name.strip()] if match else []
+        arguments = re.findall(r"'(\w+)': \{'description'", prompt)
+        schema = {"type": "object", "properties": {arg: {"type": "string"} for arg in arguments or ["search_query"]}}
+        return {name: schema for name in names}
+
+    def _content(self, text: str | None, response_format: dict | str | None) -> str | None:
+        # OpenAI response_format ({"type": "json_schema", ...}) or Ollama format ("json" or a schema)
+        if text is None or not response_format:
+            return text
+        schema = None
+        if isinstance(response_format, dict):
+            if response_format.get("type") == "text":
+                return text
+            if response_format.get("type") == "json_schema":
+                schema = response_format.get("json_schema", {}).get("schema")
+            elif "properties" in response_format:
+                schema = response_format
+        return json.dumps(sample_from_schema(schema, text=text) if schema else {"response": text})
+
+    async def _generate(self, pieces: list[str]):
+        """Yield pieces at the configured latency and token rate."""
+        await asyncio.sleep(self.config.latency)
+        rate = self.config.tokens_per_s
+        due = time.perf_counter()
+        for piece in pieces:
+            if rate > 0:
+                due += 1 / rate
+                delay = due - time.perf_counter()
+                if delay > 0.002:  # Sleep in steps of a few ms, not per token
+                    await asyncio.sleep(delay)
+            yield piece
+
+    # OpenAI chat completions
+    async def _openai_chat(self, body: dict, writer):
+        messages, model = body.get("messages", []), body.get("model", "stub")
+        text, calls = self._plan(messages, body.get("tools") or [])
+        text = self._content(text, body.get("response_format"))
+        pieces = split_tokens(text) if text else [json.dumps(c["arguments"]) for c in calls]
+        prompt_tokens = estimate_tokens(messages)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces),
+                 "total_tokens": prompt_tokens + len(pieces)}
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += len(pieces)
+        finish = "tool_calls" if calls else "stop"
+        completion_id, created = f"chatcmpl-stub-{next(self._ids)}", int(time.time())
+        tool_calls = [{"id": c["id"], "type": "function",
+                       "function": {"name": c["name"], "arguments": json.dumps(c["arguments"])}} for c in calls]
+
+        if not body.get("stream"):
+            async for _ in self._generate(pieces):
+                pass
+            message = {"role": "assistant", "content": text}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return await self._send_json(writer, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish, "logprobs": None}], "usage": usage})
+
+        def chunk(delta: dict, finish_reason=None, **extra) -> str:
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                       "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}], **extra}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        await self._start_chunked(writer, "text/event-stream")
+        await self._chunk(writer, chunk({"role": "assistant", "content": ""}))
+        async for piece in self._generate(pieces):
+            if text:
+                await self._chunk(writer, chunk({"content": piece}))
+        for index, call in enumerate(tool_calls):
+            await self._chunk(writer, chunk({"tool_calls": [{"index": index, **call}]}))
+        await self._chunk(writer, chunk({}, finish))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await self._chunk(writer, f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model, 'choices': [], 'usage': usage})}\n\n")
+        await self._chunk(writer, "data: [DONE]\n\n")
+        await self._end_chunked(writer)
+
+    # Ollama
+    async def _ollama_chat(self, body: dict, writer):
+        messages, model = body.get("messages", []), body.get("model", "stub")
+        text, calls = self._plan(messages, body.get("tools") or [])
+        text = self._content(text, body.get("format"))
+        pieces = split_tokens(text) if text else [json.dumps(c["arguments"]) for c in calls]
+        prompt_tokens = estimate_tokens(messages)
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += len(pieces)
+        started = time.perf_counter_ns()
+
+        def done(message: dict) -> dict:
+            return {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "message": message,
+                    "done": True, "done_reason": "stop", "total_duration": time.perf_counter_ns() - started,
+                    "prompt_eval_count": prompt_tokens, "eval_count": len(pieces)}
+
+        final = {"role": "assistant", "content": text if not body.get("stream", True) else ""}
+        if calls:
+            final["content"] = ""
+            final["tool_calls"] = [{"function": {"name": c["name"], "arguments": c["arguments"]}} for c in calls]
+
+        if not body.get("stream", True):  # Ollama streams unless asked not to
+            async for _ in self._generate(pieces):
+                pass
+            return await self._send_json(writer, done(final))
+
+        await self._start_chunked(writer, "application/x-ndjson")
+        async for piece in self._generate(pieces):
+            if text:
+                await self._chunk(writer, json.dumps({"model": model, "created_at": datetime.now(timezone.utc).isoformat(),
+                                                      "message": {"role": "assistant", "content": piece}, "done": False}) + "\n")
+        await self._chunk(writer, json.dumps(done(final)) + "\n")
+        await self._end_chunked(writer)
+
+
+async def main(args):
+    config = StubConfig.from_file(args.config) if args.config else StubConfig()
+    for name in ("latency", "tokens_per_s", "tool_rounds", "tool_latency"):
+        if getattr(args, name) is not None:
+            setattr(config, name, getattr(args, name))
+    server = StubServer(config, args.host, args.port)
+    await server.start()
+    print(f"Stub model server on {server.url}; point the examples at it with:")
+    for name, value in stub_env(server.url).items():
+        print(f"  export {name}={value}")
+    await asyncio.Event().wait()  # Serve until interrupted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI/Ollama-compatible stub model server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--config", help="JSON file with StubConfig fields (reply, tool_calls, ...)")
+    parser.add_argument("--latency", type=float, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-s", dest="tokens_per_s", type=float, help="Generation speed")
+    parser.add_argument("--tool-rounds", dest="tool_rounds", type=int, help="Tool-call answers per user turn")
+    parser.add_argument("--tool-latency", dest="tool_latency", type=float, help="Seconds per search/weather request")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
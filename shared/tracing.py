@@ -0,0 +1,671 @@
+import argparse
+import atexit
+import contextvars
+import itertools
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+# This module records where the time goes in a run of any of the four frameworks, in one local format.
+# - Spans: "run" (a graph run, agent workflow or crew kickoff), "node" (graph node), "agent" (agent turn),
+#   "task" (crew task), "llm" (model call, with token counts) and "tool" (tool call)
+# - Queue wait: time spent waiting for a concurrency slot (tool semaphore, server worker) is attached to the span
+#   that starts right after it, so a slow tool and a starved tool pool look different
+# - Head sampling: the sample/no-sample decision is made once per trace at its root span, so a sampled trace is
+#   always complete and an unsampled one costs one context-variable lookup per span. LangGraph graphs decide
+#   before the callback handler is attached: an unsampled run executes the bare graph, with no callback events
+# - Output: JSON lines, one span per line, buffered and appended to TRACE_PATH (flushed at exit)
+# - Adapters: a LangChain callback handler (LangGraph), a trace processor (OpenAI Agents SDK),
+#   model client/agent/tool wrappers (AutoGen) and an event-bus listener (CrewAI)
+# Tracing is off unless TRACE_PATH is set; TRACE_SAMPLE_RATE (0..1, default 1) samples traces. Summarize with:
+#   python -m shared.tracing trace.jsonl
+
+SPAN_KINDS = ("run", "node", "agent", "task", "llm", "tool")
+
+_ID_PREFIX = os.urandom(3).hex()  # Keeps ids unique when several processes append to one file
+_ids = itertools.count(1)
+
+
+def _new_id() -> str:
+    return f"{_ID_PREFIX}-{next(_ids):x}"
+
+
+class Span:
+    """One timed operation; recorded when end() is called (or when its `with tracer.span(...)` block exits)."""
+
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "kind", "name", "start", "_started",
+                 "queue_ms", "input_tokens", "output_tokens", "attrs", "_ended")
+
+    def __init__(self, tracer: "Tracer", trace_id: str, parent_id: str | None, kind: str, name: str, attrs: dict):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+        self.queue_ms = 0.0
+        self.input_tokens = self.output_tokens = None
+        self._ended = False
+        self.start = time.time()
+        self._started = time.perf_counter()
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def set_tokens(self, input_tokens: int | None, output_tokens: int | None) -> None:
+        self.input_tokens, self.output_tokens = input_tokens, output_tokens
+
+    def end(self, error: BaseException | str | None = None) -> None:
+        if self._ended:
+            return
+        self._ended = True
+        record = {"trace": self.trace_id, "span": self.span_id, "parent": self.parent_id, "kind": self.kind,
+                  "name": self.name, "start": round(self.start, 6),
+                  "ms": round((time.perf_counter() - self._started) * 1000, 3)}
+        if self.queue_ms:
+            record["queue_ms"] = round(self.queue_ms, 3)
+        if self.input_tokens is not None or self.output_tokens is not None:
+            record["input_tokens"], record["output_tokens"] = self.input_tokens, self.output_tokens
+        if error is not None:
+            record["error"] = error if isinstance(error, str) else repr(error)
+        if self.attrs:
+            record["attrs"] = self.attrs
+        self.tracer._write(record)
+
+
+class _NoopSpan:
+    """Stands in for spans that are not recorded: tracing is off, or the trace was not sampled."""
+
+    __slots__ = ()
+    trace_id = span_id = None
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def set_tokens(self, input_tokens: int | None, output_tokens: int | None) -> None:
+        pass
+
+    def end(self, error: BaseException | str | None = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+_CURRENT = object()  # start_span(parent=...) default: the span active in this context
+_current_span: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+_queue_wait: contextvars.ContextVar[float] = contextvars.ContextVar("trace_queue_wait", default=0.0)
+_head_sampled: contextvars.ContextVar[bool] = contextvars.ContextVar("trace_head_sampled", default=False)
+
+
+def current_span() -> Span | _NoopSpan | None:
+    """The span active in this context (asyncio task or thread), if any."""
+    return _current_span.get()
+
+
+def note_queue_wait(seconds: float) -> None:
+    """Record a wait for a concurrency slot; the next span started in this context carries it as queue_ms."""
+    _queue_wait.set(seconds)
+
+
+class _Scope:
+    """`with tracer.span(...)`: makes the span current for the block, so spans started inside are its children."""
+
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span):
+        self.span = span
+
+    def __enter__(self):
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _current_span.reset(self._token)
+        self.span.end(error=exc)
+        return False
+
+
+async def _traced_agen(tracer: "Tracer", kind: str, name: str, make_agen, on_item=None, is_last=None):
+    """Wrap an async generator in a span that is current while the generator runs (and only then)."""
+    span = tracer.start_span(kind, name)
+    agen = make_agen()
+    try:
+        while True:
+            token = _current_span.set(span)
+            try:
+                item = await agen.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                _current_span.reset(token)
+            if on_item is not None:
+                on_item(span, item)
+            if is_last is not None and is_last(item):
+                span.end()  # Callers often stop iterating at the final item (AssistantAgent.on_messages does)
+            yield item
+    except GeneratorExit:
+        span.end()
+        await agen.aclose()
+        raise
+    except BaseException as e:
+        span.end(error=e)
+        raise
+    span.end()
+
+
+class Tracer:
+    """Creates spans and appends finished ones to a JSON-lines file; a tracer without a path records nothing."""
+
+    def __init__(self, path: str | None = None, sample_rate: float = 1.0, buffer_size: int = 512):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+        self._buffer: list[dict] = []
+        self._lock = threading.Lock()
+        self._langchain_callback = None
+        self._agents_processor = None
+        self._crewai_listener = None
+        if path:
+            atexit.register(self.flush)
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def start_span(self, kind: str, name: str, parent=_CURRENT, **attrs) -> Span | _NoopSpan:
+        """Start a span under parent (default: the current span); a span without a parent starts a new trace."""
+        if self.path is None:
+            return NOOP_SPAN
+        if parent is _CURRENT:
+            parent = _current_span.get()
+        if parent is NOOP_SPAN:
+            return NOOP_SPAN  # Inside an unsampled trace
+        if parent is None:
+            if not _head_sampled.get() and not self.sample():
+                return NOOP_SPAN
+            span = Span(self, _new_id(), None, kind, name, attrs)
+        else:
+            span = Span(self, parent.trace_id, parent.span_id, kind, name, attrs)
+        wait = _queue_wait.get()
+        if wait:
+            span.queue_ms = wait * 1000
+            _queue_wait.set(0.0)
+        return span
+
+    def sample(self) -> bool:
+        """Head sampling decision for a new trace."""
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def span(self, kind: str, name: str, **attrs):
+        """Context manager: `with tracer.span("tool", "search") as span: ...`."""
+        if self.path is None:
+            return NOOP_SPAN
+        return _Scope(self.start_span(kind, name, **attrs))
+
+    def _write(self, record: dict) -> None:
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.buffer_size:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        records, self._buffer = self._buffer, []
+        if records:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records))
+
+    def flush(self) -> None:
+        """Append the buffered spans to the file."""
+        if self.path is None:
+            return
+        with self._lock:
+            self._flush_locked()
+
+    # LangChain / LangGraph
+    def as_langchain_callback(self):
+        """Callback handler recording graph runs, nodes, LLM calls and tool calls (one handler per tracer)."""
+        if self._langchain_callback is not None:
+            return self._langchain_callback
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        tracer = self
+
+        class TracingCallbackHandler(BaseCallbackHandler):
+            run_inline = True  # Called in the caller's context, so current spans and queue waits are visible
+
+            def __init__(self):
+                self._spans = {}  # run_id -> span recorded for that run
+                self._passthrough = {}  # run_id -> parent span, for internal runnables that get no span
+
+            def _parent(self, parent_run_id):
+                if parent_run_id is None:
+                    return _CURRENT
+                return self._spans.get(parent_run_id) or self._passthrough.get(parent_run_id) or _CURRENT
+
+            def _start(self, run_id, parent_run_id, kind: str, name: str) -> None:
+                self._spans[run_id] = tracer.start_span(kind, name, parent=self._parent(parent_run_id))
+
+            def _end(self, run_id, error=None) -> None:
+                span = self._spans.pop(run_id, None)
+                if span is not None:
+                    span.end(error=error)
+                else:
+                    self._passthrough.pop(run_id, None)
+
+            def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+                name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+                if parent_run_id is None:
+                    self._start(run_id, None, "run", name)
+                    return
+                parent = self._parent(parent_run_id)
+                if parent is _CURRENT:
+                    parent = _current_span.get()
+                # A node runs as a task wrapping the node's runnable; both carry the node name, one span is enough
+                if metadata and metadata.get("langgraph_node") == name and getattr(parent, "name", None) != name:
+                    self._spans[run_id] = tracer.start_span("node", name, parent=parent)
+                else:
+                    self._passthrough[run_id] = parent
+
+            def on_chain_end(self, outputs, *, run_id, **kwargs):
+                self._end(run_id)
+
+            def on_chain_error(self, error, *, run_id, **kwargs):
+                self._end(run_id, error)
+
+            def _model_name(self, serialized, metadata, kwargs) -> str:
+                return ((metadata or {}).get("ls_model_name") or kwargs.get("invocation_params", {}).get("model")
+                        or (serialized or {}).get("name") or "llm")
+
+            def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+                self._start(run_id, parent_run_id, "llm", self._model_name(serialized, metadata, kwargs))
+
+            def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+                self._start(run_id, parent_run_id, "llm", self._model_name(serialized, metadata, kwargs))
+
+            def on_llm_end(self, response, *, run_id, **kwargs):
+                span = self._spans.get(run_id)
+                if span is not None and span is not NOOP_SPAN:
+                    usage = (response.llm_output or {}).get("token_usage")
+                    if usage:
+                        span.set_tokens(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+                    else:
+                        message = getattr(response.generations[0][0], "message", None) if response.generations else None
+                        usage = getattr(message, "usage_metadata", None)
+                        if usage:
+                            span.set_tokens(usage.get("input_tokens"), usage.get("output_tokens"))
+                self._end(run_id)
+
+            def on_llm_error(self, error, *, run_id, **kwargs):
+                self._end(run_id, error)
+
+            def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+                self._start(run_id, parent_run_id, "tool", (serialized or {}).get("name") or kwargs.get("name") or "tool")
+
+            def on_tool_end(self, output, *, run_id, **kwargs):
+                self._end(run_id)
+
+            def on_tool_error(self, error, *, run_id, **kwargs):
+                self._end(run_id, error)
+
+        self._langchain_callback = TracingCallbackHandler()
+        return self._langchain_callback
+
+    # OpenAI Agents SDK
+    def as_agents_processor(self):
+        """Trace processor mapping Agents SDK traces and spans to this tracer (one processor per tracer)."""
+        if self._agents_processor is not None:
+            return self._agents_processor
+        from agents.tracing import TracingProcessor
+
+        tracer = self
+        kinds = {"agent": "agent", "function": "tool", "generation": "llm", "response": "llm"}
+        passthrough = {"task", "turn"}  # A whole Runner.run and one model turn: the trace and agent spans cover them
+
+        class AgentsTraceProcessor(TracingProcessor):
+            def __init__(self):
+                self._spans = {}  # SDK trace or span id -> span
+                self._passthrough = {}  # SDK span id -> parent span, for wrappers that get no span of their own
+
+            def on_trace_start(self, trace) -> None:
+                self._spans[trace.trace_id] = tracer.start_span("run", trace.name)
+
+            def on_trace_end(self, trace) -> None:
+                span = self._spans.pop(trace.trace_id, None)
+                if span is not None:
+                    span.end()
+
+            def on_span_start(self, span) -> None:
+                data = span.span_data
+                parent = (self._spans.get(span.parent_id) or self._passthrough.get(span.parent_id)
+                          or self._spans.get(span.trace_id) or _CURRENT)
+                if data.type in passthrough:
+                    self._passthrough[span.span_id] = parent
+                    return
+                name = getattr(data, "name", None) or getattr(data, "model", None) or data.type
+                # Handoffs, guardrails and custom spans keep the SDK's own type as their kind
+                self._spans[span.span_id] = tracer.start_span(kinds.get(data.type, data.type), name, parent=parent)
+
+            def on_span_end(self, span) -> None:
+                ours = self._spans.pop(span.span_id, None)
+                if ours is None or ours is NOOP_SPAN:
+                    self._passthrough.pop(span.span_id, None)
+                    return
+                data = span.span_data
+                usage = getattr(data, "usage", None)
+                response = getattr(data, "response", None)
+                if response is not None:
+                    ours.name = response.model or ours.name
+                    if not usage and response.usage is not None:
+                        usage = {"input_tokens": response.usage.input_tokens, "output_tokens": response.usage.output_tokens}
+                if usage:
+                    ours.set_tokens(usage.get("input_tokens"), usage.get("output_tokens"))
+                ours.end(error=(span.error or {}).get("message"))
+
+            def shutdown(self) -> None:
+                tracer.flush()
+
+            def force_flush(self) -> None:
+                tracer.flush()
+
+        self._agents_processor = AgentsTraceProcessor()
+        return self._agents_processor
+
+    # CrewAI
+    def as_crewai_listener(self):
+        """Registers handlers on the CrewAI event bus for crew, task, agent, LLM and tool events (once per tracer)."""
+        if self._crewai_listener is not None:
+            return self._crewai_listener
+        from crewai.utilities.events import (
+            AgentExecutionCompletedEvent, AgentExecutionErrorEvent, AgentExecutionStartedEvent,
+            CrewKickoffCompletedEvent, CrewKickoffFailedEvent, CrewKickoffStartedEvent,
+            LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent,
+            TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent,
+            ToolUsageErrorEvent, ToolUsageFinishedEvent, ToolUsageStartedEvent, crewai_event_bus,
+        )
+
+        tracer = self
+        starts = {CrewKickoffStartedEvent: "run", TaskStartedEvent: "task", AgentExecutionStartedEvent: "agent",
+                  LLMCallStartedEvent: "llm", ToolUsageStartedEvent: "tool"}
+        ends = {CrewKickoffCompletedEvent: "run", CrewKickoffFailedEvent: "run", TaskCompletedEvent: "task",
+                TaskFailedEvent: "task", AgentExecutionCompletedEvent: "agent", AgentExecutionErrorEvent: "agent",
+                LLMCallCompletedEvent: "llm", LLMCallFailedEvent: "llm", ToolUsageFinishedEvent: "tool",
+                ToolUsageErrorEvent: "tool"}
+
+        def event_name(kind: str, source, event) -> str:
+            if kind == "run":
+                return getattr(event, "crew_name", None) or "crew"
+            if kind == "task":
+                task = getattr(event, "task", None) or source
+                return getattr(task, "name", None) or str(getattr(task, "description", "task"))[:60]
+            if kind == "agent":
+                return str(getattr(getattr(event, "agent", None), "role", "agent")).strip()
+            if kind == "tool":
+                return getattr(event, "tool_name", None) or "tool"
+            return str(getattr(event, "model", None) or getattr(source, "model", None) or "llm")
+
+        class CrewAIListener:
+            def __init__(self):
+                self._open = defaultdict(list)  # (kind, thread) -> stack of (span, context token); events nest
+
+            def on_start(self, kind: str, source, event) -> None:
+                span = tracer.start_span(kind, event_name(kind, source, event))
+                self._open[kind, threading.get_ident()].append((span, _current_span.set(span)))
+
+            def on_end(self, kind: str, source, event) -> None:
+                stack = self._open.get((kind, threading.get_ident()))
+                if not stack:
+                    return
+                span, token = stack.pop()
+                try:
+                    _current_span.reset(token)
+                except ValueError:
+                    pass  # Started in another context; nothing to restore here
+                usage = getattr(getattr(event, "output", None), "token_usage", None)  # Crew totals on kickoff
+                if usage is not None:
+                    span.set_tokens(getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None))
+                span.end(error=getattr(event, "error", None))
+
+        listener = CrewAIListener()
+        for event_type, kind in starts.items():
+            crewai_event_bus.on(event_type)(lambda source, event, kind=kind: listener.on_start(kind, source, event))
+        for event_type, kind in ends.items():
+            crewai_event_bus.on(event_type)(lambda source, event, kind=kind: listener.on_end(kind, source, event))
+        self._crewai_listener = listener
+        return listener
+
+
+_tracer: Tracer | None = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer, configured from TRACE_PATH and TRACE_SAMPLE_RATE (off when TRACE_PATH is unset)."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(path=os.getenv("TRACE_PATH") or None,
+                             sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")))
+    return _tracer
+
+
+class _SampledGraph:
+    """A compiled graph whose runs are sampled before callbacks are attached; other attributes are the graph's."""
+
+    def __init__(self, graph, tracer: Tracer):
+        self.graph = graph
+        self.traced = graph.with_config(callbacks=[tracer.as_langchain_callback()])
+        self.tracer = tracer
+
+    def _enter(self):
+        # Inside a trace the parent decided; a new trace is sampled here, once, so an unsampled run never
+        # pays for LangChain callback dispatch
+        parent = _current_span.get()
+        if parent is not None:
+            return (self.graph if parent is NOOP_SPAN else self.traced), None, None
+        if self.tracer.sample():
+            return self.traced, _head_sampled, _head_sampled.set(True)
+        return self.graph, _current_span, _current_span.set(NOOP_SPAN)
+
+    def invoke(self, *args, **kwargs):
+        graph, var, token = self._enter()
+        try:
+            return graph.invoke(*args, **kwargs)
+        finally:
+            if var is not None:
+                var.reset(token)
+
+    async def ainvoke(self, *args, **kwargs):
+        graph, var, token = self._enter()
+        try:
+            return await graph.ainvoke(*args, **kwargs)
+        finally:
+            if var is not None:
+                var.reset(token)
+
+    def stream(self, *args, **kwargs):
+        graph, var, token = self._enter()
+        try:
+            yield from graph.stream(*args, **kwargs)
+        finally:
+            if var is not None:
+                var.reset(token)
+
+    async def astream(self, *args, **kwargs):
+        graph, var, token = self._enter()
+        try:
+            async for chunk in graph.astream(*args, **kwargs):
+                yield chunk
+        finally:
+            if var is not None:
+                var.reset(token)
+
+    def __getattr__(self, name):
+        return getattr(self.traced, name)
+
+
+def instrument_graph(graph, tracer: Tracer | None = None):
+    """A compiled LangGraph graph that reports its runs, nodes, LLM and tool calls (the graph itself when off)."""
+    tracer = tracer or get_tracer()
+    if not tracer.enabled:
+        return graph
+    if tracer.sample_rate >= 1.0:
+        return graph.with_config(callbacks=[tracer.as_langchain_callback()])
+    return _SampledGraph(graph, tracer)
+
+
+def instrument_agents(tracer: Tracer | None = None) -> None:
+    """Send Agents SDK traces to this tracer as well as to the SDK's own exporter."""
+    tracer = tracer or get_tracer()
+    if not tracer.enabled or tracer._agents_processor is not None:
+        return
+    from agents import add_trace_processor, set_trace_processors, set_tracing_disabled
+
+    if os.getenv("OPENAI_AGENTS_DISABLE_TRACING", "false").lower() in ("true", "1"):
+        # SDK tracing is switched off to keep traces from being uploaded: record them locally only
+        set_trace_processors([tracer.as_agents_processor()])
+        set_tracing_disabled(False)
+    else:
+        add_trace_processor(tracer.as_agents_processor())
+
+
+def instrument_autogen_client(client, tracer: Tracer | None = None):
+    """Record every create()/create_stream() of an AutoGen model client as an llm span with token usage."""
+    tracer = tracer or get_tracer()
+    if not tracer.enabled or getattr(client, "_traced", False):
+        return client  # Model clients are shared: wrap each one once
+    model = getattr(client, "_raw_config", {}).get("model") or type(client).__name__
+    create, create_stream = client.create, client.create_stream
+
+    def record_usage(span, result) -> None:
+        usage = getattr(result, "usage", None)
+        if usage is not None:
+            span.set_tokens(usage.prompt_tokens, usage.completion_tokens)
+
+    async def traced_create(*args, **kwargs):
+        with tracer.span("llm", model) as span:
+            result = await create(*args, **kwargs)
+            record_usage(span, result)
+            return result
+
+    def traced_create_stream(*args, **kwargs):
+        return _traced_agen(tracer, "llm", model, lambda: create_stream(*args, **kwargs), on_item=record_usage)
+
+    client.create, client.create_stream, client._traced = traced_create, traced_create_stream, True
+    return client
+
+
+def instrument_autogen_agent(agent, tracer: Tracer | None = None):
+    """Record every turn of an AutoGen chat agent (alone or in a team) as an agent span."""
+    tracer = tracer or get_tracer()
+    if not tracer.enabled:
+        return agent
+    from autogen_agentchat.base import Response
+
+    on_messages_stream = agent.on_messages_stream
+
+    def traced_on_messages_stream(*args, **kwargs):
+        return _traced_agen(tracer, "agent", agent.name, lambda: on_messages_stream(*args, **kwargs),
+                            is_last=lambda item: isinstance(item, Response))
+
+    agent.on_messages_stream = traced_on_messages_stream
+    return agent
+
+
+def instrument_autogen_tools(tools: list, tracer: Tracer | None = None) -> list:
+    """Record every run of these AutoGen tools as a tool span."""
+    tracer = tracer or get_tracer()
+    if not tracer.enabled:
+        return tools
+    for tool in tools:
+        if getattr(tool, "_traced", False):
+            continue
+
+        async def traced_run_json(*args, _run_json=tool.run_json, _name=tool.name, **kwargs):
+            with tracer.span("tool", _name):
+                return await _run_json(*args, **kwargs)
+
+        tool.run_json, tool._traced = traced_run_json, True
+    return tools
+
+
+def instrument_crewai(tracer: Tracer | None = None) -> None:
+    """Record crew kickoffs, tasks, agent executions, LLM and tool calls from the CrewAI event bus."""
+    tracer = tracer or get_tracer()
+    if tracer.enabled:
+        tracer.as_crewai_listener()
+
+
+# Summaries
+def load_spans(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+def summarize(spans: list[dict]) -> dict:
+    """Per span kind: count, errors, p50/p95/p99 duration, p95 queue wait and token totals; plus per (kind, name)."""
+    by_kind, by_name = defaultdict(list), defaultdict(list)
+    for span in spans:
+        by_kind[span["kind"]].append(span)
+        by_name[span["kind"], span["name"]].append(span)
+
+    def stats(group: list[dict]) -> dict:
+        ms = [span["ms"] for span in group]
+        queue = [span.get("queue_ms", 0.0) for span in group]
+        return {"count": len(group), "errors": sum("error" in span for span in group), "total_ms": sum(ms),
+                "p50_ms": _percentile(ms, 50), "p95_ms": _percentile(ms, 95), "p99_ms": _percentile(ms, 99),
+                "queue_p95_ms": _percentile(queue, 95),
+                "input_tokens": sum(span.get("input_tokens") or 0 for span in group),
+                "output_tokens": sum(span.get("output_tokens") or 0 for span in group)}
+
+    order = {kind: i for i, kind in enumerate(SPAN_KINDS)}
+    return {"spans": len(spans), "traces": len({span["trace"] for span in spans}),
+            "kinds": {kind: stats(by_kind[kind]) for kind in sorted(by_kind, key=lambda k: (order.get(k, len(order)), k))},
+            "names": {f"{kind}:{name}": stats(group) for (kind, name), group in by_name.items()}}
+
+
+def print_summary(summary: dict, top: int = 10) -> None:
+    print(f"{summary['spans']} spans in {summary['traces']} traces")
+    header = f"{'count':>7}{'errors':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queue p95':>11}{'in tok':>9}{'out tok':>9}"
+
+    def row(label: str, s: dict, width: int) -> str:
+        return (f"{label:<{width}}{s['count']:>7}{s['errors']:>7}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}"
+                f"{s['p99_ms']:>10.1f}{s['queue_p95_ms']:>11.1f}{s['input_tokens']:>9}{s['output_tokens']:>9}")
+
+    print(f"{'kind':<8}{header}")
+    for kind, s in summary["kinds"].items():
+        print(row(kind, s, 8))
+    # Where the time goes: runs contain everything else, so they are left out of the ranking
+    names = sorted(((label, s) for label, s in summary["names"].items() if not label.startswith("run:")),
+                   key=lambda item: item[1]["total_ms"], reverse=True)[:top]
+    if names:
+        print(f"\nTop {len(names)} by total time")
+        print(f"{'kind:name':<40}{'total s':>9}{header}")
+        for label, s in names:
+            print(f"{label[:39]:<40}{s['total_ms'] / 1000:>9.2f}" + row("", s, 0))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a JSON-lines trace file: p50/p95/p99 per span kind")
+    parser.add_argument("path", help="File written with TRACE_PATH")
+    parser.add_argument("--top", type=int, default=10, help="Slowest span names to list")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+    result = summarize(load_spans(args.path))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_summary(result, args.top)